@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Seedream 4.0 MCP工具事件循环延迟基准测试
+
+并发保存多张大图时，测量事件循环被磁盘写入阻塞的程度：
+后台任务每隔 1ms 唤醒一次，记录实际唤醒时间比预期晚了多少（延迟）。
+分别对比两种写入方式：
+- 阻塞写入：在事件循环中直接写文件（下载按 8KB 数据块逐块写入，Base64 整块写入）
+- 异步写入：AsyncFileWriter 合并数据块后在线程中写入
+
+每个场景执行多轮（每轮写入新文件），统计各轮结果的中位数。
+本地磁盘写入页缓存通常很快，--slow-disk-ms 为每次写入调用增加固定耗时，
+模拟网络文件系统、同步盘目录或繁忙磁盘上的写入停顿。
+
+使用方法:
+    python benchmarks/event_loop_lag.py [--images 5] [--size-mb 16] [--rounds 5] [--slow-disk-ms 0] [--dir /tmp]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import seedream_mcp.utils.async_writer as async_writer  # noqa: E402
+import seedream_mcp.utils.file_manager as file_manager  # noqa: E402
+from seedream_mcp.utils.async_writer import AsyncFileWriter  # noqa: E402
+from seedream_mcp.utils.file_manager import FileManager  # noqa: E402
+
+# 延迟采样间隔（秒）
+TICK = 0.001
+
+
+class SlowFile:
+    """每次写入前停顿固定时间的文件对象"""
+
+    def __init__(self, file, delay: float):
+        self._file = file
+        self._delay = delay
+
+    def write(self, data) -> int:
+        time.sleep(self._delay)
+        return self._file.write(data)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def slow_disk_open(delay: float):
+    """返回打开 SlowFile 的 open 替代函数"""
+    def opener(path, mode="r", *args, **kwargs):
+        return SlowFile(open(path, mode, *args, **kwargs), delay)
+    return opener
+
+
+async def monitor_lag(samples: list, stop: asyncio.Event) -> None:
+    """定时唤醒并记录事件循环延迟"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        samples.append(max(0.0, time.perf_counter() - start - TICK))
+
+
+async def fake_download(data: bytes, chunk_size: int):
+    """模拟网络下载，逐块产出数据并让出事件循环"""
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
+        await asyncio.sleep(0)
+
+
+async def download_blocking(data: bytes, path: Path) -> None:
+    """改造前的下载写入：事件循环中按 8KB 数据块直接写文件"""
+    with async_writer.open(path, "wb") as f:
+        async for chunk in fake_download(data, 8192):
+            f.write(chunk)
+
+
+async def download_async(data: bytes, path: Path) -> None:
+    """当前的下载写入：64KB 读取，合并后在线程中写入"""
+    async with AsyncFileWriter(path, "wb") as writer:
+        async for chunk in fake_download(data, 64 * 1024):
+            await writer.write(chunk)
+
+
+async def save_base64_blocking(manager: FileManager, data: bytes, path: Path) -> None:
+    """改造前的 Base64 保存：事件循环中整块写文件"""
+    await asyncio.sleep(0)
+    manager.save_bytes(path, data, overwrite=True)
+
+
+async def save_base64_async(manager: FileManager, data: bytes, path: Path) -> None:
+    """当前的 Base64 保存：在线程中写入"""
+    await manager.save_bytes_async(path, data, overwrite=True)
+
+
+async def run_scenario(make_tasks) -> dict:
+    """并发执行保存任务，返回事件循环延迟统计"""
+    samples: list = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(samples, stop))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await asyncio.gather(*make_tasks())
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    ordered = sorted(samples)
+    return {
+        "elapsed": elapsed,
+        "p50": statistics.median(ordered),
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        "max": ordered[-1],
+    }
+
+
+async def main_async(images: int, size_mb: int, rounds: int, slow_disk_ms: float, base: Path) -> None:
+    if slow_disk_ms > 0:
+        # 模块中的 open 指向模拟的慢速磁盘
+        async_writer.open = file_manager.open = slow_disk_open(slow_disk_ms / 1000)
+    else:
+        async_writer.open = file_manager.open = open
+
+    data = os.urandom(size_mb * 1024 * 1024)
+    manager = FileManager(base)
+
+    def paths(label: str, round_index: int):
+        """每轮写入新文件，避免覆盖已有文件带来的差异"""
+        directory = base / f"{label}_{round_index}"
+        directory.mkdir()
+        return [directory / f"image_{i}.png" for i in range(images)]
+
+    scenarios = [
+        ("下载-阻塞写入", lambda r: [download_blocking(data, p) for p in paths("dl_block", r)]),
+        ("下载-异步写入", lambda r: [download_async(data, p) for p in paths("dl_async", r)]),
+        ("Base64-阻塞写入", lambda r: [save_base64_blocking(manager, data, p) for p in paths("b64_block", r)]),
+        ("Base64-异步写入", lambda r: [save_base64_async(manager, data, p) for p in paths("b64_async", r)]),
+    ]
+
+    # 预热线程池与文件系统
+    await run_scenario(lambda: scenarios[1][1](-1))
+
+    print(
+        f"Python {sys.version.split()[0]}，{images} 张并发，每张 {size_mb} MB，{rounds} 轮取中位数，"
+        f"每次写入附加 {slow_disk_ms} ms，目录 {base}"
+    )
+    print(f"{'场景':<14} {'耗时(s)':>8} {'延迟p50(ms)':>12} {'延迟p99(ms)':>12} {'最大延迟(ms)':>12}")
+    for label, make_tasks in scenarios:
+        results = [await run_scenario(lambda: make_tasks(r)) for r in range(rounds)]
+        stats = {key: statistics.median(result[key] for result in results) for key in results[0]}
+        print(
+            f"{label:<14} {stats['elapsed']:8.2f} {stats['p50'] * 1000:12.2f} "
+            f"{stats['p99'] * 1000:12.2f} {stats['max'] * 1000:12.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量并发保存图片时的事件循环延迟")
+    parser.add_argument("--images", type=int, default=5, help="并发保存的图片数")
+    parser.add_argument("--size-mb", type=int, default=16, help="每张图片的大小（MB）")
+    parser.add_argument("--rounds", type=int, default=5, help="每个场景的执行轮数")
+    parser.add_argument("--slow-disk-ms", type=float, default=0, help="每次写入调用附加的耗时（毫秒）")
+    parser.add_argument("--dir", type=str, default=None, help="写入目录，默认使用临时目录")
+    args = parser.parse_args()
+
+    if args.dir:
+        asyncio.run(main_async(args.images, args.size_mb, args.rounds, args.slow_disk_ms, Path(args.dir)))
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        asyncio.run(main_async(args.images, args.size_mb, args.rounds, args.slow_disk_ms, Path(temp_dir)))
+
+
+if __name__ == "__main__":
+    main()
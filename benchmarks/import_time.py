@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Seedream 4.0 MCP工具导入耗时基准测试
+
+在全新的 Python 进程中分别导入各入口模块，统计冷启动导入耗时的中位数，
+并列出执行后已加载的重量级依赖。MCP 服务器由 IDE 按会话启动，客户端初始化后的第一个请求
+就是列出工具，因此“导入 + 列出工具”的耗时才是每个会话实际的冷启动耗时。
+
+使用方法:
+    python benchmarks/import_time.py [--runs 10]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# (说明, 导入语句)
+TARGETS = [
+    ("配置", "from seedream_mcp import SeedreamConfig"),
+    ("客户端", "from seedream_mcp import SeedreamClient"),
+    ("服务器模块", "import seedream_mcp.server"),
+    ("服务器就绪", "from seedream_mcp.server import SeedreamMCPServer; SeedreamMCPServer()"),
+    ("导入并列出工具", "import asyncio; from mcp.types import ListToolsRequest; "
+                "from seedream_mcp.server import SeedreamMCPServer; "
+                "asyncio.run(SeedreamMCPServer().server.request_handlers[ListToolsRequest]"
+                "(ListToolsRequest(method='tools/list')))"),
+]
+
+# 列出工具时不应加载的模块（仅在调用工具时才需要）
+HEAVY_MODULES = ["aiohttp", "seedream_mcp.client", "seedream_mcp.utils.qiniu_uploader", "seedream_mcp.utils.auto_save"]
+
+SNIPPET = """
+import sys
+import time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+print(elapsed)
+"""
+
+
+def measure(statement: str, runs: int) -> Tuple[float, str]:
+    """在独立进程中多次执行导入语句，返回耗时中位数（秒）与已加载的重量级依赖"""
+    samples = []
+    loaded = ""
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(statement=statement, heavy=HEAVY_MODULES)],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        loaded, elapsed = output.rstrip("\n").splitlines()[-2:]
+        samples.append(float(elapsed))
+    return statistics.median(samples), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量 seedream_mcp 冷启动导入耗时")
+    parser.add_argument("--runs", type=int, default=10, help="每个入口的测量次数")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}，每项 {args.runs} 次取中位数")
+    for label, statement in TARGETS:
+        elapsed, loaded = measure(statement, args.runs)
+        print(f"{label:<10} {elapsed * 1000:8.1f} ms   已加载: {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
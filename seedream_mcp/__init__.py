@@ -16,12 +16,29 @@ __version__ = "1.0.0"
 __author__ = "Seedream MCP Team"
 __email__ = "tengmmvp@qq.com"
 
+import importlib
+
 from .config import SeedreamConfig
-from .client import SeedreamClient
-from .server import SeedreamMCPServer
 
 __all__ = [
     "SeedreamConfig",
     "SeedreamClient", 
     "SeedreamMCPServer",
-]
\ No newline at end of file
+]
+
+# 客户端与服务器依赖 httpx、aiohttp、mcp 等较重的库，首次访问时再导入，
+# 只使用配置时无需承担这部分启动开销
+_LAZY_IMPORTS = {
+    "SeedreamClient": ".client",
+    "SeedreamMCPServer": ".server",
+}
+
+
+def __getattr__(name):
+    """首次访问时导入延迟加载的属性"""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -7,7 +7,8 @@ Seedream 4.0 MCP工具 - 客户端模块
 
 # 标准库导入
 import asyncio
-import base64
+import hashlib
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 
 # 第三方库导入
@@ -15,9 +16,38 @@ import httpx
 
 # 本地模块导入
 from .config import SeedreamConfig, get_global_config
-from .utils.errors import SeedreamAPIError, SeedreamNetworkError, SeedreamTimeoutError
+from .utils.b64_stream import B64JSONResponseParser
+from .utils.circuit_breaker import get_circuit_breaker
+from .utils.errors import (
+    SeedreamAPIError,
+    SeedreamCircuitOpenError,
+    SeedreamNetworkError,
+    SeedreamTimeoutError,
+)
+from .utils.hedging import get_hedger
+from .utils.http_pool import get_http_pool
+from .utils.image_input import (
+    ImageDownscaler,
+    LocalImageReference,
+    StreamingJSONBody,
+    contains_local_images,
+    get_encoded_image_cache,
+)
 from .utils.logging import get_logger, log_function_call
 from .utils.path_utils import suggest_similar_paths, validate_image_path
+from .utils.rate_limiter import get_rate_limiter
+from .utils.retry import (
+    FATAL,
+    NETWORK_ERROR,
+    RATE_LIMITED,
+    SERVER_ERROR,
+    TIMEOUT,
+    RetryDecision,
+    RetryPolicy,
+    classify_status,
+    parse_retry_after,
+)
+from .utils.single_flight import SingleFlight, get_single_flight
 from .utils.validation import (
     validate_image_list,
     validate_image_url,
@@ -29,6 +59,10 @@ from .utils.validation import (
 )
 
 
+# 允许对冲的端点：仅单图生成，组图等请求重复发送的代价过高
+HEDGED_ENDPOINTS = frozenset({"text_to_image"})
+
+
 class SeedreamClient:
     """
     Seedream 4.0 API 客户端类
@@ -50,6 +84,30 @@ class SeedreamClient:
         self.config = config or get_global_config()
         self.logger = get_logger(__name__)
         self._client = None
+        # 参考图编码缓存（进程级共享，重复使用同一参考图时跳过读取与编码）
+        self._image_cache = get_encoded_image_cache(self.config.image_cache_max_bytes)
+        # 参考图缩放器（可选，需要 Pillow）
+        self._downscaler = self._create_downscaler()
+        # 进程级限流器（多个客户端共享同一账号的速率与并发预算）
+        self._rate_limiter = get_rate_limiter(
+            self.config.api_rate_limit,
+            self.config.api_rate_burst,
+            self.config.api_max_in_flight
+        )
+        # 进程级熔断器（生成接口故障时快速失败）
+        self._circuit_breaker = get_circuit_breaker(
+            self.config.circuit_breaker_failure_threshold,
+            self.config.circuit_breaker_reset_timeout
+        )
+        # 对冲请求执行器（进程级共享耗时样本）
+        self._hedger = get_hedger(self.config.hedge_percentile, self.config.hedge_max_ratio)
+        # API 调用重试策略
+        self._retry_policy = RetryPolicy(
+            max_attempts=self.config.max_retries,
+            base_delay=self.config.retry_base_delay,
+            max_delay=self.config.retry_max_delay,
+            deadline=self.config.retry_deadline
+        )
 
     async def __aenter__(self):
         """
@@ -165,7 +223,7 @@ class SeedreamClient:
 
         try:
             # 处理图像输入
-            image_data = await self._prepare_image_input(image)
+            image_data = await self._prepare_image_input(image, size)
 
             # 构建请求参数
             request_data = {
@@ -225,11 +283,8 @@ class SeedreamClient:
         self.logger.info(f"开始多图融合任务: prompt='{prompt[:50]}...', images={len(images)}张, size={size}")
 
         try:
-            # 处理图像输入
-            image_data_list = []
-            for image in images:
-                image_data = await self._prepare_image_input(image)
-                image_data_list.append(image_data)
+            # 处理图像输入(并发准备,结果保持输入顺序)
+            image_data_list = await self._prepare_image_inputs(images, size)
 
             # 构建请求参数
             request_data = {
@@ -259,7 +314,8 @@ class SeedreamClient:
         size: str = "2K",
         watermark: bool = True,
         response_format: str = "url",
-        image: Optional[Union[str, List[str]]] = None
+        image: Optional[Union[str, List[str]]] = None,
+        spool_dir: Optional[Path] = None
     ) -> Dict[str, Any]:
         """
         组图生成功能(连续生成多张图像)
@@ -276,6 +332,8 @@ class SeedreamClient:
             watermark: 是否添加水印,默认为 True
             response_format: 响应格式,可选值为 "url" 或 "b64_json",默认为 "url"
             image: 可选的参考图像,支持单张图像 URL/路径或多张图像 URL/路径列表(最多 10 张)
+            spool_dir: 可选的暂存目录,response_format 为 "b64_json" 时流式解析响应,
+                图片边接收边解码写入该目录,结果中以 b64_json_spool 等字段代替 b64_json
         
         Returns:
             包含生成结果的字典,包括图像数据、使用信息等
@@ -296,15 +354,12 @@ class SeedreamClient:
         if image is not None:
             if isinstance(image, str):
                 # 单张图片
-                processed_image = await self._prepare_image_input(image)
+                processed_image = await self._prepare_image_input(image, size)
             elif isinstance(image, list):
                 # 多张图片
                 if len(image) > 10:
                     raise SeedreamAPIError("最多支持 10 张参考图片")
-                processed_image = []
-                for img in image:
-                    processed_img = await self._prepare_image_input(img)
-                    processed_image.append(processed_img)
+                processed_image = await self._prepare_image_inputs(image, size)
             else:
                 raise SeedreamAPIError("image 参数必须是字符串或字符串列表")
 
@@ -332,7 +387,10 @@ class SeedreamClient:
                 request_data["image"] = processed_image
 
             # 调用 API
-            response = await self._call_api("sequential_generation", request_data)
+            response = await self._call_api(
+                "sequential_generation", request_data,
+                spool_dir=spool_dir if response_format == "b64_json" else None
+            )
 
             self.logger.info("组图生成任务完成")
             return response
@@ -343,39 +401,74 @@ class SeedreamClient:
 
     async def close(self):
         """
-        关闭 HTTP 客户端连接
+        释放 HTTP 客户端引用
+        
+        底层 AsyncClient 由进程级传输池共享，这里只释放当前实例的引用，
+        连接保留在池中供其他客户端复用。需要彻底关闭连接时调用 close_transport()。
+        """
+        self._client = None
+
+    async def close_transport(self):
+        """
+        关闭共享传输池中的所有连接
         
-        释放客户端资源,关闭所有打开的连接。
+        通常在服务器关闭时调用。
         """
-        if self._client:
-            await self._client.aclose()
-            self._client = None
+        self._client = None
+        await get_http_pool().close_all()
+
+    async def warm_up(self) -> bool:
+        """
+        预热到 API 主机的连接
+        
+        提前完成 DNS 解析与 TCP/TLS 握手，使首个生成请求可直接复用连接。
+        
+        Returns:
+            预热是否成功
+        """
+        await self._ensure_client()
+        return await get_http_pool().warm_up(self._client, self.config.base_url)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取客户端运行统计信息
+        
+        Returns:
+            包含传输池、参考图缓存、重试、限流、熔断与对冲统计的字典
+        """
+        return {
+            "http_pool": get_http_pool().get_stats(),
+            "image_cache": self._image_cache.get_stats(),
+            "single_flight": get_single_flight().get_stats(),
+            "retry": self._retry_policy.get_stats(),
+            "rate_limiter": self._rate_limiter.get_stats(),
+            "circuit_breaker": self._circuit_breaker.get_stats(),
+            "hedging": self._hedger.get_stats() if self.config.hedge_enabled else None,
+            "image_downscale": self._downscaler.get_stats() if self._downscaler else None,
+        }
 
     async def _ensure_client(self):
         """
-        确保 HTTP 客户端已创建
+        确保 HTTP 客户端已就绪
         
-        如果客户端未初始化,则创建新的 AsyncClient 实例。
+        从进程级传输池获取共享的 AsyncClient 实例，复用已建立的连接。
         
         Raises:
             SeedreamAPIError: 客户端创建失败或配置无效
         """
-        if self._client is None:
+        if self._client is None or self._client.is_closed:
             try:
                 headers = self._get_headers()
                 if not headers:
                     raise SeedreamAPIError("无法生成请求头：配置可能无效")
 
-                self._client = httpx.AsyncClient(
-                    timeout=self.config.api_timeout,
-                    headers=headers
-                )
+                self._client = get_http_pool().get_client(self.config, headers)
 
                 # 验证客户端是否正确创建
                 if self._client is None:
                     raise SeedreamAPIError("HTTP 客户端创建失败")
 
-                self.logger.debug("HTTP 客户端创建成功")
+                self.logger.debug("HTTP 客户端获取成功")
 
             except Exception as e:
                 self.logger.error(f"HTTP 客户端创建失败: {str(e)}")
@@ -411,16 +504,67 @@ class SeedreamClient:
     async def _call_api(
         self,
         endpoint: str,
-        request_data: Dict[str, Any]
+        request_data: Dict[str, Any],
+        spool_dir: Optional[Path] = None
     ) -> Dict[str, Any]:
         """
         调用 Seedream API
         
-        执行 HTTP POST 请求,支持自动重试机制。
+        启用请求合并时,与进行中的相同请求(相同账号、端点和规范化后的请求体)
+        共享同一次上游调用的结果。启用对冲请求时,文生图请求超过历史耗时分位数仍未完成
+        会再发出一个相同请求,取先完成的结果。
         
         Args:
             endpoint: API 端点标识(用于日志记录)
             request_data: 请求体数据
+            spool_dir: 可选的暂存目录,指定时流式解析 b64_json 响应并把图片写入该目录
+        
+        Returns:
+            包含成功标志、数据、使用信息等的响应字典
+        
+        Raises:
+            SeedreamAPIError: API 调用失败或响应解析失败
+            SeedreamTimeoutError: 请求超时
+            SeedreamNetworkError: 网络连接失败
+        """
+        if spool_dir is not None:
+            # 暂存文件只能交给一个调用方,流式解析的请求不参与合并与对冲
+            return await self._send_request(endpoint, request_data, spool_dir)
+
+        hedged = self.config.hedge_enabled and endpoint in HEDGED_ENDPOINTS
+
+        async def send() -> Dict[str, Any]:
+            if hedged:
+                return await self._hedger.run(lambda: self._send_request(endpoint, request_data))
+            return await self._send_request(endpoint, request_data)
+
+        if not self.config.request_coalescing_enabled:
+            return await send()
+
+        # 键中包含 API 密钥摘要,不同账号的请求不会合并
+        key = SingleFlight.make_key(
+            self.config.base_url,
+            hashlib.sha256(self.config.api_key.encode("utf-8")).hexdigest(),
+            request_data
+        )
+        return await get_single_flight().do(key, send)
+
+    async def _send_request(
+        self,
+        endpoint: str,
+        request_data: Dict[str, Any],
+        spool_dir: Optional[Path] = None
+    ) -> Dict[str, Any]:
+        """
+        发送 API 请求
+        
+        执行 HTTP POST 请求,按重试策略处理失败:限流、服务端错误、超时和网络错误会退避重试,
+        其他客户端错误(如参数错误)立即返回。
+        
+        Args:
+            endpoint: API 端点标识(用于日志记录)
+            request_data: 请求体数据
+            spool_dir: 可选的暂存目录,指定时按数据块读取响应体,图片边解码边写入暂存文件
         
         Returns:
             包含成功标志、数据、使用信息等的响应字典
@@ -439,87 +583,164 @@ class SeedreamClient:
         # 构建 URL(Seedream 4.0 API 仅有一个端点)
         url = f"{self.config.base_url}/images/generations"
 
-        for attempt in range(self.config.max_retries):
-            try:
-                self.logger.debug(f"{endpoint} API 调用尝试 {attempt + 1}/{self.config.max_retries}")
-                self.logger.debug(f"请求 URL: {url}")
-                self.logger.debug(f"请求数据: {request_data}")
-
-                # 确保客户端的 post 方法存在且可调用
-                if not hasattr(self._client, 'post') or not callable(self._client.post):
-                    raise SeedreamAPIError("HTTP 客户端的 post 方法不可用")
-
-                response = await self._client.post(
-                    url,
-                    json=request_data,
-                    timeout=self.config.api_timeout
+        # 包含本地参考图时使用流式请求体，按块编码图片，避免在内存中构建完整的 Base64 字符串
+        streaming_body = StreamingJSONBody(request_data) if contains_local_images(request_data) else None
+
+        async def attempt_once(attempt: int) -> Dict[str, Any]:
+            self.logger.debug(f"{endpoint} API 调用尝试 {attempt}/{self._retry_policy.max_attempts}")
+            self.logger.debug(f"请求 URL: {url}")
+            self.logger.debug(f"请求数据: {request_data}")
+
+            # 确保客户端的 post 方法存在且可调用
+            if not hasattr(self._client, 'post') or not callable(self._client.post):
+                raise SeedreamAPIError("HTTP 客户端的 post 方法不可用")
+
+            # 每次尝试（包括重试）都需要通过限流器，按配置的速率和并发上限发送
+            async with self._rate_limiter.acquire():
+                if spool_dir is not None:
+                    # 只接收响应头，响应体在下面按数据块解析
+                    if streaming_body is not None:
+                        body = {"content": streaming_body.stream(), "headers": streaming_body.headers}
+                    else:
+                        body = {"json": request_data}
+                    request = self._client.build_request(
+                        "POST", url, timeout=self.config.api_timeout, **body
+                    )
+                    response = await self._client.send(request, stream=True)
+                elif streaming_body is not None:
+                    response = await self._client.post(
+                        url,
+                        content=streaming_body.stream(),
+                        headers=streaming_body.headers,
+                        timeout=self.config.api_timeout
+                    )
+                else:
+                    response = await self._client.post(
+                        url,
+                        json=request_data,
+                        timeout=self.config.api_timeout
+                    )
+
+            # 验证响应对象
+            if response is None:
+                raise SeedreamAPIError("API 响应为空")
+
+            self.logger.debug(f"收到响应: 状态码={response.status_code}")
+
+            # 检查 HTTP 状态码
+            if response.status_code != 200:
+                if spool_dir is not None:
+                    await response.aread()
+                raise SeedreamAPIError(
+                    f"HTTP {response.status_code}: {response.text}",
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("retry-after"))
                 )
 
-                # 验证响应对象
-                if response is None:
-                    raise SeedreamAPIError("API 响应为空")
-
-                self.logger.debug(f"收到响应: 状态码={response.status_code}")
-
-                # 检查 HTTP 状态码
-                if response.status_code == 200:
-                    # 解析 JSON 响应
-                    try:
-                        result = response.json()
-                        self.logger.debug(f"解析 JSON 成功: {result}")
-
-                        # 记录返回的图片数量
-                        data = result.get("data", [])
-                        if isinstance(data, list):
-                            self.logger.info(f"API 返回了 {len(data)} 张图片")
-                        else:
-                            self.logger.info(f"API 返回数据类型: {type(data)}")
-                    except Exception as json_error:
-                        raise SeedreamAPIError(f"JSON 解析失败: {str(json_error)}")
-
-                    return {
-                        "success": True,
-                        "data": result.get("data", []),
-                        "usage": result.get("usage", {}),
-                        "task_id": result.get("task_id"),
-                        "status": result.get("status")
-                    }
+            # 解析 JSON 响应
+            try:
+                if spool_dir is not None:
+                    # 图片数据已写入暂存文件，结果中只有文件信息
+                    result = await self._receive_spooled(response, spool_dir)
                 else:
-                    error_msg = f"HTTP {response.status_code}: {response.text}"
-                    raise SeedreamAPIError(error_msg)
+                    result = response.json()
+                self.logger.debug(f"解析 JSON 成功: {result}")
 
-            except httpx.TimeoutException:
-                self.logger.warning(f"{endpoint} API 调用超时 (尝试 {attempt + 1}/{self.config.max_retries})")
-                if attempt == self.config.max_retries - 1:
-                    raise SeedreamTimeoutError(f"{endpoint} API 调用超时")
-
-            except httpx.NetworkError as e:
-                self.logger.warning(f"{endpoint} 网络错误 (尝试 {attempt + 1}/{self.config.max_retries}): {str(e)}")
-                if attempt == self.config.max_retries - 1:
-                    raise SeedreamNetworkError(f"{endpoint} 网络连接失败: {str(e)}")
+                # 记录返回的图片数量
+                data = result.get("data", [])
+                if isinstance(data, list):
+                    self.logger.info(f"API 返回了 {len(data)} 张图片")
+                else:
+                    self.logger.info(f"API 返回数据类型: {type(data)}")
+            except (httpx.TimeoutException, httpx.NetworkError):
+                # 流式读取响应体时的超时与网络错误按原类型交给重试策略
+                raise
+            except Exception as json_error:
+                raise SeedreamAPIError(f"JSON 解析失败: {str(json_error)}")
+
+            return {
+                "success": True,
+                "data": result.get("data", []),
+                "usage": result.get("usage", {}),
+                "task_id": result.get("task_id"),
+                "status": result.get("status")
+            }
 
+        async def guarded_attempt(attempt: int) -> Dict[str, Any]:
+            # 熔断中直接抛出 SeedreamCircuitOpenError,该错误不可重试,重试循环随之结束
+            self._circuit_breaker.allow()
+            try:
+                result = await attempt_once(attempt)
             except Exception as e:
-                self.logger.warning(f"{endpoint} API 调用失败 (尝试 {attempt + 1}/{self.config.max_retries}): {str(e)}")
-                if attempt == self.config.max_retries - 1:
-                    raise
+                category = _classify_api_error(e).category
+                if category in (SERVER_ERROR, TIMEOUT, NETWORK_ERROR):
+                    self._circuit_breaker.record_failure()
+                elif category == RATE_LIMITED:
+                    self._circuit_breaker.record_ignored()
+                else:
+                    # 参数错误等说明服务本身可用
+                    self._circuit_breaker.record_success()
+                raise
+            except BaseException:
+                self._circuit_breaker.record_ignored()
+                raise
+            self._circuit_breaker.record_success()
+            return result
 
-            # 指数退避重试
-            await asyncio.sleep(2 ** attempt)
+        try:
+            return await self._retry_policy.run(guarded_attempt, _classify_api_error, f"{endpoint} API 调用")
+        except httpx.TimeoutException:
+            raise SeedreamTimeoutError(f"{endpoint} API 调用超时")
+        except httpx.NetworkError as e:
+            raise SeedreamNetworkError(f"{endpoint} 网络连接失败: {str(e)}")
 
-        raise SeedreamAPIError(f"{endpoint} API 调用重试次数已用尽")
+    async def _receive_spooled(self, response: httpx.Response, spool_dir: Path) -> Dict[str, Any]:
+        """
+        按数据块读取响应体,把 b64_json 图片边解码边写入暂存文件
+        
+        读取中断或解析失败时删除本次尝试已写入的暂存文件,重试会重新写入。
+        
+        Args:
+            response: 以流式方式接收的响应
+            spool_dir: 暂存目录
+        
+        Returns:
+            解析后的响应字典
+        
+        Raises:
+            B64StreamError: 响应体不是有效的 b64_json 响应
+        """
+        parser = B64JSONResponseParser(spool_dir, self.config.auto_save_write_buffer_size)
+        try:
+            async for chunk in response.aiter_bytes():
+                await parser.feed(chunk)
+            return await parser.finish()
+        except BaseException:
+            await parser.discard()
+            raise
+        finally:
+            await response.aclose()
 
-    async def _prepare_image_input(self, image: str) -> str:
+    async def _prepare_image_input(
+        self,
+        image: str,
+        size: Optional[str] = None
+    ) -> Union[str, LocalImageReference]:
         """
         准备图像输入数据
         
         将图像 URL 或本地文件路径转换为 API 所需格式。
-        对于 URL 直接返回,对于本地文件读取并转换为 Base64 编码。
+        对于 URL 直接返回,对于本地文件返回延迟编码的引用,
+        在发送请求时按块读取并编码为 Base64 Data URI。
+        启用参考图缩放时,本地文件会先缩小到目标尺寸档位再编码。
+        路径校验、缩放等文件系统操作在线程中执行,不阻塞事件循环。
         
         Args:
             image: 图像 URL 或本地文件路径
+            size: 目标尺寸档位(1K/2K/4K),用于参考图缩放
         
         Returns:
-            处理后的图像数据(URL 或 Base64 Data URI)
+            图像 URL 或本地图片引用(LocalImageReference)
         
         Raises:
             SeedreamAPIError: 图像文件不存在或处理失败
@@ -529,49 +750,94 @@ class SeedreamClient:
             if image.startswith(("http://", "https://")):
                 return image
 
-            # 验证图片路径
-            is_valid, error_msg, normalized_path = validate_image_path(image)
-
-            if not is_valid:
-                # 提供路径建议
-                suggestions = suggest_similar_paths(image)
-                suggestion_text = ""
-                if suggestions:
-                    suggestion_text = f"\n\n建议的相似路径:\n" + "\n".join(f"  • {s}" for s in suggestions[:3])
-
-                raise SeedreamAPIError(f"{error_msg}{suggestion_text}")
-
-            # 读取文件并转换为 Base64
-            with open(normalized_path, "rb") as f:
-                image_bytes = f.read()
-
-            # 转换为 Base64
-            image_b64 = base64.b64encode(image_bytes).decode('utf-8')
-
-            # 获取 MIME 类型
-            suffix = normalized_path.suffix.lower()
-            mime_type_map = {
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif',
-                '.bmp': 'image/bmp',
-                '.tiff': 'image/tiff',
-                '.tif': 'image/tiff',
-                '.webp': 'image/webp',
-                '.svg': 'image/svg+xml',
-                '.ico': 'image/x-icon'
-            }
-            mime_type = mime_type_map.get(suffix, 'image/jpeg')
-
-            self.logger.info(f"成功处理图片文件: {normalized_path} ({len(image_bytes)} bytes)")
-            return f"data:{mime_type};base64,{image_b64}"
+            return await asyncio.to_thread(self._prepare_local_image, image, size)
 
         except SeedreamAPIError:
             raise
         except Exception as e:
             raise SeedreamAPIError(f"图像处理失败: {str(e)}")
 
+    async def _prepare_image_inputs(
+        self,
+        images: List[str],
+        size: Optional[str] = None
+    ) -> List[Union[str, LocalImageReference]]:
+        """
+        并发准备多张图像输入
+        
+        各图像的准备在线程池中同时进行,耗时取决于最慢的一张而非总和。
+        
+        Args:
+            images: 图像 URL 或本地文件路径列表
+            size: 目标尺寸档位(1K/2K/4K),用于参考图缩放
+        
+        Returns:
+            与输入顺序一致的处理结果列表
+        
+        Raises:
+            SeedreamAPIError: 任一图像文件不存在或处理失败
+        """
+        return list(await asyncio.gather(*[self._prepare_image_input(image, size) for image in images]))
+
+    def _prepare_local_image(self, image: str, size: Optional[str] = None) -> LocalImageReference:
+        """
+        校验本地图片路径并创建图片引用(同步执行,供线程池调用)
+        
+        Args:
+            image: 本地文件路径
+            size: 目标尺寸档位(1K/2K/4K),用于参考图缩放
+        
+        Returns:
+            本地图片引用
+        
+        Raises:
+            SeedreamAPIError: 图像文件不存在或路径无效
+        """
+        # 验证图片路径
+        is_valid, error_msg, normalized_path = validate_image_path(image)
+
+        if not is_valid:
+            # 提供路径建议
+            suggestions = suggest_similar_paths(image)
+            suggestion_text = ""
+            if suggestions:
+                suggestion_text = f"\n\n建议的相似路径:\n" + "\n".join(f"  • {s}" for s in suggestions[:3])
+
+            raise SeedreamAPIError(f"{error_msg}{suggestion_text}")
+
+        image_ref = LocalImageReference(
+            normalized_path,
+            cache=self._image_cache,
+            downscaler=self._downscaler,
+            size=size
+        )
+
+        notes = []
+        if image_ref.downscaled:
+            notes.append(f"缩放后 {image_ref.encoded_length} bytes Base64")
+        if image_ref.cache_hit:
+            notes.append("命中编码缓存")
+        note_text = f", {', '.join(notes)}" if notes else ""
+        self.logger.info(f"成功处理图片文件: {normalized_path} ({image_ref.size} bytes{note_text})")
+        return image_ref
+
+    def _create_downscaler(self) -> Optional[ImageDownscaler]:
+        """
+        按配置创建参考图缩放器
+        
+        Returns:
+            缩放器实例,未启用或未安装 Pillow 时返回 None
+        """
+        if not self.config.image_downscale_enabled:
+            return None
+        if not ImageDownscaler.available():
+            self.logger.warning("未安装 Pillow，参考图缩放功能将被禁用。请运行: pip install Pillow")
+            return None
+        return ImageDownscaler(
+            output_format=self.config.image_downscale_format,
+            quality=self.config.image_downscale_quality
+        )
+
     def _handle_api_error(self, error: Exception) -> Exception:
         """
         处理 API 错误
@@ -599,3 +865,27 @@ class SeedreamClient:
 
         # 其他 API 错误
         return SeedreamAPIError(f"API 调用失败: {error_str}")
+
+
+def _classify_api_error(error: Exception) -> RetryDecision:
+    """
+    对 API 调用异常分类
+    
+    Args:
+        error: 单次尝试抛出的异常
+    
+    Returns:
+        分类结果
+    """
+    if isinstance(error, httpx.TimeoutException):
+        return RetryDecision(TIMEOUT)
+    if isinstance(error, httpx.NetworkError):
+        return RetryDecision(NETWORK_ERROR)
+    if isinstance(error, SeedreamCircuitOpenError):
+        return RetryDecision(FATAL)
+    if isinstance(error, SeedreamAPIError):
+        if error.status_code is not None:
+            return RetryDecision(classify_status(error.status_code), error.retry_after)
+        # 响应为空或无法解析,按服务端临时错误处理
+        return RetryDecision(SERVER_ERROR)
+    return RetryDecision(FATAL)
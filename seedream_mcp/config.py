@@ -28,6 +28,52 @@ class SeedreamConfig:
     timeout: int = 60
     api_timeout: int = 60
     max_retries: int = 3
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 30.0
+    retry_deadline: float = 120.0  # 0 表示不限制
+    
+    # 工具调用调度配置
+    tool_generation_concurrency: int = 4
+    tool_sequential_concurrency: int = 1
+    
+    # 后台任务配置
+    job_max_jobs: int = 100
+    job_retention: float = 3600.0
+    
+    # 对冲请求配置
+    hedge_enabled: bool = False
+    hedge_percentile: float = 0.95
+    hedge_max_ratio: float = 0.1
+    
+    # 熔断配置（失败阈值为 0 表示不熔断）
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_reset_timeout: float = 30.0
+    
+    # API限流配置（0 表示不限制）
+    api_rate_limit: float = 0.0  # 每秒请求数
+    api_rate_burst: int = 1
+    api_max_in_flight: int = 0
+    
+    # HTTP连接池配置
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http2_enabled: bool = False
+    http_warmup_enabled: bool = True
+    
+    # 请求合并配置
+    request_coalescing_enabled: bool = True
+    
+    # 生成结果缓存配置
+    result_cache_enabled: bool = False
+    result_cache_ttl: int = 7 * 24 * 3600  # 7天
+    result_cache_max_entries: int = 1000
+    
+    # 参考图配置
+    image_cache_max_bytes: int = 256 * 1024 * 1024  # 256MB
+    image_downscale_enabled: bool = False
+    image_downscale_format: str = "jpeg"
+    image_downscale_quality: int = 85
     
     # 日志配置
     log_level: str = "INFO"
@@ -42,6 +88,12 @@ class SeedreamConfig:
     auto_save_max_concurrent: int = 5
     auto_save_date_folder: bool = True
     auto_save_cleanup_days: int = 30
+    auto_save_connection_limit_per_host: int = 5
+    auto_save_dns_cache_ttl: int = 300
+    auto_save_write_buffer_size: int = 256 * 1024  # 256KB
+    auto_save_stream_b64: bool = True
+    auto_save_dedup_enabled: bool = False
+    auto_save_index_enabled: bool = True
     
     def __post_init__(self):
         """配置验证"""
@@ -81,6 +133,86 @@ class SeedreamConfig:
         if self.max_retries < 0:
             raise SeedreamConfigError("max_retries不能小于0")
         
+        # 验证重试退避配置
+        if self.retry_base_delay < 0:
+            raise SeedreamConfigError("retry_base_delay不能小于0")
+        
+        if self.retry_max_delay < self.retry_base_delay:
+            raise SeedreamConfigError("retry_max_delay不能小于retry_base_delay")
+        
+        if self.retry_deadline < 0:
+            raise SeedreamConfigError("retry_deadline不能小于0")
+        
+        # 验证工具调用调度配置
+        if self.tool_generation_concurrency <= 0:
+            raise SeedreamConfigError("tool_generation_concurrency必须大于0")
+        
+        if self.tool_sequential_concurrency <= 0:
+            raise SeedreamConfigError("tool_sequential_concurrency必须大于0")
+        
+        # 验证后台任务配置
+        if self.job_max_jobs <= 0:
+            raise SeedreamConfigError("job_max_jobs必须大于0")
+        
+        if self.job_retention < 0:
+            raise SeedreamConfigError("job_retention不能小于0")
+        
+        # 验证对冲请求配置
+        if not 0 < self.hedge_percentile < 1:
+            raise SeedreamConfigError("hedge_percentile必须在0到1之间")
+        
+        if not 0 <= self.hedge_max_ratio <= 1:
+            raise SeedreamConfigError("hedge_max_ratio必须在0到1之间")
+        
+        # 验证熔断配置
+        if self.circuit_breaker_failure_threshold < 0:
+            raise SeedreamConfigError("circuit_breaker_failure_threshold不能小于0")
+        
+        if self.circuit_breaker_reset_timeout <= 0:
+            raise SeedreamConfigError("circuit_breaker_reset_timeout必须大于0")
+        
+        # 验证API限流配置
+        if self.api_rate_limit < 0:
+            raise SeedreamConfigError("api_rate_limit不能小于0")
+        
+        if self.api_rate_burst <= 0:
+            raise SeedreamConfigError("api_rate_burst必须大于0")
+        
+        if self.api_max_in_flight < 0:
+            raise SeedreamConfigError("api_max_in_flight不能小于0")
+        
+        # 验证HTTP连接池配置
+        if self.http_max_connections <= 0:
+            raise SeedreamConfigError("http_max_connections必须大于0")
+        
+        if self.http_max_keepalive_connections < 0:
+            raise SeedreamConfigError("http_max_keepalive_connections不能小于0")
+        
+        if self.http_max_keepalive_connections > self.http_max_connections:
+            raise SeedreamConfigError("http_max_keepalive_connections不能大于http_max_connections")
+        
+        if self.http_keepalive_expiry < 0:
+            raise SeedreamConfigError("http_keepalive_expiry不能小于0")
+        
+        # 验证参考图配置
+        if self.image_cache_max_bytes < 0:
+            raise SeedreamConfigError("image_cache_max_bytes不能小于0")
+        
+        valid_downscale_formats = ["jpeg", "webp"]
+        if self.image_downscale_format.lower() not in valid_downscale_formats:
+            raise SeedreamConfigError(f"image_downscale_format必须是以下值之一: {valid_downscale_formats}")
+        self.image_downscale_format = self.image_downscale_format.lower()
+        
+        if not 1 <= self.image_downscale_quality <= 100:
+            raise SeedreamConfigError("image_downscale_quality必须在1到100之间")
+        
+        # 验证生成结果缓存配置
+        if self.result_cache_ttl < 0:
+            raise SeedreamConfigError("result_cache_ttl不能小于0")
+        
+        if self.result_cache_max_entries <= 0:
+            raise SeedreamConfigError("result_cache_max_entries必须大于0")
+        
         # 验证log_level
         valid_log_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
         if self.log_level.upper() not in valid_log_levels:
@@ -105,6 +237,15 @@ class SeedreamConfig:
         if self.auto_save_cleanup_days < 0:
             raise SeedreamConfigError("auto_save_cleanup_days不能小于0")
         
+        if self.auto_save_connection_limit_per_host <= 0:
+            raise SeedreamConfigError("auto_save_connection_limit_per_host必须大于0")
+        
+        if self.auto_save_dns_cache_ttl < 0:
+            raise SeedreamConfigError("auto_save_dns_cache_ttl不能小于0")
+        
+        if self.auto_save_write_buffer_size <= 0:
+            raise SeedreamConfigError("auto_save_write_buffer_size必须大于0")
+        
         # 验证自动保存目录
         if self.auto_save_base_dir:
             try:
@@ -165,6 +306,35 @@ class SeedreamConfig:
             timeout=_parse_int(os.getenv("SEEDREAM_TIMEOUT", "60")),
             api_timeout=_parse_int(os.getenv("SEEDREAM_API_TIMEOUT", "60")),
             max_retries=_parse_int(os.getenv("SEEDREAM_MAX_RETRIES", "3")),
+            retry_base_delay=_parse_float(os.getenv("SEEDREAM_RETRY_BASE_DELAY", "1")),
+            retry_max_delay=_parse_float(os.getenv("SEEDREAM_RETRY_MAX_DELAY", "30")),
+            retry_deadline=_parse_float(os.getenv("SEEDREAM_RETRY_DEADLINE", "120")),
+            tool_generation_concurrency=_parse_int(os.getenv("SEEDREAM_TOOL_GENERATION_CONCURRENCY", "4")),
+            tool_sequential_concurrency=_parse_int(os.getenv("SEEDREAM_TOOL_SEQUENTIAL_CONCURRENCY", "1")),
+            job_max_jobs=_parse_int(os.getenv("SEEDREAM_JOB_MAX_JOBS", "100")),
+            job_retention=_parse_float(os.getenv("SEEDREAM_JOB_RETENTION", "3600")),
+            hedge_enabled=_parse_bool(os.getenv("SEEDREAM_HEDGE_ENABLED", "false")),
+            hedge_percentile=_parse_float(os.getenv("SEEDREAM_HEDGE_PERCENTILE", "0.95")),
+            hedge_max_ratio=_parse_float(os.getenv("SEEDREAM_HEDGE_MAX_RATIO", "0.1")),
+            circuit_breaker_failure_threshold=_parse_int(os.getenv("SEEDREAM_CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5")),
+            circuit_breaker_reset_timeout=_parse_float(os.getenv("SEEDREAM_CIRCUIT_BREAKER_RESET_TIMEOUT", "30")),
+            api_rate_limit=_parse_float(os.getenv("SEEDREAM_API_RATE_LIMIT", "0")),
+            api_rate_burst=_parse_int(os.getenv("SEEDREAM_API_RATE_BURST", "1")),
+            api_max_in_flight=_parse_int(os.getenv("SEEDREAM_API_MAX_IN_FLIGHT", "0")),
+            # HTTP连接池配置
+            http_max_connections=_parse_int(os.getenv("SEEDREAM_HTTP_MAX_CONNECTIONS", "100")),
+            http_max_keepalive_connections=_parse_int(os.getenv("SEEDREAM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            http_keepalive_expiry=_parse_float(os.getenv("SEEDREAM_HTTP_KEEPALIVE_EXPIRY", "30")),
+            http2_enabled=_parse_bool(os.getenv("SEEDREAM_HTTP2_ENABLED", "false")),
+            http_warmup_enabled=_parse_bool(os.getenv("SEEDREAM_HTTP_WARMUP_ENABLED", "true")),
+            request_coalescing_enabled=_parse_bool(os.getenv("SEEDREAM_REQUEST_COALESCING_ENABLED", "true")),
+            result_cache_enabled=_parse_bool(os.getenv("SEEDREAM_RESULT_CACHE_ENABLED", "false")),
+            result_cache_ttl=_parse_int(os.getenv("SEEDREAM_RESULT_CACHE_TTL", str(7 * 24 * 3600))),
+            result_cache_max_entries=_parse_int(os.getenv("SEEDREAM_RESULT_CACHE_MAX_ENTRIES", "1000")),
+            image_cache_max_bytes=_parse_int(os.getenv("SEEDREAM_IMAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            image_downscale_enabled=_parse_bool(os.getenv("SEEDREAM_IMAGE_DOWNSCALE_ENABLED", "false")),
+            image_downscale_format=os.getenv("SEEDREAM_IMAGE_DOWNSCALE_FORMAT", "jpeg"),
+            image_downscale_quality=_parse_int(os.getenv("SEEDREAM_IMAGE_DOWNSCALE_QUALITY", "85")),
             log_level=os.getenv("LOG_LEVEL", "INFO"),
             log_file=os.getenv("LOG_FILE"),
             # 自动保存配置
@@ -176,6 +346,12 @@ class SeedreamConfig:
             auto_save_max_concurrent=_parse_int(os.getenv("SEEDREAM_AUTO_SAVE_MAX_CONCURRENT", "5")),
             auto_save_date_folder=_parse_bool(os.getenv("SEEDREAM_AUTO_SAVE_DATE_FOLDER", "true")),
             auto_save_cleanup_days=_parse_int(os.getenv("SEEDREAM_AUTO_SAVE_CLEANUP_DAYS", "30")),
+            auto_save_connection_limit_per_host=_parse_int(os.getenv("SEEDREAM_AUTO_SAVE_CONNECTION_LIMIT_PER_HOST", "5")),
+            auto_save_dns_cache_ttl=_parse_int(os.getenv("SEEDREAM_AUTO_SAVE_DNS_CACHE_TTL", "300")),
+            auto_save_write_buffer_size=_parse_int(os.getenv("SEEDREAM_AUTO_SAVE_WRITE_BUFFER_SIZE", "262144")),
+            auto_save_stream_b64=_parse_bool(os.getenv("SEEDREAM_AUTO_SAVE_STREAM_B64", "true")),
+            auto_save_dedup_enabled=_parse_bool(os.getenv("SEEDREAM_AUTO_SAVE_DEDUP_ENABLED", "false")),
+            auto_save_index_enabled=_parse_bool(os.getenv("SEEDREAM_AUTO_SAVE_INDEX_ENABLED", "true")),
         )
         
         return config
@@ -191,6 +367,34 @@ class SeedreamConfig:
             "timeout": self.timeout,
             "api_timeout": self.api_timeout,
             "max_retries": self.max_retries,
+            "retry_base_delay": self.retry_base_delay,
+            "retry_max_delay": self.retry_max_delay,
+            "retry_deadline": self.retry_deadline,
+            "tool_generation_concurrency": self.tool_generation_concurrency,
+            "tool_sequential_concurrency": self.tool_sequential_concurrency,
+            "job_max_jobs": self.job_max_jobs,
+            "job_retention": self.job_retention,
+            "hedge_enabled": self.hedge_enabled,
+            "hedge_percentile": self.hedge_percentile,
+            "hedge_max_ratio": self.hedge_max_ratio,
+            "circuit_breaker_failure_threshold": self.circuit_breaker_failure_threshold,
+            "circuit_breaker_reset_timeout": self.circuit_breaker_reset_timeout,
+            "api_rate_limit": self.api_rate_limit,
+            "api_rate_burst": self.api_rate_burst,
+            "api_max_in_flight": self.api_max_in_flight,
+            "http_max_connections": self.http_max_connections,
+            "http_max_keepalive_connections": self.http_max_keepalive_connections,
+            "http_keepalive_expiry": self.http_keepalive_expiry,
+            "http2_enabled": self.http2_enabled,
+            "http_warmup_enabled": self.http_warmup_enabled,
+            "request_coalescing_enabled": self.request_coalescing_enabled,
+            "result_cache_enabled": self.result_cache_enabled,
+            "result_cache_ttl": self.result_cache_ttl,
+            "result_cache_max_entries": self.result_cache_max_entries,
+            "image_cache_max_bytes": self.image_cache_max_bytes,
+            "image_downscale_enabled": self.image_downscale_enabled,
+            "image_downscale_format": self.image_downscale_format,
+            "image_downscale_quality": self.image_downscale_quality,
             "log_level": self.log_level,
             "log_file": self.log_file,
             "auto_save_enabled": self.auto_save_enabled,
@@ -201,6 +405,12 @@ class SeedreamConfig:
             "auto_save_max_concurrent": self.auto_save_max_concurrent,
             "auto_save_date_folder": self.auto_save_date_folder,
             "auto_save_cleanup_days": self.auto_save_cleanup_days,
+            "auto_save_connection_limit_per_host": self.auto_save_connection_limit_per_host,
+            "auto_save_dns_cache_ttl": self.auto_save_dns_cache_ttl,
+            "auto_save_write_buffer_size": self.auto_save_write_buffer_size,
+            "auto_save_stream_b64": self.auto_save_stream_b64,
+            "auto_save_dedup_enabled": self.auto_save_dedup_enabled,
+            "auto_save_index_enabled": self.auto_save_index_enabled,
         }
     
     def __repr__(self) -> str:
@@ -222,6 +432,14 @@ def _parse_int(value: str) -> int:
         raise SeedreamConfigError(f"无法解析整数值: {value}")
 
 
+def _parse_float(value: str) -> float:
+    """解析浮点数字符串"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        raise SeedreamConfigError(f"无法解析浮点数值: {value}")
+
+
 # 全局配置实例（延迟初始化）
 _global_config: Optional[SeedreamConfig] = None
 
@@ -6,32 +6,41 @@ Seedream 4.0 MCP工具 - 服务器模块
 """
 
 import asyncio
+import functools
+import inspect
 import logging
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
 
-from .client import SeedreamClient
 from .config import SeedreamConfig
-from .tools import (
-    browse_images_tool,
-    image_to_image_tool,
-    multi_image_fusion_tool,
-    sequential_generation_tool,
-    text_to_image_tool,
-    prompt_template_tool,
-)
-from .tools.browse_images import handle_browse_images
-from .tools.image_to_image import handle_image_to_image
-from .tools.multi_image_fusion import handle_multi_image_fusion
-from .tools.sequential_generation import handle_sequential_generation
-from .tools.text_to_image import handle_text_to_image
-from .tools.prompt_template_tool import handle_prompt_templates
+from .tools import TOOL_REGISTRY, load_tool_definition, load_tool_handler
 from .utils.errors import SeedreamMCPError
-from .utils.logging import setup_logging
+from .utils.jobs import get_job_manager
+from .utils.progress import ProgressReporter, progress_scope
+from .utils.tool_scheduler import ToolPolicy, ToolScheduler
+
+# 客户端、自动保存、七牛云上传等模块依赖 httpx、aiohttp、dotenv，在首次使用时导入以加快服务器启动
+if TYPE_CHECKING:
+    from .client import SeedreamClient
+    from .utils.auto_save import AutoSaveManagerRegistry
+
+
+@functools.lru_cache(maxsize=None)
+def _progress_notification_params(session_type: type) -> frozenset:
+    """返回会话的 send_progress_notification 支持的可选参数
+
+    较早版本的 mcp 只接受 (progress_token, progress, total)，
+    message 与 related_request_id 在新版本中才加入。
+    """
+    try:
+        parameters = inspect.signature(session_type.send_progress_notification).parameters
+    except (AttributeError, TypeError, ValueError):
+        return frozenset()
+    return frozenset(name for name in ("message", "related_request_id") if name in parameters)
 
 
 class NotificationOptions:
@@ -57,25 +66,33 @@ class SeedreamMCPServer:
         """
         self.server = Server("seedream-mcp")
         self.config: Optional[SeedreamConfig] = None
-        self.client: Optional[SeedreamClient] = None
+        self.client: Optional["SeedreamClient"] = None
         self.logger = logging.getLogger(__name__)
-        self.tools = self._get_tools()
+        self._warmup_task: Optional[asyncio.Task] = None
+        self.scheduler: Optional[ToolScheduler] = None
+        self._tools: Optional[List[Tool]] = None
         self._register_handlers()
 
+    @property
+    def tools(self) -> List[Tool]:
+        """可用工具列表（首次访问时加载工具定义）"""
+        if self._tools is None:
+            self._tools = self._get_tools()
+        return self._tools
+
+    @property
+    def auto_save_registry(self) -> "AutoSaveManagerRegistry":
+        """进程级自动保存管理器注册表"""
+        from .utils.auto_save import get_auto_save_registry
+        return get_auto_save_registry()
+
     def _get_tools(self) -> List[Tool]:
         """获取可用工具列表
         
         Returns:
             List[Tool]: 包含所有注册工具的列表
         """
-        return [
-            browse_images_tool,
-            text_to_image_tool,
-            image_to_image_tool,
-            multi_image_fusion_tool,
-            sequential_generation_tool,
-            prompt_template_tool,
-        ]
+        return [load_tool_definition(name) for name in TOOL_REGISTRY]
 
     def _register_handlers(self):
         """注册MCP协议处理器
@@ -114,22 +131,9 @@ class SeedreamMCPServer:
 
                 self.logger.info(f"调用工具: {tool_name}, 参数: {arguments}")
 
-                # 路由到对应工具处理器
-                # 传递server的client实例给tools，实现连接复用
-                if tool_name == "seedream_browse_images":
-                    content = await handle_browse_images(arguments)
-                elif tool_name == "seedream_text_to_image":
-                    content = await handle_text_to_image(arguments, client=self.client)
-                elif tool_name == "seedream_image_to_image":
-                    content = await handle_image_to_image(arguments, client=self.client)
-                elif tool_name == "seedream_multi_image_fusion":
-                    content = await handle_multi_image_fusion(arguments, client=self.client)
-                elif tool_name == "seedream_sequential_generation":
-                    content = await handle_sequential_generation(arguments, client=self.client)
-                elif tool_name == "seedream_prompt_templates":
-                    content = await handle_prompt_templates(arguments)
-                else:
-                    raise SeedreamMCPError(f"未知的工具: {tool_name}")
+                # 客户端请求了进度时，各阶段完成后发送进度通知
+                with progress_scope(self._create_progress_reporter()):
+                    content = await self._run_tool(tool_name, arguments)
 
                 # 验证返回内容格式
                 self.logger.debug(f"工具返回的原始content: {content}, 类型: {type(content)}")
@@ -164,6 +168,100 @@ class SeedreamMCPServer:
                 self.logger.error(f"工具调用失败: {e}", exc_info=True)
                 return [TextContent(type="text", text=f"工具调用失败: {str(e)}")]
 
+    async def _dispatch_tool(self, tool_name: str, arguments: Dict[str, Any]) -> list:
+        """路由到对应工具处理器
+        
+        按工具注册表查找处理函数，处理函数所在模块在首次调用时导入；
+        传递server的client实例给需要调用API的tools，实现连接复用。
+        
+        Args:
+            tool_name: 工具名称
+            arguments: 工具参数字典
+        
+        Returns:
+            list: 工具处理器返回的内容列表
+        
+        Raises:
+            SeedreamMCPError: 未知的工具名称
+        """
+        entry = TOOL_REGISTRY.get(tool_name)
+        if entry is None:
+            raise SeedreamMCPError(f"未知的工具: {tool_name}")
+
+        handler = load_tool_handler(tool_name)
+        if entry.uses_client:
+            return await handler(arguments, client=self.client)
+        if entry.uses_runner:
+            return await handler(arguments, runner=self._run_tool)
+        return await handler(arguments)
+
+    async def _run_tool(self, tool_name: str, arguments: Dict[str, Any]) -> list:
+        """经调度器执行工具调用
+        
+        同步调用与后台任务都经过调度器，共享生成并发池与优先级。
+        
+        Args:
+            tool_name: 工具名称
+            arguments: 工具参数字典
+        
+        Returns:
+            list: 工具处理器返回的内容列表
+        """
+        return await self.scheduler.run(
+            tool_name, lambda: self._dispatch_tool(tool_name, arguments)
+        )
+
+    def _create_progress_reporter(self) -> Optional[ProgressReporter]:
+        """为当前请求创建进度报告器
+        
+        客户端在请求中提供了 progressToken 时，把各阶段的完成情况转发为 MCP 进度通知。
+        
+        Returns:
+            Optional[ProgressReporter]: 进度报告器，客户端未请求进度时返回 None
+        """
+        try:
+            ctx = self.server.request_context
+        except LookupError:
+            return None
+        progress_token = ctx.meta.progressToken if ctx.meta else None
+        if progress_token is None:
+            return None
+
+        # 按已安装的 mcp 版本传递可选参数，旧版本仍能收到进度
+        supported = _progress_notification_params(type(ctx.session))
+
+        async def send(progress: float, total: Optional[float], message: str, data) -> None:
+            kwargs: Dict[str, Any] = {}
+            if "message" in supported:
+                kwargs["message"] = message
+            if "related_request_id" in supported:
+                kwargs["related_request_id"] = str(ctx.request_id)
+            await ctx.session.send_progress_notification(progress_token, progress, total, **kwargs)
+
+        return ProgressReporter(send)
+
+    def _create_scheduler(self, config: SeedreamConfig) -> ToolScheduler:
+        """创建工具调用调度器
+        
+        生成类工具共享并发池，单图生成优先于多图融合和组图生成；
+        浏览图片、提示词模板等本地工具不受限制，直接执行。
+        
+        Args:
+            config: 配置对象
+        
+        Returns:
+            ToolScheduler: 调度器实例
+        """
+        policies = {
+            "seedream_text_to_image": ToolPolicy(generation=True, priority=0),
+            "seedream_image_to_image": ToolPolicy(generation=True, priority=0),
+            "seedream_multi_image_fusion": ToolPolicy(generation=True, priority=1),
+            "seedream_sequential_generation": ToolPolicy(
+                generation=True, priority=2, max_concurrent=config.tool_sequential_concurrency
+            ),
+        }
+        return ToolScheduler(policies, generation_concurrency=config.tool_generation_concurrency)
+
     async def _initialize_client(self):
         """初始化配置和客户端
         
@@ -172,9 +270,13 @@ class SeedreamMCPServer:
         Raises:
             SeedreamMCPError: 客户端初始化失败时抛出
         """
+        from .client import SeedreamClient
+
         try:
             self.config = SeedreamConfig.from_env()
             self.client = SeedreamClient(self.config)
+            self.scheduler = self._create_scheduler(self.config)
+            get_job_manager(self.config.job_max_jobs, self.config.job_retention)
             self.logger.info("Seedream客户端初始化成功")
         except Exception as e:
             self.logger.error(f"客户端初始化失败: {e}")
@@ -188,12 +290,18 @@ class SeedreamMCPServer:
         Raises:
             Exception: 服务器运行过程中发生的异常
         """
+        from .utils.logging import setup_logging
+
         try:
             setup_logging()
             self.logger.info("启动Seedream MCP服务器...")
 
             await self._initialize_client()
 
+            # 后台预热连接，不阻塞服务器启动
+            if self.config.http_warmup_enabled:
+                self._warmup_task = asyncio.create_task(self.client.warm_up())
+
             async with stdio_server() as (read_stream, write_stream):
                 await self.server.run(
                     read_stream,
@@ -212,6 +320,58 @@ class SeedreamMCPServer:
         except Exception as e:
             self.logger.error(f"服务器运行错误: {e}", exc_info=True)
             raise
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self):
+        """关闭服务器持有的资源
+        
+        取消未完成的后台任务，关闭自动保存管理器（下载会话）、七牛云上传线程池、生成结果缓存数据库和共享HTTP连接池等长生命周期资源，
+        并记录运行统计。
+        """
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+
+        self.logger.info(f"服务器运行统计: {self.get_stats()}")
+
+        from .utils.qiniu_uploader import close_qiniu_uploader
+        from .utils.result_cache import close_result_caches
+
+        await get_job_manager().shutdown()
+        await self.auto_save_registry.close_all()
+        close_qiniu_uploader()
+        close_result_caches()
+
+        if self.client is None:
+            return
+
+        try:
+            await self.client.close_transport()
+        except Exception as e:
+            self.logger.warning(f"关闭HTTP连接失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取服务器运行统计信息
+        
+        Returns:
+            Dict[str, Any]: 各组件的统计信息
+        """
+        from .utils.qiniu_uploader import get_qiniu_uploader
+        from .utils.result_cache import get_result_cache
+
+        stats: Dict[str, Any] = {
+            "auto_save": self.auto_save_registry.get_stats(),
+            "qiniu": get_qiniu_uploader().get_stats(),
+        }
+        result_cache = get_result_cache(self.config) if self.config else None
+        if result_cache is not None:
+            stats["result_cache"] = result_cache.get_stats()
+        if self.scheduler is not None:
+            stats["scheduler"] = self.scheduler.get_stats()
+        stats["jobs"] = get_job_manager().get_stats()
+        if self.client is not None:
+            stats["client"] = self.client.get_stats()
+        return stats
 
 
 async def main():
@@ -2,14 +2,115 @@
 Seedream 4.0 MCP工具 - 工具模块
 
 包含所有MCP工具的实现。
+
+工具定义集中在只依赖 mcp.types 的 definitions 模块，列出工具时只导入该模块；
+工具注册表记录每个处理函数所在的模块，首次调用工具时才导入对应模块及其依赖。
 """
 
-from .browse_images import browse_images_tool
-from .text_to_image import text_to_image_tool
-from .image_to_image import image_to_image_tool
-from .multi_image_fusion import multi_image_fusion_tool
-from .sequential_generation import sequential_generation_tool
-from .prompt_template_tool import prompt_template_tool
+import importlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+
+@dataclass(frozen=True)
+class ToolEntry:
+    """工具注册信息"""
+
+    # 处理函数所在的模块（相对于本包）
+    module: str
+    # definitions 模块中 Tool 定义的属性名
+    definition: str
+    # 模块中处理函数的属性名
+    handler: str
+    # 处理函数是否接收服务器共享的 SeedreamClient
+    uses_client: bool = False
+    # 处理函数是否接收服务器的工具执行函数（用于提交后台任务）
+    uses_runner: bool = False
+
+
+# 工具名称 -> 注册信息，顺序即工具列表的顺序
+TOOL_REGISTRY: Dict[str, ToolEntry] = {
+    "seedream_browse_images": ToolEntry(
+        "browse_images", "browse_images_tool", "handle_browse_images"
+    ),
+    "seedream_text_to_image": ToolEntry(
+        "text_to_image", "text_to_image_tool", "handle_text_to_image", uses_client=True
+    ),
+    "seedream_image_to_image": ToolEntry(
+        "image_to_image", "image_to_image_tool", "handle_image_to_image", uses_client=True
+    ),
+    "seedream_multi_image_fusion": ToolEntry(
+        "multi_image_fusion", "multi_image_fusion_tool", "handle_multi_image_fusion", uses_client=True
+    ),
+    "seedream_sequential_generation": ToolEntry(
+        "sequential_generation", "sequential_generation_tool", "handle_sequential_generation",
+        uses_client=True
+    ),
+    "seedream_prompt_templates": ToolEntry(
+        "prompt_template_tool", "prompt_template_tool", "handle_prompt_templates"
+    ),
+    "seedream_submit_job": ToolEntry(
+        "jobs", "submit_job_tool", "handle_submit_job", uses_runner=True
+    ),
+    "seedream_job_status": ToolEntry("jobs", "job_status_tool", "handle_job_status"),
+    "seedream_cancel_job": ToolEntry("jobs", "cancel_job_tool", "handle_cancel_job"),
+}
+
+
+def _load(module: str, attribute: str) -> Any:
+    """导入工具模块并返回其属性"""
+    loaded = importlib.import_module(f".{module}", __name__)
+    # 导入子模块会把包属性设为模块对象，prompt_template_tool 的模块名与工具定义同名，
+    # 这里把包属性恢复为工具定义
+    if module in _DEFINITIONS:
+        globals()[module] = getattr(loaded, module)
+    return getattr(loaded, attribute)
+
+
+def load_tool_definition(tool_name: str) -> Any:
+    """
+    获取工具定义
+
+    Args:
+        tool_name: 工具名称
+
+    Returns:
+        Tool 定义
+
+    Raises:
+        KeyError: 未注册的工具
+    """
+    entry = TOOL_REGISTRY[tool_name]
+    return _load("definitions", entry.definition)
+
+
+def load_tool_handler(tool_name: str) -> Callable:
+    """
+    获取工具处理函数
+
+    Args:
+        tool_name: 工具名称
+
+    Returns:
+        处理函数
+
+    Raises:
+        KeyError: 未注册的工具
+    """
+    entry = TOOL_REGISTRY[tool_name]
+    return _load(entry.module, entry.handler)
+
+
+# 兼容 `from seedream_mcp.tools import text_to_image_tool` 等用法
+_DEFINITIONS = {entry.definition for entry in TOOL_REGISTRY.values()}
+
+
+def __getattr__(name):
+    """首次访问时导入工具定义"""
+    if name not in _DEFINITIONS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return _load("definitions", name)
+
 
 __all__ = [
     "browse_images_tool",
@@ -17,5 +118,12 @@ __all__ = [
     "image_to_image_tool",
     "multi_image_fusion_tool",
     "sequential_generation_tool",
-    "prompt_template_tool"
-]
\ No newline at end of file
+    "prompt_template_tool",
+    "submit_job_tool",
+    "job_status_tool",
+    "cancel_job_tool",
+    "ToolEntry",
+    "TOOL_REGISTRY",
+    "load_tool_definition",
+    "load_tool_handler",
+]
@@ -6,9 +6,11 @@ Seedream 4.0 MCP工具 - 图片文件浏览工具
 
 from typing import Any, Dict, List
 from pathlib import Path
-from mcp.types import Tool, TextContent
+from mcp.types import TextContent
 
 from ..utils.logging import get_logger
+# 工具定义集中在 definitions 模块，保留从本模块导入的用法
+from .definitions import browse_images_tool  # noqa: F401
 
 logger = get_logger(__name__)
 
@@ -18,60 +20,6 @@ SUPPORTED_IMAGE_FORMATS = {
     '.webp', '.svg', '.ico', '.psd', '.raw', '.heic', '.heif'
 }
 
-# 工具定义
-browse_images_tool = Tool(
-    name="seedream_browse_images",
-    description="浏览工作区中的图片文件，获取文件路径用于图像生成",
-    inputSchema={
-        "type": "object",
-        "properties": {
-            "directory": {
-                "type": "string",
-                "description": "要浏览的目录路径，默认为当前工作目录。支持相对路径和绝对路径",
-                "default": "."
-            },
-            "recursive": {
-                "type": "boolean",
-                "description": "是否递归搜索子目录",
-                "default": True
-            },
-            "max_depth": {
-                "type": "integer",
-                "description": "最大搜索深度，防止过深的目录遍历",
-                "default": 3,
-                "minimum": 1,
-                "maximum": 10
-            },
-            "limit": {
-                "type": "integer",
-                "description": "返回的最大文件数量",
-                "default": 50,
-                "minimum": 1,
-                "maximum": 200
-            },
-            "format_filter": {
-                "type": "array",
-                "description": "过滤特定格式的图片文件，如 ['.jpg', '.png']",
-                "items": {
-                    "type": "string"
-                },
-                "default": []
-            },
-            "show_details": {
-                "type": "boolean",
-                "description": "是否显示文件详细信息（大小、修改时间等）",
-                "default": False
-            },
-            "show_guide": {
-                "type": "boolean",
-                "description": "是否显示完整的使用指导和技巧",
-                "default": False
-            }
-        },
-        "required": []
-    }
-)
-
 
 def get_file_size_str(size_bytes: int) -> str:
     """将文件大小转换为可读格式"""
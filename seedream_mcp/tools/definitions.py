@@ -0,0 +1,347 @@
+"""
+Seedream 4.0 MCP工具 - 工具定义
+
+所有工具的 Tool 定义集中在本模块，只依赖 mcp.types。列出工具（客户端初始化后的第一个请求）
+只需导入本模块，处理函数所在的模块及其依赖（HTTP 客户端、aiohttp 等）在首次调用工具时才导入。
+"""
+
+from mcp.types import Tool
+
+# 可以提交为后台任务的工具
+JOB_TOOLS = [
+    "seedream_text_to_image",
+    "seedream_image_to_image",
+    "seedream_multi_image_fusion",
+    "seedream_sequential_generation",
+]
+
+
+browse_images_tool = Tool(
+    name="seedream_browse_images",
+    description="浏览工作区中的图片文件，获取文件路径用于图像生成",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "directory": {
+                "type": "string",
+                "description": "要浏览的目录路径，默认为当前工作目录。支持相对路径和绝对路径",
+                "default": "."
+            },
+            "recursive": {
+                "type": "boolean",
+                "description": "是否递归搜索子目录",
+                "default": True
+            },
+            "max_depth": {
+                "type": "integer",
+                "description": "最大搜索深度，防止过深的目录遍历",
+                "default": 3,
+                "minimum": 1,
+                "maximum": 10
+            },
+            "limit": {
+                "type": "integer",
+                "description": "返回的最大文件数量",
+                "default": 50,
+                "minimum": 1,
+                "maximum": 200
+            },
+            "format_filter": {
+                "type": "array",
+                "description": "过滤特定格式的图片文件，如 ['.jpg', '.png']",
+                "items": {
+                    "type": "string"
+                },
+                "default": []
+            },
+            "show_details": {
+                "type": "boolean",
+                "description": "是否显示文件详细信息（大小、修改时间等）",
+                "default": False
+            },
+            "show_guide": {
+                "type": "boolean",
+                "description": "是否显示完整的使用指导和技巧",
+                "default": False
+            }
+        },
+        "required": []
+    }
+)
+
+
+text_to_image_tool = Tool(
+    name="seedream_text_to_image",
+    description="使用Seedream 4.0根据文本提示词生成【单张】图像。如果需要生成多张图片，请使用 seedream_sequential_generation 工具",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "prompt": {
+                "type": "string",
+                "description": "图像生成的文本提示词。可以是简单的几个字（如'一只小猫'）或详细的描述（如'一只可爱的橘色小猫咪，坐在窗台上，阳光洒在身上，卡通风格，高清画质'）。建议不超过600个字符",
+                "maxLength": 600
+            },
+            "size": {
+                "type": "string",
+                "description": "生成图像的尺寸，如果不指定则使用配置文件中的默认值",
+                "enum": ["1K", "2K", "4K"]
+            },
+            "watermark": {
+                "type": "boolean",
+                "description": "是否在生成的图像上添加水印，如果不指定则使用配置文件中的默认值"
+            },
+            "response_format": {
+                "type": "string",
+                "description": "响应格式：url返回图像URL，b64_json返回base64编码，image返回MCP ImageContent（直接显示图片）",
+                "enum": ["url", "b64_json", "image"],
+                "default": "image"
+            },
+            "auto_save": {
+                "type": "boolean",
+                "description": "是否自动保存图片到本地（默认使用全局配置）",
+                "default": None
+            },
+            "save_path": {
+                "type": "string",
+                "description": "自定义保存目录路径（可选）"
+            },
+            "custom_name": {
+                "type": "string",
+                "description": "自定义文件名前缀（可选）"
+            }
+        },
+        "required": ["prompt"]
+    }
+)
+
+
+image_to_image_tool = Tool(
+    name="seedream_image_to_image",
+    description="使用Seedream 4.0根据输入图像和文本提示词生成【单张】新图像（图生图）。如果需要基于一张图生成多张变体，请使用 seedream_sequential_generation 工具",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "prompt": {
+                "type": "string",
+                "description": "具体的图像修改要求或风格转换指令，描述你希望如何改变原图像，而不是描述原图像的内容。建议不超过600个字符",
+                "maxLength": 600
+            },
+            "image": {
+                "type": "string",
+                "description": "输入图像的URL或本地文件路径"
+            },
+            "size": {
+                "type": "string",
+                "description": "生成图像的尺寸，如果不指定则使用配置文件中的默认值",
+                "enum": ["1K", "2K", "4K"]
+            },
+            "watermark": {
+                "type": "boolean",
+                "description": "是否在生成的图像上添加水印，如果不指定则使用配置文件中的默认值"
+            },
+            "response_format": {
+                "type": "string",
+                "description": "响应格式：url返回图像URL，b64_json返回base64编码，image返回MCP ImageContent（直接显示图片）",
+                "enum": ["url", "b64_json", "image"],
+                "default": "image"
+            },
+            "auto_save": {
+                "type": "boolean",
+                "description": "是否自动保存生成的图片到本地。如果未指定，将使用全局配置",
+                "default": None
+            },
+            "save_path": {
+                "type": "string",
+                "description": "自定义保存目录路径。如果未指定，将使用默认配置路径"
+            },
+            "custom_name": {
+                "type": "string",
+                "description": "自定义文件名前缀。如果未指定，将根据提示词自动生成"
+            }
+        },
+        "required": ["prompt", "image"]
+    }
+)
+
+
+multi_image_fusion_tool = Tool(
+    name="seedream_multi_image_fusion",
+    description="使用Seedream 4.0将多张图像融合生成【单张】新图像（多图融合）。需要提供2-10张输入图片。如果需要生成多张融合结果，请使用 seedream_sequential_generation 工具",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "prompt": {
+                "type": "string",
+                "description": "具体的图像融合要求或风格指令，描述你希望如何融合多张图像以及期望的最终效果，而不是描述原图像的内容。建议不超过600个字符",
+                "maxLength": 600
+            },
+            "images": {
+                "type": "array",
+                "description": "输入图像的URL或本地文件路径列表（2-5张图像）",
+                "items": {
+                    "type": "string",
+                    "description": "图像URL或文件路径"
+                },
+                "minItems": 2,
+                "maxItems": 5
+            },
+            "size": {
+                "type": "string",
+                "description": "生成图像的尺寸，如果不指定则使用配置文件中的默认值",
+                "enum": ["1K", "2K", "4K"]
+            },
+            "watermark": {
+                "type": "boolean",
+                "description": "是否在生成的图像上添加水印，如果不指定则使用配置文件中的默认值"
+            },
+            "response_format": {
+                "type": "string",
+                "description": "响应格式：url返回图像URL，b64_json返回base64编码",
+                "enum": ["url", "b64_json"],
+                "default": "url"
+            },
+            "auto_save": {
+                "type": "boolean",
+                "description": "是否自动保存生成的图片到本地。如果未指定，将使用全局配置",
+                "default": None
+            },
+            "save_path": {
+                "type": "string",
+                "description": "自定义保存目录路径。如果未指定，将使用默认配置路径"
+            },
+            "custom_name": {
+                "type": "string",
+                "description": "自定义文件名前缀。如果未指定，将根据提示词自动生成"
+            }
+        },
+        "required": ["prompt", "images"]
+    }
+)
+
+
+sequential_generation_tool = Tool(
+    name="seedream_sequential_generation",
+    description="使用Seedream 4.0【批量生成多张图像】（组图生成）。当用户要求生成2张或更多图片时使用此工具。支持3种输入类型：文生组图、单图生组图、多图生组图。最多可生成15张图片",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "max_images": {
+                "type": "integer",
+                "description": "要生成的图像数量（必填）。用户说'生成4张图'时，此参数应为4",
+                "minimum": 1,
+                "maximum": 15
+            },
+            "prompt": {
+                "type": "string",
+                "description": "图像内容的文本提示词（如'可口可乐'、'小猫'等）。不需要在提示词中包含数量信息，数量由 max_images 参数指定",
+                "maxLength": 600
+            },
+            "size": {
+                "type": "string",
+                "description": "生成图像的尺寸，如果不指定则使用配置文件中的默认值",
+                "enum": ["1K", "2K", "4K"]
+            },
+            "watermark": {
+                "type": "boolean",
+                "description": "是否在生成的图像上添加水印，如果不指定则使用配置文件中的默认值"
+            },
+            "response_format": {
+                "type": "string",
+                "description": "响应格式：url返回图像URL，b64_json返回base64编码",
+                "enum": ["url", "b64_json"],
+                "default": "url"
+            },
+            "image": {
+                "type": ["string", "array"],
+                "description": "可选的参考图像。支持单张图片URL/路径（字符串）或多张图片URL/路径（字符串数组）。用于单图生组图或多图生组图",
+                "items": {
+                    "type": "string"
+                },
+                "maxItems": 10
+            },
+            "auto_save": {
+                "type": "boolean",
+                "description": "是否自动保存生成的图片到本地。如果未指定，将使用全局配置",
+                "default": None
+            },
+            "save_path": {
+                "type": "string",
+                "description": "自定义保存目录路径。如果未指定，将使用默认配置路径"
+            },
+            "custom_name": {
+                "type": "string",
+                "description": "自定义文件名前缀。如果未指定，将根据提示词自动生成"
+            }
+        },
+        "required": ["prompt", "max_images"]
+    }
+)
+
+
+prompt_template_tool = Tool(
+    name="seedream_prompt_templates",
+    description="查看所有可用的提示词模板。提示词模板可以帮助用户快速应用专业的设计风格，如公众号封面、小红书封面、产品海报等",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "show_details": {
+                "type": "boolean",
+                "description": "是否显示模板的详细内容",
+                "default": False
+            }
+        }
+    }
+)
+
+
+submit_job_tool = Tool(
+    name="seedream_submit_job",
+    description="把生成任务提交到后台执行并立即返回任务ID。生成多张图片（如组图生成）耗时较长时使用，随后用 seedream_job_status 查询进度和结果",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "tool": {
+                "type": "string",
+                "description": "要在后台执行的生成工具",
+                "enum": JOB_TOOLS
+            },
+            "arguments": {
+                "type": "object",
+                "description": "传给生成工具的参数，与直接调用该工具时相同"
+            }
+        },
+        "required": ["tool", "arguments"]
+    }
+)
+
+
+job_status_tool = Tool(
+    name="seedream_job_status",
+    description="查询后台生成任务的状态、已完成的阶段（API调用、每张图片的下载和上传）以及完成后的结果。不指定 job_id 时列出所有任务",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "job_id": {
+                "type": "string",
+                "description": "seedream_submit_job 返回的任务ID"
+            }
+        },
+        "required": []
+    }
+)
+
+
+cancel_job_tool = Tool(
+    name="seedream_cancel_job",
+    description="取消尚未完成的后台生成任务",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "job_id": {
+                "type": "string",
+                "description": "要取消的任务ID"
+            }
+        },
+        "required": ["job_id"]
+    }
+)
@@ -4,19 +4,39 @@ Seedream 4.0 MCP工具 - 图片处理辅助函数
 提供图片下载、转换等通用功能。
 """
 
-from typing import Any, Dict, List, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncio
 import base64
 import httpx
 from mcp.types import TextContent, ImageContent
 
+from ..utils.jobs import JobFailedError, running_as_job
 from ..utils.logging import get_logger
+from ..utils.progress import report_progress
+
+
+def error_response(message: str) -> List[TextContent]:
+    """返回参数错误等失败信息
+
+    后台任务中抛出 JobFailedError，使任务标记为失败而不是把错误文本作为结果。
+
+    Args:
+        message: 错误信息
+
+    Returns:
+        包含错误信息的响应列表
+    """
+    if running_as_job():
+        raise JobFailedError(message)
+    return [TextContent(type="text", text=message)]
 
 
 async def create_image_content_response(
     result: Dict[str, Any],
     prompt: str,
     size: str,
-    extra_info: str = ""
+    extra_info: str = "",
+    auto_save_results: Optional[List] = None
 ) -> List[Union[TextContent, ImageContent]]:
     """创建包含图片的响应
 
@@ -25,6 +45,7 @@ async def create_image_content_response(
         prompt: 提示词
         size: 图片尺寸
         extra_info: 额外信息（可选）
+        auto_save_results: 自动保存结果（可选），其中保留的图片字节会直接从内存上传
 
     Returns:
         包含文本和图片的响应列表
@@ -56,20 +77,30 @@ async def create_image_content_response(
             # 获取七牛云上传器
             uploader = get_qiniu_uploader()
 
-            for i, image_info in enumerate(data, 1):
+            for image_info in data:
                 if isinstance(image_info, dict) and "local_path" in image_info:
-                    local_path = image_info["local_path"]
-                    abs_path = Path(local_path).absolute()
-                    local_paths.append(abs_path)
-
-                    # 尝试上传到七牛云
-                    if uploader.enabled:
-                        qiniu_url = uploader.upload_file(str(abs_path))
-                        if qiniu_url:
-                            qiniu_urls.append(qiniu_url)
-                            logger.info(f"图片 {i} 上传成功: {qiniu_url}")
-                        else:
-                            logger.warning(f"图片 {i} 上传失败")
+                    local_paths.append(Path(image_info["local_path"]).absolute())
+
+            # 尝试并发上传到七牛云（在线程池中执行，不阻塞事件循环）
+            if uploader.enabled and local_paths:
+                # 自动保存时已保留的图片字节直接上传，无需重新读取文件
+                contents_by_path = {
+                    str(Path(r.local_path).absolute()): r.content
+                    for r in (auto_save_results or [])
+                    if r.success and r.local_path and r.content is not None
+                }
+                uploaded = await uploader.upload_multiple_async(
+                    [str(p) for p in local_paths],
+                    [contents_by_path.get(str(p)) for p in local_paths]
+                )
+                for r in auto_save_results or []:
+                    r.content = None
+                for i, qiniu_url in enumerate(uploaded, 1):
+                    if qiniu_url:
+                        qiniu_urls.append(qiniu_url)
+                        logger.info(f"图片 {i} 上传成功: {qiniu_url}")
+                    else:
+                        logger.warning(f"图片 {i} 上传失败")
 
         # 添加 Markdown 图片显示
         text_parts.append("")  # 空行
@@ -140,3 +171,74 @@ async def download_image_as_base64(url: str, timeout: int = 30) -> str:
         image_bytes = response.content
         return base64.b64encode(image_bytes).decode('utf-8')
 
+
+async def report_generation_stage(
+    result: Dict[str, Any],
+    from_cache: bool,
+    stages_per_image: int
+) -> None:
+    """报告API调用阶段完成，并按生成的图片数量确定总步数
+
+    Args:
+        result: API响应结果
+        from_cache: 结果是否来自生成结果缓存
+        stages_per_image: 每张图片后续的阶段数（下载、上传）
+    """
+    data = result.get("data") if result.get("success") else None
+    count = len(data) if isinstance(data, list) else 0
+    message = "命中生成结果缓存" if from_cache else f"API调用完成，生成 {count} 张图片"
+    await report_progress(message, total=1 + count * stages_per_image)
+
+
+async def save_and_upload(
+    saves: AsyncIterator[Tuple[int, Any]],
+    count: int,
+    result: Dict[str, Any]
+) -> List:
+    """以流水线方式保存并上传图片
+
+    每张图片保存完成后立即开始上传到七牛云，不等待其余图片下载完成；
+    保存和上传的进度按完成顺序报告，首张图片的可用时间只取决于最快的一次下载。
+
+    Args:
+        saves: 按完成顺序产出 (图片序号, 保存结果) 的异步迭代器
+        count: 图片总数
+        result: API结果（会被修改以添加七牛云URL）
+
+    Returns:
+        与输入顺序一致的自动保存结果列表
+    """
+    from ..utils.qiniu_uploader import get_qiniu_uploader
+
+    logger = get_logger(__name__)
+    uploader = get_qiniu_uploader()
+    auto_save_results: List = [None] * count
+    uploads: List[asyncio.Task] = []
+
+    async def upload(index: int, save_result) -> None:
+        # 保存时保留了图片字节的项直接从内存上传，不再从磁盘重新读取
+        qiniu_url = await uploader.upload_image_async(
+            str(save_result.local_path), save_result.content, index=index, total=count
+        )
+        # 上传完成后释放图片字节
+        save_result.content = None
+        if not qiniu_url:
+            logger.warning(f"图片 {index+1} 上传到七牛云失败")
+        elif result.get("data") and index < len(result["data"]):
+            result["data"][index]["qiniu_url"] = qiniu_url
+            logger.info(f"图片 {index+1} 已上传到七牛云: {qiniu_url}")
+
+    try:
+        async for index, save_result in saves:
+            auto_save_results[index] = save_result
+            if uploader.enabled and save_result.success and save_result.local_path:
+                uploads.append(asyncio.create_task(upload(index, save_result)))
+        await asyncio.gather(*uploads)
+    except BaseException:
+        for task in uploads:
+            task.cancel()
+        # 等待取消完成，避免上传仍在修改 result 或任务未结束即被回收
+        await asyncio.gather(*uploads, return_exceptions=True)
+        raise
+
+    return auto_save_results
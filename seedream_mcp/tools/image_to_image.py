@@ -8,63 +8,19 @@ from typing import Any, Dict, List, Optional, Union
 from pathlib import Path
 import base64
 import httpx
-from mcp.types import Tool, TextContent, ImageContent
+from mcp.types import TextContent, ImageContent
 
 from ..client import SeedreamClient
 from ..config import SeedreamConfig, get_global_config
 from ..utils.logging import get_logger
-from ..utils.auto_save import AutoSaveManager
-from .image_helpers import create_image_content_response
-
-
-# 工具定义
-image_to_image_tool = Tool(
-    name="seedream_image_to_image",
-    description="使用Seedream 4.0根据输入图像和文本提示词生成【单张】新图像（图生图）。如果需要基于一张图生成多张变体，请使用 seedream_sequential_generation 工具",
-    inputSchema={
-        "type": "object",
-        "properties": {
-            "prompt": {
-                "type": "string",
-                "description": "具体的图像修改要求或风格转换指令，描述你希望如何改变原图像，而不是描述原图像的内容。建议不超过600个字符",
-                "maxLength": 600
-            },
-            "image": {
-                "type": "string",
-                "description": "输入图像的URL或本地文件路径"
-            },
-            "size": {
-                "type": "string",
-                "description": "生成图像的尺寸，如果不指定则使用配置文件中的默认值",
-                "enum": ["1K", "2K", "4K"]
-            },
-            "watermark": {
-                "type": "boolean",
-                "description": "是否在生成的图像上添加水印，如果不指定则使用配置文件中的默认值"
-            },
-            "response_format": {
-                "type": "string",
-                "description": "响应格式：url返回图像URL，b64_json返回base64编码，image返回MCP ImageContent（直接显示图片）",
-                "enum": ["url", "b64_json", "image"],
-                "default": "image"
-            },
-            "auto_save": {
-                "type": "boolean",
-                "description": "是否自动保存生成的图片到本地。如果未指定，将使用全局配置",
-                "default": None
-            },
-            "save_path": {
-                "type": "string",
-                "description": "自定义保存目录路径。如果未指定，将使用默认配置路径"
-            },
-            "custom_name": {
-                "type": "string",
-                "description": "自定义文件名前缀。如果未指定，将根据提示词自动生成"
-            }
-        },
-        "required": ["prompt", "image"]
-    }
-)
+from ..utils.jobs import JobFailedError, running_as_job
+from ..utils.auto_save import get_auto_save_registry
+from ..utils.qiniu_uploader import get_qiniu_uploader
+from ..utils.result_cache import get_result_cache
+from .image_helpers import create_image_content_response, report_generation_stage
+# 工具定义集中在 definitions 模块，保留从本模块导入的用法
+from .definitions import image_to_image_tool  # noqa: F401
+
 
 
 async def handle_image_to_image(arguments: Dict[str, Any], client: Optional[SeedreamClient] = None) -> List[Union[TextContent, ImageContent]]:
@@ -103,9 +59,26 @@ async def handle_image_to_image(arguments: Dict[str, Any], client: Optional[Seed
         # 如果是 image 格式，需要从 API 获取 URL 然后下载
         api_format = "url" if response_format == "image" else response_format
 
+        # 初始化自动保存结果
+        auto_save_results = []
+
+        # 启用自动保存时查找生成结果缓存，命中则直接回放已保存的图片
+        result_cache = get_result_cache(config) if enable_auto_save else None
+        cache_key = None
+        cached = None
+        if result_cache is not None:
+            cache_key = await result_cache.make_key(
+                "image_to_image", config.model_id, prompt, size, watermark, api_format,
+                images=[image], save_path=save_path, custom_name=custom_name
+            )
+            cached = await result_cache.get(cache_key)
+
         # 创建客户端并调用API
         # 使用传入的client或创建临时client
-        if client is not None:
+        if cached is not None:
+            logger.info("命中生成结果缓存，跳过API调用")
+            result, auto_save_results = cached
+        elif client is not None:
             # 复用server的client（推荐）
             logger.debug("使用server提供的共享client")
             result = await client.image_to_image(
@@ -127,32 +100,44 @@ async def handle_image_to_image(arguments: Dict[str, Any], client: Optional[Seed
                     response_format=api_format
                 )
 
-        # 初始化自动保存结果
-        auto_save_results = []
+        # 报告API调用阶段完成，总步数包括每张图片的下载与上传
+        await report_generation_stage(
+            result, cached is not None,
+            int(enable_auto_save and cached is None)
+            + int(enable_auto_save and response_format == "image" and get_qiniu_uploader().enabled)
+        )
 
         # 如果启用自动保存且API调用成功，执行自动保存
-        if enable_auto_save and result.get("success"):
+        if enable_auto_save and cached is None and result.get("success"):
             try:
+                # 返回图片预览且配置了七牛云时保留图片字节，直接从内存上传
+                keep_content = response_format == "image" and get_qiniu_uploader().enabled
                 if api_format == "url":
                     auto_save_results = await _handle_auto_save(
-                        result, prompt, config, save_path, custom_name
+                        result, prompt, config, save_path, custom_name, keep_content
                     )
                     if auto_save_results:
                         result = _update_result_with_auto_save(result, auto_save_results)
                 elif api_format == "b64_json":
                     auto_save_results = await _handle_auto_save_base64(
-                        result, prompt, config, save_path, custom_name
+                        result, prompt, config, save_path, custom_name, keep_content
                     )
                     if auto_save_results:
                         result = _update_result_with_auto_save(result, auto_save_results)
             except Exception as e:
                 logger.warning(f"自动保存失败，但继续返回原始结果: {e}")
 
+        # 写入生成结果缓存
+        if result_cache is not None and cached is None:
+            await result_cache.put(cache_key, "image_to_image", result, auto_save_results)
+
         # 如果请求的是 image 格式，返回 ImageContent
         if response_format == "image" and result.get("success"):
             # 格式化输入图片信息
             image_info = f"输入图像: {_format_image_path(image)}"
-            return await create_image_content_response(result, prompt, size, image_info)
+            return await create_image_content_response(
+                result, prompt, size, image_info, auto_save_results=auto_save_results
+            )
 
         # 格式化响应
         response_text = _format_image_to_image_response(
@@ -165,6 +150,9 @@ async def handle_image_to_image(arguments: Dict[str, Any], client: Optional[Seed
     except Exception as e:
         logger.error(f"图生图请求处理失败: {str(e)}")
         error_msg = f"图生图生成失败: {str(e)}"
+        if running_as_job():
+            # 后台任务中抛出异常，任务标记为失败
+            raise JobFailedError(error_msg) from e
         return [TextContent(type="text", text=error_msg)]
 
 
@@ -173,7 +161,8 @@ async def _handle_auto_save(
     prompt: str, 
     config: SeedreamConfig,
     save_path: Optional[str] = None,
-    custom_name: Optional[str] = None
+    custom_name: Optional[str] = None,
+    keep_content: bool = False
 ) -> List:
     """处理自动保存
     
@@ -183,6 +172,7 @@ async def _handle_auto_save(
         config: 配置对象
         save_path: 自定义保存路径
         custom_name: 自定义文件名
+        keep_content: 是否保留图片字节以便直接从内存上传
         
     Returns:
         自动保存结果列表
@@ -195,13 +185,7 @@ async def _handle_auto_save(
             Path(config.auto_save_base_dir) if config.auto_save_base_dir else None
         )
         
-        auto_save_manager = AutoSaveManager(
-            base_dir=base_dir,
-            download_timeout=config.auto_save_download_timeout,
-            max_retries=config.auto_save_max_retries,
-            max_file_size=config.auto_save_max_file_size,
-            max_concurrent=config.auto_save_max_concurrent
-        )
+        auto_save_manager = get_auto_save_registry().get_manager(base_dir, config)
         
         # 提取图片URL
         data = result.get("data", {})
@@ -229,7 +213,8 @@ async def _handle_auto_save(
         
         # 执行批量保存
         auto_save_results = await auto_save_manager.save_multiple_images(
-            image_data, tool_name="image_to_image"
+            image_data, tool_name="image_to_image",
+            keep_content=keep_content
         )
         
         logger.info(f"自动保存完成: {len(auto_save_results)} 个图片")
@@ -245,7 +230,8 @@ async def _handle_auto_save_base64(
     prompt: str, 
     config: SeedreamConfig,
     save_path: Optional[str] = None,
-    custom_name: Optional[str] = None
+    custom_name: Optional[str] = None,
+    keep_content: bool = False
 ) -> List:
     """处理 base64 自动保存（图生图）
     
@@ -257,13 +243,7 @@ async def _handle_auto_save_base64(
             Path(config.auto_save_base_dir) if config.auto_save_base_dir else None
         )
 
-        auto_save_manager = AutoSaveManager(
-            base_dir=base_dir,
-            download_timeout=config.auto_save_download_timeout,
-            max_retries=config.auto_save_max_retries,
-            max_file_size=config.auto_save_max_file_size,
-            max_concurrent=config.auto_save_max_concurrent
-        )
+        auto_save_manager = get_auto_save_registry().get_manager(base_dir, config)
 
         data = result.get("data", {})
         if isinstance(data, list):
@@ -288,7 +268,8 @@ async def _handle_auto_save_base64(
             return []
 
         auto_save_results = await auto_save_manager.save_multiple_base64_images(
-            image_data, tool_name="image_to_image"
+            image_data, tool_name="image_to_image",
+            keep_content=keep_content
         )
         logger.info(f"Base64 自动保存完成: {len(auto_save_results)} 个图片")
         return auto_save_results
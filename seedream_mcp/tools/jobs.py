@@ -0,0 +1,151 @@
+"""
+Seedream 4.0 MCP工具 - 后台任务工具
+
+提交、查询和取消后台执行的生成任务，避免长时间的组图生成占住请求直到客户端超时。
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from mcp.types import TextContent
+
+from ..utils.jobs import CANCELLED, FAILED, SUCCEEDED, Job, ToolRunner, get_job_manager
+from ..utils.logging import get_logger
+# 工具定义集中在 definitions 模块，保留从本模块导入的用法
+from .definitions import JOB_TOOLS, cancel_job_tool, job_status_tool, submit_job_tool  # noqa: F401
+
+logger = get_logger(__name__)
+
+# 任务状态的显示文本
+STATUS_LABELS = {
+    "pending": "⏳ 等待执行",
+    "running": "🔄 执行中",
+    SUCCEEDED: "✅ 已完成",
+    FAILED: "❌ 失败",
+    CANCELLED: "🚫 已取消",
+}
+
+
+def _format_time(timestamp: Optional[float]) -> str:
+    """格式化时间戳"""
+    if timestamp is None:
+        return "-"
+    return datetime.fromtimestamp(timestamp).strftime("%H:%M:%S")
+
+
+def _format_progress(job: Job) -> str:
+    """格式化任务进度"""
+    if job.total:
+        return f"{job.progress}/{job.total}"
+    return str(job.progress)
+
+
+def _format_job(job: Job) -> str:
+    """格式化单个任务的状态"""
+    lines = [
+        f"🆔 任务ID: {job.job_id}",
+        f"🔧 工具: {job.tool_name}",
+        f"📌 状态: {STATUS_LABELS.get(job.status, job.status)}",
+        f"📈 进度: {_format_progress(job)}",
+        f"🕒 提交时间: {_format_time(job.created_at)}",
+    ]
+    if job.finished_at is not None:
+        lines.append(f"🏁 结束时间: {_format_time(job.finished_at)}")
+    if job.error:
+        lines.append(f"⚠️ 错误: {job.error}")
+
+    if job.events:
+        lines.append("")
+        lines.append("**已完成的阶段:**")
+        for event in job.events:
+            lines.append(f"- [{_format_time(event['time'])}] {event['message']}")
+    return "\n".join(lines)
+
+
+async def handle_submit_job(arguments: Dict[str, Any], runner: ToolRunner) -> List[TextContent]:
+    """处理提交后台任务请求
+
+    Args:
+        arguments: 工具参数
+        runner: 执行工具调用的协程函数（经服务器调度器执行）
+
+    Returns:
+        MCP响应内容
+    """
+    tool_name = arguments.get("tool")
+    tool_arguments = arguments.get("arguments") or {}
+
+    if tool_name not in JOB_TOOLS:
+        return [TextContent(type="text", text=f"错误：tool必须是以下之一: {', '.join(JOB_TOOLS)}")]
+    if not isinstance(tool_arguments, dict):
+        return [TextContent(type="text", text="错误：arguments必须是对象")]
+
+    job = get_job_manager().submit(tool_name, tool_arguments, runner)
+    response_lines = [
+        "✅ 后台任务已提交",
+        "",
+        f"🆔 任务ID: {job.job_id}",
+        f"🔧 工具: {tool_name}",
+        "",
+        f"💡 使用 seedream_job_status 并传入 job_id=\"{job.job_id}\" 查询进度和结果",
+    ]
+    return [TextContent(type="text", text="\n".join(response_lines))]
+
+
+async def handle_job_status(arguments: Dict[str, Any]) -> List[TextContent]:
+    """处理查询后台任务请求
+
+    Args:
+        arguments: 工具参数
+
+    Returns:
+        MCP响应内容，任务完成时附带生成工具返回的内容
+    """
+    manager = get_job_manager()
+    job_id = arguments.get("job_id")
+
+    if not job_id:
+        jobs = manager.list_jobs()
+        if not jobs:
+            return [TextContent(type="text", text="当前没有后台任务")]
+        lines = [f"📋 后台任务（共 {len(jobs)} 个）", ""]
+        for job in jobs:
+            lines.append(
+                f"- {job.job_id}: {job.tool_name} {STATUS_LABELS.get(job.status, job.status)} "
+                f"进度 {_format_progress(job)}"
+            )
+        return [TextContent(type="text", text="\n".join(lines))]
+
+    job = manager.get(job_id)
+    if job is None:
+        return [TextContent(type="text", text=f"错误：任务不存在或已过期: {job_id}")]
+
+    content: List[Any] = [TextContent(type="text", text=_format_job(job))]
+    if job.status == SUCCEEDED and job.result:
+        content.extend(job.result)
+    return content
+
+
+async def handle_cancel_job(arguments: Dict[str, Any]) -> List[TextContent]:
+    """处理取消后台任务请求
+
+    Args:
+        arguments: 工具参数
+
+    Returns:
+        MCP响应内容
+    """
+    job_id = arguments.get("job_id")
+    if not job_id:
+        return [TextContent(type="text", text="错误：job_id参数是必需的")]
+
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        return [TextContent(type="text", text=f"错误：任务不存在或已过期: {job_id}")]
+    if not manager.cancel(job_id):
+        return [TextContent(
+            type="text",
+            text=f"任务 {job_id} 已结束，无需取消（状态: {STATUS_LABELS.get(job.status, job.status)}）"
+        )]
+    return [TextContent(type="text", text=f"🚫 已请求取消任务 {job_id}，已保存的图片会保留在本地")]
@@ -6,70 +6,20 @@ Seedream 4.0 MCP工具 - 多图融合工具
 
 from typing import Any, Dict, List, Optional
 from pathlib import Path
-from mcp.types import Tool, TextContent
+from mcp.types import TextContent
 
 from ..client import SeedreamClient
 from ..config import SeedreamConfig, get_global_config
 from ..utils.logging import get_logger
-from ..utils.auto_save import AutoSaveManager, AutoSaveResult
+from ..utils.jobs import JobFailedError, running_as_job
+from ..utils.auto_save import AutoSaveResult, get_auto_save_registry
 from ..utils.qiniu_uploader import get_qiniu_uploader
+from ..utils.result_cache import get_result_cache
+from .image_helpers import report_generation_stage, save_and_upload
+# 工具定义集中在 definitions 模块，保留从本模块导入的用法
+from .definitions import multi_image_fusion_tool  # noqa: F401
 
 
-# 工具定义
-multi_image_fusion_tool = Tool(
-    name="seedream_multi_image_fusion",
-    description="使用Seedream 4.0将多张图像融合生成【单张】新图像（多图融合）。需要提供2-10张输入图片。如果需要生成多张融合结果，请使用 seedream_sequential_generation 工具",
-    inputSchema={
-        "type": "object",
-        "properties": {
-            "prompt": {
-                "type": "string",
-                "description": "具体的图像融合要求或风格指令，描述你希望如何融合多张图像以及期望的最终效果，而不是描述原图像的内容。建议不超过600个字符",
-                "maxLength": 600
-            },
-            "images": {
-                "type": "array",
-                "description": "输入图像的URL或本地文件路径列表（2-5张图像）",
-                "items": {
-                    "type": "string",
-                    "description": "图像URL或文件路径"
-                },
-                "minItems": 2,
-                "maxItems": 5
-            },
-            "size": {
-                "type": "string",
-                "description": "生成图像的尺寸，如果不指定则使用配置文件中的默认值",
-                "enum": ["1K", "2K", "4K"]
-            },
-            "watermark": {
-                "type": "boolean",
-                "description": "是否在生成的图像上添加水印，如果不指定则使用配置文件中的默认值"
-            },
-            "response_format": {
-                "type": "string",
-                "description": "响应格式：url返回图像URL，b64_json返回base64编码",
-                "enum": ["url", "b64_json"],
-                "default": "url"
-            },
-            "auto_save": {
-                "type": "boolean",
-                "description": "是否自动保存生成的图片到本地。如果未指定，将使用全局配置",
-                "default": None
-            },
-            "save_path": {
-                "type": "string",
-                "description": "自定义保存目录路径。如果未指定，将使用默认配置路径"
-            },
-            "custom_name": {
-                "type": "string",
-                "description": "自定义文件名前缀。如果未指定，将根据提示词自动生成"
-            }
-        },
-        "required": ["prompt", "images"]
-    }
-)
-
 
 async def handle_multi_image_fusion(arguments: Dict[str, Any], client: Optional[SeedreamClient] = None) -> List[TextContent]:
     """处理多图融合请求
@@ -104,9 +54,26 @@ async def handle_multi_image_fusion(arguments: Dict[str, Any], client: Optional[
         # 确定是否启用自动保存
         enable_auto_save = auto_save if auto_save is not None else config.auto_save_enabled
         
+        # 初始化自动保存结果
+        auto_save_results = []
+        
+        # 启用自动保存时查找生成结果缓存，命中则直接回放已保存的图片
+        result_cache = get_result_cache(config) if enable_auto_save else None
+        cache_key = None
+        cached = None
+        if result_cache is not None:
+            cache_key = await result_cache.make_key(
+                "multi_image_fusion", config.model_id, prompt, size, watermark, response_format,
+                images=images, save_path=save_path, custom_name=custom_name
+            )
+            cached = await result_cache.get(cache_key)
+        
         # 创建客户端并调用API
         # 使用传入的client或创建临时client
-        if client is not None:
+        if cached is not None:
+            logger.info("命中生成结果缓存，跳过API调用")
+            result, auto_save_results = cached
+        elif client is not None:
             # 复用server的client（推荐）
             logger.debug("使用server提供的共享client")
             result = await client.multi_image_fusion(
@@ -128,31 +95,36 @@ async def handle_multi_image_fusion(arguments: Dict[str, Any], client: Optional[
                     response_format=response_format
                 )
 
-        # 初始化自动保存结果
-        auto_save_results = []
-        
+        # 报告API调用阶段完成，总步数包括每张图片的下载与上传
+        await report_generation_stage(
+            result, cached is not None,
+            (1 + int(get_qiniu_uploader().enabled)) if enable_auto_save and cached is None else 0
+        )
+
         # 如果启用自动保存且API调用成功，执行自动保存
-        if enable_auto_save and result.get("success"):
+        if enable_auto_save and cached is None and result.get("success"):
             try:
+                # 配置了七牛云时保留图片字节，直接从内存上传
+                keep_content = get_qiniu_uploader().enabled
                 if response_format == "url":
                     auto_save_results = await _handle_auto_save(
-                        result, prompt, config, save_path, custom_name
+                        result, prompt, config, save_path, custom_name, keep_content
                     )
                     if auto_save_results:
                         result = _update_result_with_auto_save(result, auto_save_results)
-                        # 上传到七牛云
-                        await _upload_to_qiniu(auto_save_results, result)
                 elif response_format == "b64_json":
                     auto_save_results = await _handle_auto_save_base64(
-                        result, prompt, config, save_path, custom_name
+                        result, prompt, config, save_path, custom_name, keep_content
                     )
                     if auto_save_results:
                         result = _update_result_with_auto_save(result, auto_save_results)
-                        # 上传到七牛云
-                        await _upload_to_qiniu(auto_save_results, result)
             except Exception as e:
                 logger.warning(f"自动保存失败，但继续返回原始结果: {e}")
         
+        # 写入生成结果缓存
+        if result_cache is not None and cached is None:
+            await result_cache.put(cache_key, "multi_image_fusion", result, auto_save_results)
+        
         # 格式化响应
         response_text = _format_multi_image_fusion_response(
             result, prompt, images, size, auto_save_results, enable_auto_save
@@ -164,6 +136,9 @@ async def handle_multi_image_fusion(arguments: Dict[str, Any], client: Optional[
     except Exception as e:
         logger.error(f"多图融合请求处理失败: {str(e)}")
         error_msg = f"多图融合生成失败: {str(e)}"
+        if running_as_job():
+            # 后台任务中抛出异常，任务标记为失败
+            raise JobFailedError(error_msg) from e
         return [TextContent(type="text", text=error_msg)]
 
 
@@ -172,7 +147,8 @@ async def _handle_auto_save(
     prompt: str,
     config: SeedreamConfig,
     save_path: Optional[str] = None,
-    custom_name: Optional[str] = None
+    custom_name: Optional[str] = None,
+    keep_content: bool = False
 ) -> List[AutoSaveResult]:
     """处理自动保存逻辑
     
@@ -182,6 +158,7 @@ async def _handle_auto_save(
         config: 配置对象
         save_path: 自定义保存路径
         custom_name: 自定义文件名前缀
+        keep_content: 是否保留图片字节以便直接从内存上传
         
     Returns:
         自动保存结果列表
@@ -191,13 +168,7 @@ async def _handle_auto_save(
         Path(config.auto_save_base_dir) if config.auto_save_base_dir else None
     )
     
-    auto_save_manager = AutoSaveManager(
-        base_dir=base_dir,
-        download_timeout=config.auto_save_download_timeout,
-        max_retries=config.auto_save_max_retries,
-        max_file_size=config.auto_save_max_file_size,
-        max_concurrent=config.auto_save_max_concurrent
-    )
+    auto_save_manager = get_auto_save_registry().get_manager(base_dir, config)
     
     # 提取图片URL
     image_urls = []
@@ -219,9 +190,10 @@ async def _handle_auto_save(
         }
         image_data.append(data)
     
-    # 执行批量保存
-    return await auto_save_manager.save_multiple_images(
-        image_data, "multi_image_fusion"
+    # 逐张保存，每张保存完成后立即上传到七牛云
+    return await save_and_upload(
+        auto_save_manager.stream_images(image_data, "multi_image_fusion", keep_content=keep_content),
+        len(image_data), result
     )
 
 
@@ -230,7 +202,8 @@ async def _handle_auto_save_base64(
     prompt: str,
     config: SeedreamConfig,
     save_path: Optional[str] = None,
-    custom_name: Optional[str] = None
+    custom_name: Optional[str] = None,
+    keep_content: bool = False
 ) -> List[AutoSaveResult]:
     """处理 base64 自动保存（多图融合）
     当 response_format 为 b64_json 时，从结果中提取 base64 并保存到本地。
@@ -241,13 +214,7 @@ async def _handle_auto_save_base64(
             Path(config.auto_save_base_dir) if config.auto_save_base_dir else None
         )
 
-        auto_save_manager = AutoSaveManager(
-            base_dir=base_dir,
-            download_timeout=config.auto_save_download_timeout,
-            max_retries=config.auto_save_max_retries,
-            max_file_size=config.auto_save_max_file_size,
-            max_concurrent=config.auto_save_max_concurrent
-        )
+        auto_save_manager = get_auto_save_registry().get_manager(base_dir, config)
 
         data = result.get("data", {})
         if isinstance(data, list):
@@ -271,8 +238,10 @@ async def _handle_auto_save_base64(
             logger.warning("未找到可保存的Base64图片数据")
             return []
 
-        auto_save_results = await auto_save_manager.save_multiple_base64_images(
-            image_data, tool_name="multi_image_fusion"
+        # 逐张保存，每张保存完成后立即上传到七牛云
+        auto_save_results = await save_and_upload(
+            auto_save_manager.stream_base64_images(image_data, "multi_image_fusion", keep_content=keep_content),
+            len(image_data), result
         )
         logger.info(f"Base64 自动保存完成: {len(auto_save_results)} 个图片")
         return auto_save_results
@@ -281,35 +250,6 @@ async def _handle_auto_save_base64(
         return []
 
 
-async def _upload_to_qiniu(
-    auto_save_results: List[AutoSaveResult],
-    result: Dict[str, Any]
-) -> None:
-    """上传图片到七牛云
-
-    Args:
-        auto_save_results: 自动保存结果列表
-        result: API结果（会被修改以添加七牛云URL）
-    """
-    logger = get_logger(__name__)
-    uploader = get_qiniu_uploader()
-
-    if not uploader.enabled:
-        logger.debug("七牛云未配置，跳过上传")
-        return
-
-    # 上传每个成功保存的图片
-    for i, save_result in enumerate(auto_save_results):
-        if save_result.success and save_result.local_path:
-            try:
-                qiniu_url = uploader.upload_file(str(save_result.local_path))
-                if qiniu_url and result.get("data") and i < len(result["data"]):
-                    result["data"][i]["qiniu_url"] = qiniu_url
-                    logger.info(f"图片 {i+1} 已上传到七牛云: {qiniu_url}")
-            except Exception as e:
-                logger.warning(f"图片 {i+1} 上传到七牛云失败: {e}")
-
-
 def _update_result_with_auto_save(
     result: Dict[str, Any],
     auto_save_results: List[AutoSaveResult]
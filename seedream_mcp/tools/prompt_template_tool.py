@@ -5,28 +5,14 @@ Seedream 4.0 MCP工具 - 提示词模板工具
 """
 
 from typing import Any, Dict, List
-from mcp.types import Tool, TextContent
+from mcp.types import TextContent
 
 from ..prompt_templates import get_available_templates, PROMPT_TEMPLATES
 from ..utils.logging import get_logger
+# 工具定义集中在 definitions 模块，保留从本模块导入的用法
+from .definitions import prompt_template_tool  # noqa: F401
 
 
-# 工具定义
-prompt_template_tool = Tool(
-    name="seedream_prompt_templates",
-    description="查看所有可用的提示词模板。提示词模板可以帮助用户快速应用专业的设计风格，如公众号封面、小红书封面、产品海报等",
-    inputSchema={
-        "type": "object",
-        "properties": {
-            "show_details": {
-                "type": "boolean",
-                "description": "是否显示模板的详细内容",
-                "default": False
-            }
-        }
-    }
-)
-
 
 async def handle_prompt_templates(arguments: Dict[str, Any]) -> List[TextContent]:
     """处理提示词模板查询请求
@@ -6,75 +6,22 @@ Seedream 4.0 MCP工具 - 组图生成工具
 
 from typing import Any, Dict, List, Optional
 from pathlib import Path
-from mcp.types import Tool, TextContent
+from mcp.types import TextContent
 
 from ..client import SeedreamClient
 from ..config import SeedreamConfig, get_global_config
 from ..utils.logging import get_logger
-from ..utils.auto_save import AutoSaveManager, AutoSaveResult
+from ..utils.jobs import JobFailedError, running_as_job
+from ..utils.auto_save import AutoSaveResult, get_auto_save_registry
+from ..utils.b64_stream import SPOOL_DIR_NAME, SPOOL_FIELD, release_spooled
 from ..utils.qiniu_uploader import get_qiniu_uploader
+from ..utils.result_cache import get_result_cache
+from .image_helpers import error_response, report_generation_stage, save_and_upload
 from ..prompt_templates import process_user_input
+# 工具定义集中在 definitions 模块，保留从本模块导入的用法
+from .definitions import sequential_generation_tool  # noqa: F401
 
 
-# 工具定义
-sequential_generation_tool = Tool(
-    name="seedream_sequential_generation",
-    description="使用Seedream 4.0【批量生成多张图像】（组图生成）。当用户要求生成2张或更多图片时使用此工具。支持3种输入类型：文生组图、单图生组图、多图生组图。最多可生成15张图片",
-    inputSchema={
-        "type": "object",
-        "properties": {
-            "max_images": {
-                "type": "integer",
-                "description": "要生成的图像数量（必填）。用户说'生成4张图'时，此参数应为4",
-                "minimum": 1,
-                "maximum": 15
-            },
-            "prompt": {
-                "type": "string",
-                "description": "图像内容的文本提示词（如'可口可乐'、'小猫'等）。不需要在提示词中包含数量信息，数量由 max_images 参数指定",
-                "maxLength": 600
-            },
-            "size": {
-                "type": "string",
-                "description": "生成图像的尺寸，如果不指定则使用配置文件中的默认值",
-                "enum": ["1K", "2K", "4K"]
-            },
-            "watermark": {
-                "type": "boolean",
-                "description": "是否在生成的图像上添加水印，如果不指定则使用配置文件中的默认值"
-            },
-            "response_format": {
-                "type": "string",
-                "description": "响应格式：url返回图像URL，b64_json返回base64编码",
-                "enum": ["url", "b64_json"],
-                "default": "url"
-            },
-            "image": {
-                "type": ["string", "array"],
-                "description": "可选的参考图像。支持单张图片URL/路径（字符串）或多张图片URL/路径（字符串数组）。用于单图生组图或多图生组图",
-                "items": {
-                    "type": "string"
-                },
-                "maxItems": 10
-            },
-            "auto_save": {
-                "type": "boolean",
-                "description": "是否自动保存生成的图片到本地。如果未指定，将使用全局配置",
-                "default": None
-            },
-            "save_path": {
-                "type": "string",
-                "description": "自定义保存目录路径。如果未指定，将使用默认配置路径"
-            },
-            "custom_name": {
-                "type": "string",
-                "description": "自定义文件名前缀。如果未指定，将根据提示词自动生成"
-            }
-        },
-        "required": ["prompt", "max_images"]
-    }
-)
-
 
 async def handle_sequential_generation(arguments: Dict[str, Any], client: Optional[SeedreamClient] = None) -> List[TextContent]:
     """处理组图生成请求
@@ -109,10 +56,10 @@ async def handle_sequential_generation(arguments: Dict[str, Any], client: Option
         
         # 验证参数
         if not prompt:
-            return [TextContent(type="text", text="错误：prompt参数是必需的")]
+            return error_response("错误：prompt参数是必需的")
 
         if max_images < 1 or max_images > 15:
-            return [TextContent(type="text", text="错误：max_images必须在1-15之间")]
+            return error_response("错误：max_images必须在1-15之间")
 
         # ⭐ 处理提示词模板
         original_user_input = prompt
@@ -144,37 +91,63 @@ async def handle_sequential_generation(arguments: Dict[str, Any], client: Option
                 logger.info(f"格式化 prompt: '{original_prompt}' -> '{prompt}'")
         
         if size not in ["1K", "2K", "4K"]:
-            return [TextContent(type="text", text="错误：size必须是1K、2K或4K")]
+            return error_response("错误：size必须是1K、2K或4K")
         
         if response_format not in ["url", "b64_json"]:
-            return [TextContent(type="text", text="错误：response_format必须是url或b64_json")]
+            return error_response("错误：response_format必须是url或b64_json")
         
         # 验证image参数
         if image is not None:
             if isinstance(image, str):
                 # 单张图片
                 if not image.strip():
-                    return [TextContent(type="text", text="错误：image参数不能为空字符串")]
+                    return error_response("错误：image参数不能为空字符串")
             elif isinstance(image, list):
                 # 多张图片
                 if len(image) == 0:
-                    return [TextContent(type="text", text="错误：image数组不能为空")]
+                    return error_response("错误：image数组不能为空")
                 if len(image) > 10:
-                    return [TextContent(type="text", text="错误：最多支持10张参考图片")]
+                    return error_response("错误：最多支持10张参考图片")
                 for img in image:
                     if not isinstance(img, str) or not img.strip():
-                        return [TextContent(type="text", text="错误：image数组中的每个元素都必须是非空字符串")]
+                        return error_response("错误：image数组中的每个元素都必须是非空字符串")
             else:
-                return [TextContent(type="text", text="错误：image参数必须是字符串或字符串数组")]
+                return error_response("错误：image参数必须是字符串或字符串数组")
         
         logger.info(f"开始处理组图生成请求: prompt='{prompt[:50]}...', max_images={max_images}, size={size}")
         
         # 确定是否启用自动保存
         enable_auto_save = auto_save if auto_save is not None else config.auto_save_enabled
         
+        # 初始化自动保存结果
+        auto_save_results = []
+        
+        # 启用自动保存时查找生成结果缓存，命中则直接回放已保存的图片
+        result_cache = get_result_cache(config) if enable_auto_save else None
+        cache_key = None
+        cached = None
+        if result_cache is not None:
+            cache_key = await result_cache.make_key(
+                "sequential_generation", config.model_id, prompt, size, watermark, response_format,
+                images=[image] if isinstance(image, str) else image,
+                max_images=max_images, save_path=save_path, custom_name=custom_name
+            )
+            cached = await result_cache.get(cache_key)
+        
+        # 以 b64_json 格式自动保存时流式解析响应，图片直接解码到自动保存目录下的暂存文件
+        spool_dir = None
+        if enable_auto_save and cached is None and response_format == "b64_json" and config.auto_save_stream_b64:
+            base_dir = Path(save_path) if save_path else (
+                Path(config.auto_save_base_dir) if config.auto_save_base_dir else None
+            )
+            spool_dir = get_auto_save_registry().get_manager(base_dir, config).file_manager.base_dir / SPOOL_DIR_NAME
+        
         # 创建客户端并调用API
         # 使用传入的client或创建临时client
-        if client is not None:
+        if cached is not None:
+            logger.info("命中生成结果缓存，跳过API调用")
+            result, auto_save_results = cached
+        elif client is not None:
             # 复用server的client（推荐）
             logger.debug("使用server提供的共享client")
             result = await client.sequential_generation(
@@ -183,7 +156,8 @@ async def handle_sequential_generation(arguments: Dict[str, Any], client: Option
                 size=size,
                 watermark=watermark,
                 response_format=response_format,
-                image=image
+                image=image,
+                spool_dir=spool_dir
             )
         else:
             # 创建临时client（向后兼容）
@@ -195,34 +169,44 @@ async def handle_sequential_generation(arguments: Dict[str, Any], client: Option
                     size=size,
                     watermark=watermark,
                     response_format=response_format,
-                    image=image
+                    image=image,
+                    spool_dir=spool_dir
                 )
 
-        # 初始化自动保存结果
-        auto_save_results = []
-        
+        # 报告API调用阶段完成，总步数包括每张图片的下载与上传
+        await report_generation_stage(
+            result, cached is not None,
+            (1 + int(get_qiniu_uploader().enabled)) if enable_auto_save and cached is None else 0
+        )
+
         # 如果启用自动保存且API调用成功，执行自动保存
-        if enable_auto_save and result.get("success"):
+        if enable_auto_save and cached is None and result.get("success"):
             try:
+                # 配置了七牛云时保留图片字节，直接从内存上传
+                keep_content = get_qiniu_uploader().enabled
                 if response_format == "url":
                     auto_save_results = await _handle_auto_save(
-                        result, prompt, config, save_path, custom_name
+                        result, prompt, config, save_path, custom_name, keep_content
                     )
                     if auto_save_results:
                         result = _update_result_with_auto_save(result, auto_save_results)
-                        # 上传到七牛云
-                        await _upload_to_qiniu(auto_save_results, result)
                 elif response_format == "b64_json":
                     auto_save_results = await _handle_auto_save_base64(
-                        result, prompt, config, save_path, custom_name
+                        result, prompt, config, save_path, custom_name, keep_content
                     )
                     if auto_save_results:
                         result = _update_result_with_auto_save(result, auto_save_results)
-                        # 上传到七牛云
-                        await _upload_to_qiniu(auto_save_results, result)
             except Exception as e:
                 logger.warning(f"自动保存失败，但继续返回原始结果: {e}")
         
+        # 已保存的暂存文件已移到最终位置，清理其余暂存文件
+        if spool_dir is not None:
+            release_spooled(result)
+        
+        # 写入生成结果缓存
+        if result_cache is not None and cached is None:
+            await result_cache.put(cache_key, "sequential_generation", result, auto_save_results)
+        
         # 格式化响应
         response_text = _format_sequential_generation_response(
             result, prompt, max_images, size, auto_save_results, enable_auto_save
@@ -231,9 +215,14 @@ async def handle_sequential_generation(arguments: Dict[str, Any], client: Option
         logger.info("组图生成请求处理完成")
         return [TextContent(type="text", text=response_text)]
         
+    except JobFailedError:
+        raise
     except Exception as e:
         logger.error(f"组图生成请求处理失败: {str(e)}")
         error_msg = f"组图生成失败: {str(e)}"
+        if running_as_job():
+            # 后台任务中抛出异常，任务标记为失败
+            raise JobFailedError(error_msg) from e
         return [TextContent(type="text", text=error_msg)]
 
 
@@ -242,7 +231,8 @@ async def _handle_auto_save(
     prompt: str,
     config: SeedreamConfig,
     save_path: Optional[str] = None,
-    custom_name: Optional[str] = None
+    custom_name: Optional[str] = None,
+    keep_content: bool = False
 ) -> List[AutoSaveResult]:
     """处理自动保存逻辑
     
@@ -252,6 +242,7 @@ async def _handle_auto_save(
         config: 配置对象
         save_path: 自定义保存路径
         custom_name: 自定义文件名前缀
+        keep_content: 是否保留图片字节以便直接从内存上传
         
     Returns:
         自动保存结果列表
@@ -261,13 +252,7 @@ async def _handle_auto_save(
         Path(config.auto_save_base_dir) if config.auto_save_base_dir else None
     )
     
-    auto_save_manager = AutoSaveManager(
-        base_dir=base_dir,
-        download_timeout=config.auto_save_download_timeout,
-        max_retries=config.auto_save_max_retries,
-        max_file_size=config.auto_save_max_file_size,
-        max_concurrent=config.auto_save_max_concurrent
-    )
+    auto_save_manager = get_auto_save_registry().get_manager(base_dir, config)
     
     # 提取图片URL
     image_urls = []
@@ -291,9 +276,10 @@ async def _handle_auto_save(
         }
         image_data.append(data)
     
-    # 执行批量保存
-    return await auto_save_manager.save_multiple_images(
-        image_data, "sequential_generation"
+    # 逐张保存，每张保存完成后立即上传到七牛云
+    return await save_and_upload(
+        auto_save_manager.stream_images(image_data, "sequential_generation", keep_content=keep_content),
+        len(image_data), result
     )
 
 
@@ -302,7 +288,8 @@ async def _handle_auto_save_base64(
     prompt: str,
     config: SeedreamConfig,
     save_path: Optional[str] = None,
-    custom_name: Optional[str] = None
+    custom_name: Optional[str] = None,
+    keep_content: bool = False
 ) -> List[AutoSaveResult]:
     """处理 base64 自动保存（组图生成）
     当 response_format 为 b64_json 时，从结果中提取 base64 并保存到本地。
@@ -313,13 +300,7 @@ async def _handle_auto_save_base64(
             Path(config.auto_save_base_dir) if config.auto_save_base_dir else None
         )
 
-        auto_save_manager = AutoSaveManager(
-            base_dir=base_dir,
-            download_timeout=config.auto_save_download_timeout,
-            max_retries=config.auto_save_max_retries,
-            max_file_size=config.auto_save_max_file_size,
-            max_concurrent=config.auto_save_max_concurrent
-        )
+        auto_save_manager = get_auto_save_registry().get_manager(base_dir, config)
 
         data = result.get("data", {})
         if isinstance(data, list):
@@ -331,7 +312,17 @@ async def _handle_auto_save_base64(
 
         image_data = []
         for i, image in enumerate(images):
-            if isinstance(image, dict) and "b64_json" in image:
+            if isinstance(image, dict) and SPOOL_FIELD in image:
+                # 流式解析响应时图片已解码到暂存文件
+                image_data.append({
+                    SPOOL_FIELD: image[SPOOL_FIELD],
+                    'sha256': image.get('sha256'),
+                    'content_type': image.get('content_type'),
+                    'prompt': prompt,
+                    'custom_name': f"{custom_name}_{i+1}" if custom_name else None,
+                    'alt_text': f"Generated image {i+1}: {prompt[:50]}..."
+                })
+            elif isinstance(image, dict) and "b64_json" in image:
                 image_data.append({
                     'b64_json': image['b64_json'],
                     'prompt': prompt,
@@ -343,8 +334,10 @@ async def _handle_auto_save_base64(
             logger.warning("未找到可保存的Base64图片数据")
             return []
 
-        auto_save_results = await auto_save_manager.save_multiple_base64_images(
-            image_data, tool_name="sequential_generation"
+        # 逐张保存，每张保存完成后立即上传到七牛云
+        auto_save_results = await save_and_upload(
+            auto_save_manager.stream_base64_images(image_data, "sequential_generation", keep_content=keep_content),
+            len(image_data), result
         )
         logger.info(f"Base64 自动保存完成: {len(auto_save_results)} 个图片")
         return auto_save_results
@@ -353,35 +346,6 @@ async def _handle_auto_save_base64(
         return []
 
 
-async def _upload_to_qiniu(
-    auto_save_results: List[AutoSaveResult],
-    result: Dict[str, Any]
-) -> None:
-    """上传图片到七牛云
-
-    Args:
-        auto_save_results: 自动保存结果列表
-        result: API结果（会被修改以添加七牛云URL）
-    """
-    logger = get_logger(__name__)
-    uploader = get_qiniu_uploader()
-
-    if not uploader.enabled:
-        logger.debug("七牛云未配置，跳过上传")
-        return
-
-    # 上传每个成功保存的图片
-    for i, save_result in enumerate(auto_save_results):
-        if save_result.success and save_result.local_path:
-            try:
-                qiniu_url = uploader.upload_file(str(save_result.local_path))
-                if qiniu_url and result.get("data") and i < len(result["data"]):
-                    result["data"][i]["qiniu_url"] = qiniu_url
-                    logger.info(f"图片 {i+1} 已上传到七牛云: {qiniu_url}")
-            except Exception as e:
-                logger.warning(f"图片 {i+1} 上传到七牛云失败: {e}")
-
-
 def _update_result_with_auto_save(
     result: Dict[str, Any],
     auto_save_results: List[AutoSaveResult]
@@ -510,6 +474,8 @@ def _format_sequential_generation_response(
                 # Base64信息（如存在）
                 if "b64_json" in image:
                     response_lines.append(f"  📦 数据: [Base64编码，长度: {len(image['b64_json'])}字符]")
+                elif "b64_json_length" in image:
+                    response_lines.append(f"  📦 数据: [Base64编码，长度: {image['b64_json_length']}字符，已直接解码到文件]")
 
                 # 修订提示词（如存在）
                 if "revised_prompt" in image:
@@ -4,28 +4,40 @@ Seedream 4.0 MCP工具 - 工具函数模块
 包含参数验证、错误处理、日志配置、自动保存等工具函数。
 """
 
-from .errors import SeedreamMCPError, SeedreamConfigError, SeedreamAPIError
-from .validation import validate_prompt, validate_image_url, validate_size
-from .logging import setup_logging
-from .download_manager import DownloadManager, DownloadError
-from .file_manager import FileManager, FileManagerError
-from .auto_save import AutoSaveManager, AutoSaveResult, AutoSaveError
-from .path_utils import (
-    normalize_path,
-    validate_image_path,
-    validate_image_paths,
-    get_relative_path,
-    find_images_in_directory,
-    get_file_info,
-    suggest_similar_paths
-)
-from .user_guide import (
-    get_path_usage_guide,
-    get_error_solutions,
-    format_error_message,
-    get_quick_tips,
-    validate_and_suggest_path
-)
+import importlib
+
+# 各子模块依赖的第三方库（aiohttp、loguru 等）较重，导入本包时不立即加载，
+# 首次访问对应名称时再导入所在子模块
+_LAZY_IMPORTS = {
+    "SeedreamMCPError": ".errors",
+    "SeedreamConfigError": ".errors",
+    "SeedreamAPIError": ".errors",
+    "validate_prompt": ".validation",
+    "validate_image_url": ".validation",
+    "validate_size": ".validation",
+    "setup_logging": ".logging",
+    "DownloadManager": ".download_manager",
+    "DownloadError": ".download_manager",
+    "FileManager": ".file_manager",
+    "FileManagerError": ".file_manager",
+    "AutoSaveManager": ".auto_save",
+    "AutoSaveResult": ".auto_save",
+    "AutoSaveError": ".auto_save",
+    "AutoSaveManagerRegistry": ".auto_save",
+    "get_auto_save_registry": ".auto_save",
+    "normalize_path": ".path_utils",
+    "validate_image_path": ".path_utils",
+    "validate_image_paths": ".path_utils",
+    "get_relative_path": ".path_utils",
+    "find_images_in_directory": ".path_utils",
+    "get_file_info": ".path_utils",
+    "suggest_similar_paths": ".path_utils",
+    "get_path_usage_guide": ".user_guide",
+    "get_error_solutions": ".user_guide",
+    "format_error_message": ".user_guide",
+    "get_quick_tips": ".user_guide",
+    "validate_and_suggest_path": ".user_guide",
+}
 
 __all__ = [
     "SeedreamMCPError",
@@ -42,6 +54,8 @@ __all__ = [
     "AutoSaveManager",
     "AutoSaveResult",
     "AutoSaveError",
+    "AutoSaveManagerRegistry",
+    "get_auto_save_registry",
     "normalize_path",
     "validate_image_path",
     "validate_image_paths",
@@ -54,4 +68,14 @@ __all__ = [
     "format_error_message",
     "get_quick_tips",
     "validate_and_suggest_path",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    """首次访问时导入延迟加载的属性"""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,152 @@
+"""
+Seedream 4.0 MCP工具 - 异步文件写入模块
+
+磁盘写入是阻塞调用，在事件循环中直接写文件会在并发保存大图时卡住其他请求。
+写入器把下载的小块数据合并到缓冲区，缓冲区写满后在线程中一次性写入磁盘，
+事件循环只负责拷贝数据到缓冲区。
+"""
+
+import asyncio
+import functools
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# 默认的写入缓冲区大小（字节）：比下载数据块大得多以减少线程切换，
+# 又不至于让事件循环在扩容缓冲区时拷贝过多数据
+DEFAULT_WRITE_BUFFER_SIZE = 256 * 1024
+
+
+async def run_in_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在线程池中执行阻塞的文件操作
+
+    Args:
+        func: 阻塞函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+
+    Returns:
+        函数返回值
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+class AsyncFileWriter:
+    """异步文件写入器
+
+    用法::
+
+        async with AsyncFileWriter(path, "wb") as writer:
+            async for chunk in response.content.iter_chunked(65536):
+                await writer.write(chunk)
+
+    退出时写入剩余的缓冲数据并关闭文件（包括发生异常时），
+    flushed 反映实际已写入磁盘的字节数，可用于断点续传。
+    指定 hasher 时在写入线程中用已写入磁盘的数据更新哈希，哈希始终与 flushed 对应。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        mode: str = "wb",
+        buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE,
+        hasher: Optional[Any] = None
+    ):
+        """
+        初始化写入器
+
+        Args:
+            path: 文件路径
+            mode: 打开模式（"wb" 或 "ab"）
+            buffer_size: 缓冲区大小（字节），数据累积到该大小后写入磁盘
+            hasher: 可选的 hashlib 哈希对象，追加写入时传入之前的哈希对象即可继续计算
+        """
+        self.path = path
+        self.mode = mode
+        self.buffer_size = max(1, buffer_size)
+        self.hasher = hasher
+        self._file: Optional[BinaryIO] = None
+        self._buffer = bytearray()
+        self.flushed = 0
+        self.writes = 0
+
+    @property
+    def size(self) -> int:
+        """已接收的字节数（包括尚在缓冲区中的数据）"""
+        return self.flushed + len(self._buffer)
+
+    async def __aenter__(self) -> "AsyncFileWriter":
+        await self.open()
+        return self
+
+    async def open(self) -> None:
+        """打开文件（不使用 async with 时调用，之后必须调用 close）"""
+        self._file = await run_in_thread(open, self.path, self.mode)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def write(self, data: bytes) -> None:
+        """
+        写入数据，缓冲区写满时在线程中写入磁盘
+
+        Args:
+            data: 字节数据
+        """
+        if not self._buffer and len(data) >= self.buffer_size:
+            # 大块数据无需经过缓冲区拷贝
+            await self._write_to_disk(data)
+            return
+        self._buffer += data
+        if len(self._buffer) >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """把缓冲区中的数据写入磁盘"""
+        if not self._buffer:
+            return
+        # 交换缓冲区而不是拷贝，写满的缓冲区交给线程写入
+        data, self._buffer = self._buffer, bytearray()
+        await self._write_to_disk(data)
+
+    async def _write_to_disk(self, data) -> None:
+        """在线程中写入数据"""
+        await run_in_thread(self._write_and_hash, data)
+        self.flushed += len(data)
+        self.writes += 1
+
+    def _write_and_hash(self, data) -> None:
+        """写入数据并更新哈希（在线程中执行）"""
+        self._file.write(data)
+        if self.hasher is not None:
+            self.hasher.update(data)
+
+    async def close(self) -> None:
+        """写入剩余数据并关闭文件"""
+        if self._file is None:
+            return
+        try:
+            await self.flush()
+        finally:
+            file, self._file = self._file, None
+            await run_in_thread(file.close)
+
+
+async def write_file_async(path: Path, data: bytes, buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE) -> int:
+    """
+    在线程中把整块数据写入文件
+
+    Args:
+        path: 文件路径
+        data: 字节数据
+        buffer_size: 写入器缓冲区大小（字节）
+
+    Returns:
+        写入的字节数
+    """
+    async with AsyncFileWriter(path, "wb", buffer_size=buffer_size) as writer:
+        await writer.write(data)
+    return writer.flushed
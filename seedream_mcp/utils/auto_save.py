@@ -5,13 +5,20 @@
 
 import asyncio
 import base64
+import functools
 import logging
+import os
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
+from .async_writer import DEFAULT_WRITE_BUFFER_SIZE, run_in_thread
+from .b64_stream import SPOOL_FIELD
 from .download_manager import DownloadManager, DownloadError
-from .file_manager import FileManager, FileManagerError
+from .file_manager import FileManager, FileManagerError, resolve_base_dir
+from .object_store import OBJECTS_DIR_NAME, ObjectStore
+from .progress import report_progress
+from .storage_index import StorageIndex, open_storage_index
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +38,8 @@ class AutoSaveResult:
         local_path: Optional[str] = None,
         markdown_ref: Optional[str] = None,
         error: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None
     ):
         self.success = success
         self.original_url = original_url
@@ -39,6 +47,8 @@ class AutoSaveResult:
         self.markdown_ref = markdown_ref
         self.error = error
         self.metadata = metadata or {}
+        # 图片字节数据（仅在 keep_content 时保留，用于直接上传，不参与序列化）
+        self.content = content
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -60,6 +70,55 @@ class AutoSaveResult:
             result['metadata'] = self.metadata
         
         return result
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AutoSaveResult":
+        """从 to_dict() 的结果恢复"""
+        return cls(
+            success=data.get('success', False),
+            original_url=data.get('original_url', ''),
+            local_path=data.get('local_path'),
+            markdown_ref=data.get('markdown_ref'),
+            error=data.get('error'),
+            metadata=data.get('metadata')
+        )
+
+
+def _read_head(path: Path, size: int = 16) -> bytes:
+    """读取文件头，用于推断图片格式"""
+    with open(path, "rb") as f:
+        return f.read(size)
+
+
+def _discard_spool_file(path: Path) -> None:
+    """删除未能保存的暂存文件"""
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"删除暂存文件失败: {path} -> {e}")
+
+
+async def _report_saved(index: int, total: int, result: AutoSaveResult) -> None:
+    """
+    报告单张图片的保存阶段完成
+    
+    Args:
+        index: 图片在批量保存中的序号（从0开始）
+        total: 批量保存的图片总数
+        result: 保存结果
+    """
+    if result.success:
+        await report_progress(
+            f"图片 {index + 1}/{total} 已保存: {result.local_path}",
+            data={"index": index, "local_path": str(result.local_path)}
+        )
+    else:
+        await report_progress(
+            f"图片 {index + 1}/{total} 保存失败: {result.error}",
+            data={"index": index}
+        )
 
 
 class AutoSaveManager:
@@ -71,7 +130,12 @@ class AutoSaveManager:
         download_timeout: int = 30,
         max_retries: int = 3,
         max_file_size: int = 50 * 1024 * 1024,  # 50MB
-        max_concurrent: int = 5
+        max_concurrent: int = 5,
+        connection_limit_per_host: int = 5,
+        dns_cache_ttl: int = 300,
+        write_buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE,
+        dedup_enabled: bool = False,
+        index_enabled: bool = True
     ):
         """
         初始化自动保存管理器
@@ -82,14 +146,55 @@ class AutoSaveManager:
             max_retries: 最大重试次数
             max_file_size: 最大文件大小
             max_concurrent: 最大并发下载数
+            connection_limit_per_host: 单个主机的下载连接数上限
+            dns_cache_ttl: DNS缓存时间（秒）
+            write_buffer_size: 写入磁盘前合并数据块的缓冲区大小（字节）
+            dedup_enabled: 是否启用内容寻址对象存储，相同内容的图片共用一份磁盘空间
+            index_enabled: 是否维护存储索引，统计存储占用和清理旧文件时查询索引而不遍历目录
         """
         self.file_manager = FileManager(base_dir)
+        self.object_store = (
+            ObjectStore(self.file_manager.base_dir / OBJECTS_DIR_NAME) if dedup_enabled else None
+        )
+        self.storage_index: Optional[StorageIndex] = (
+            open_storage_index(self.file_manager.base_dir) if index_enabled else None
+        )
+        self.write_buffer_size = write_buffer_size
         self.download_manager = DownloadManager(
             timeout=download_timeout,
             max_retries=max_retries,
-            max_file_size=max_file_size
+            max_file_size=max_file_size,
+            limit_per_host=connection_limit_per_host,
+            dns_cache_ttl=dns_cache_ttl,
+            write_buffer_size=write_buffer_size
         )
         self.max_concurrent = max_concurrent
+        
+        # 所有批量保存共享的并发预算
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """获取当前事件循环上共享的并发信号量"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def __aenter__(self):
+        """异步上下文管理器入口"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """异步上下文管理器出口"""
+        await self.close()
+
+    async def close(self) -> None:
+        """关闭下载会话等长生命周期资源"""
+        await self.download_manager.close()
+        if self.storage_index is not None:
+            self.storage_index.close()
 
     def _parse_data_uri(self, data: str) -> Tuple[Optional[str], str]:
         """
@@ -111,6 +216,29 @@ class AutoSaveManager:
         except Exception:
             return None, data
 
+    async def _finalize_saved(self, path: Path, content_hash: Optional[str]) -> bool:
+        """
+        登记已保存的文件：启用对象存储时替换为内容对象的硬链接，启用索引时写入存储索引
+        
+        Args:
+            path: 已保存的文件路径
+            content_hash: 文件内容的 SHA-256
+            
+        Returns:
+            文件是否与已有的相同内容合并
+        """
+        deduplicated = False
+        if self.object_store is not None and content_hash:
+            deduplicated = await run_in_thread(self.object_store.link, Path(path), content_hash)
+        if self.storage_index is not None:
+            # 合并为硬链接后 inode 改变，需在登记对象之后记录
+            try:
+                await run_in_thread(self.storage_index.record, Path(path), content_hash)
+            except Exception as e:
+                # 索引只用于统计和清理，写入失败不影响保存结果，可通过重建索引修复
+                logger.warning(f"更新存储索引失败: {path} -> {e}")
+        return deduplicated
+
     def _extension_from_mime(self, mime: Optional[str]) -> str:
         mapping = {
             'image/png': '.png',
@@ -131,7 +259,8 @@ class AutoSaveManager:
         prompt: str = "",
         tool_name: str = "seedream",
         custom_name: Optional[str] = None,
-        alt_text: Optional[str] = None
+        alt_text: Optional[str] = None,
+        keep_content: bool = False
     ) -> AutoSaveResult:
         """
         保存单个图片
@@ -142,6 +271,7 @@ class AutoSaveManager:
             tool_name: 工具名称
             custom_name: 自定义文件名
             alt_text: Markdown替代文本
+            keep_content: 是否在结果中保留下载的图片字节
             
         Returns:
             保存结果
@@ -162,7 +292,11 @@ class AutoSaveManager:
             )
             
             # 下载图片
-            download_result = await self.download_manager.download_image(url, save_path)
+            download_result = await self.download_manager.download_image(
+                url, save_path, keep_content=keep_content
+            )
+            content_hash = download_result.get('sha256')
+            deduplicated = await self._finalize_saved(save_path, content_hash)
             
             # 生成Markdown引用
             markdown_alt = alt_text or prompt or "Generated Image"
@@ -178,7 +312,9 @@ class AutoSaveManager:
                 'file_size': download_result.get('file_size', 0),
                 'download_time': download_result.get('download_time', 0),
                 'content_type': download_result.get('content_type', ''),
-                'attempts': download_result.get('attempts', 1)
+                'attempts': download_result.get('attempts', 1),
+                'sha256': content_hash,
+                'deduplicated': deduplicated
             }
             
             result = AutoSaveResult(
@@ -186,7 +322,8 @@ class AutoSaveManager:
                 original_url=url,
                 local_path=str(save_path),
                 markdown_ref=markdown_ref,
-                metadata=metadata
+                metadata=metadata,
+                content=download_result.get('content')
             )
             
             logger.info(f"图片保存成功: {save_path}")
@@ -213,10 +350,13 @@ class AutoSaveManager:
         prompt: str = "",
         tool_name: str = "seedream",
         custom_name: Optional[str] = None,
-        alt_text: Optional[str] = None
+        alt_text: Optional[str] = None,
+        keep_content: bool = False
     ) -> AutoSaveResult:
         """
         保存单个 Base64 图片(支持 data URI 或纯 base64 字符串)
+
+        keep_content 为 True 时在结果中保留解码后的字节，供直接上传使用。
         """
         try:
             logger.info("开始自动保存 Base64 图片")
@@ -234,8 +374,8 @@ class AutoSaveManager:
             # 推断扩展名
             extension = self._extension_from_mime(mime) if mime else self.file_manager.infer_extension_from_bytes(content_bytes, default=".jpg")
 
-            # 创建保存路径
-            content_hash = self.file_manager.get_content_hash(content_bytes)
+            # 创建保存路径（哈希在线程中计算，写入时复用）
+            content_hash = await run_in_thread(self.file_manager.get_content_hash, content_bytes)
             save_path = self.file_manager.create_save_path_from_extension(
                 prompt=prompt,
                 extension=extension,
@@ -244,8 +384,11 @@ class AutoSaveManager:
                 content_hash=content_hash
             )
 
-            # 写入文件
-            write_result = self.file_manager.save_bytes(save_path, content_bytes)
+            # 写入文件（在线程中执行，不阻塞事件循环）
+            write_result = await self.file_manager.save_bytes_async(
+                save_path, content_bytes, buffer_size=self.write_buffer_size, content_hash=content_hash
+            )
+            deduplicated = await self._finalize_saved(Path(write_result['file_path']), content_hash)
 
             # 生成 Markdown 引用
             markdown_alt = alt_text or prompt or "Generated Image"
@@ -257,7 +400,9 @@ class AutoSaveManager:
                 'save_time': write_result.get('save_time'),
                 'file_size': write_result.get('file_size', 0),
                 'content_type': mime or '',
-                'attempts': 1
+                'attempts': 1,
+                'sha256': content_hash,
+                'deduplicated': deduplicated
             }
 
             original_desc = f"base64:{len(payload)}"
@@ -267,7 +412,8 @@ class AutoSaveManager:
                 original_url=original_desc,
                 local_path=write_result['file_path'],
                 markdown_ref=markdown_ref,
-                metadata=metadata
+                metadata=metadata,
+                content=content_bytes if keep_content else None
             )
 
         except (FileManagerError, AutoSaveError) as e:
@@ -285,10 +431,209 @@ class AutoSaveManager:
                 error=f"未知错误: {e}"
             )
     
+    async def save_spooled_image(
+        self,
+        spool_path: str,
+        prompt: str = "",
+        tool_name: str = "seedream",
+        custom_name: Optional[str] = None,
+        alt_text: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        mime: Optional[str] = None
+    ) -> AutoSaveResult:
+        """
+        保存流式解析响应时已解码到暂存文件的 Base64 图片
+
+        暂存文件位于自动保存目录下，直接重命名到最终路径，不再读入内存。
+        保存失败时删除暂存文件。
+
+        Args:
+            spool_path: 暂存文件路径
+            prompt: 生成提示词
+            tool_name: 工具名称
+            custom_name: 自定义文件名
+            alt_text: Markdown替代文本
+            content_hash: 解码时计算的 SHA-256
+            mime: data URI 中的 MIME 类型
+
+        Returns:
+            保存结果
+        """
+        source = Path(spool_path)
+        try:
+            logger.info(f"开始自动保存 Base64 图片（暂存文件）: {source}")
+
+            if mime:
+                extension = self._extension_from_mime(mime)
+            else:
+                head = await run_in_thread(_read_head, source)
+                extension = self.file_manager.infer_extension_from_bytes(head, default=".jpg")
+
+            save_path = self.file_manager.create_save_path_from_extension(
+                prompt=prompt,
+                extension=extension,
+                tool_name=tool_name,
+                custom_name=custom_name,
+                content_hash=content_hash
+            )
+            # 文件名包含内容哈希，同名文件的内容相同，直接替换
+            await run_in_thread(os.replace, source, save_path)
+            file_size = save_path.stat().st_size
+            deduplicated = await self._finalize_saved(save_path, content_hash)
+
+            markdown_alt = alt_text or prompt or "Generated Image"
+            markdown_ref = self.file_manager.generate_markdown_reference(save_path, markdown_alt)
+
+            metadata = {
+                'prompt': prompt,
+                'tool_name': tool_name,
+                'save_time': datetime.now().isoformat(),
+                'file_size': file_size,
+                'content_type': mime or '',
+                'attempts': 1,
+                'sha256': content_hash,
+                'deduplicated': deduplicated
+            }
+
+            logger.info(f"Base64 图片保存成功: {save_path}")
+            return AutoSaveResult(
+                success=True,
+                original_url=f"base64:{file_size}",
+                local_path=str(save_path),
+                markdown_ref=markdown_ref,
+                metadata=metadata
+            )
+
+        except (FileManagerError, AutoSaveError, OSError) as e:
+            logger.error(f"Base64 图片保存失败: {e}")
+            _discard_spool_file(source)
+            return AutoSaveResult(
+                success=False,
+                original_url='base64',
+                error=str(e)
+            )
+
+    async def _stream_saves(
+        self,
+        savers: List[Callable[[], Awaitable[AutoSaveResult]]],
+        sources: List[str]
+    ) -> AsyncIterator[Tuple[int, AutoSaveResult]]:
+        """
+        并发执行保存任务，按完成顺序逐个产出结果
+        
+        Args:
+            savers: 保存单张图片的协程函数列表
+            sources: 与 savers 一一对应的图片来源，用于记录失败结果
+            
+        Yields:
+            (图片序号, 保存结果)，序号与输入顺序一致
+        """
+        # 限制并发数量（同一管理器的所有调用共享并发预算）
+        semaphore = self._get_semaphore()
+        
+        async def run(index: int) -> Tuple[int, AutoSaveResult]:
+            try:
+                async with semaphore:
+                    result = await savers[index]()
+            except Exception as e:
+                result = AutoSaveResult(success=False, original_url=sources[index], error=str(e))
+            await _report_saved(index, len(savers), result)
+            return index, result
+        
+        tasks = [asyncio.ensure_future(run(i)) for i in range(len(savers))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前结束或被取消时，取消尚未完成的保存任务
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def stream_images(
+        self,
+        image_data: List[Dict[str, Any]],
+        tool_name: str = "seedream",
+        keep_content: bool = False
+    ) -> AsyncIterator[Tuple[int, AutoSaveResult]]:
+        """
+        并发下载保存多个图片，每张图片保存完成后立即产出结果
+        
+        调用方可以在其余图片仍在下载时处理已保存的图片（如开始上传），
+        首张图片的可用时间只取决于最快的一次下载。
+        
+        Args:
+            image_data: 图片数据列表,每个元素包含url、prompt等信息
+            tool_name: 工具名称
+            keep_content: 是否在结果中保留下载的图片字节
+            
+        Returns:
+            按完成顺序产出 (图片序号, 保存结果) 的异步迭代器
+        """
+        savers = [
+            functools.partial(
+                self.save_image,
+                url=data.get('url', ''),
+                prompt=data.get('prompt', ''),
+                tool_name=tool_name,
+                custom_name=data.get('custom_name'),
+                alt_text=data.get('alt_text'),
+                keep_content=keep_content
+            )
+            for data in image_data
+        ]
+        return self._stream_saves(savers, [data.get('url', 'unknown') for data in image_data])
+    
+    def stream_base64_images(
+        self,
+        image_data: List[Dict[str, Any]],
+        tool_name: str = "seedream",
+        keep_content: bool = False
+    ) -> AsyncIterator[Tuple[int, AutoSaveResult]]:
+        """
+        并发保存多个 Base64 图片，每张图片保存完成后立即产出结果
+        
+        Args:
+            image_data: 图片数据列表,每个元素包含b64_json（或流式解析得到的b64_json_spool）、prompt等信息
+            tool_name: 工具名称
+            keep_content: 是否在结果中保留解码后的图片字节
+            
+        Returns:
+            按完成顺序产出 (图片序号, 保存结果) 的异步迭代器
+        """
+        savers = []
+        for data in image_data:
+            if data.get(SPOOL_FIELD):
+                # 流式解析响应时图片已解码到暂存文件，直接移动，不保留字节（上传时从磁盘读取）
+                saver = functools.partial(
+                    self.save_spooled_image,
+                    spool_path=data[SPOOL_FIELD],
+                    prompt=data.get('prompt', ''),
+                    tool_name=tool_name,
+                    custom_name=data.get('custom_name'),
+                    alt_text=data.get('alt_text'),
+                    content_hash=data.get('sha256'),
+                    mime=data.get('content_type')
+                )
+            else:
+                saver = functools.partial(
+                    self.save_base64_image,
+                    b64_data=data.get('b64_json', ''),
+                    prompt=data.get('prompt', ''),
+                    tool_name=tool_name,
+                    custom_name=data.get('custom_name'),
+                    alt_text=data.get('alt_text'),
+                    keep_content=keep_content
+                )
+            savers.append(saver)
+        return self._stream_saves(savers, ['base64'] * len(image_data))
+    
     async def save_multiple_images(
         self,
         image_data: List[Dict[str, Any]],
-        tool_name: str = "seedream"
+        tool_name: str = "seedream",
+        keep_content: bool = False
     ) -> List[AutoSaveResult]:
         """
         批量保存多个图片
@@ -296,54 +641,16 @@ class AutoSaveManager:
         Args:
             image_data: 图片数据列表,每个元素包含url、prompt等信息
             tool_name: 工具名称
+            keep_content: 是否在结果中保留下载的图片字节
             
         Returns:
             保存结果列表
         """
         logger.info(f"开始批量保存 {len(image_data)} 个图片")
         
-        # 创建保存任务
-        tasks = []
-        for data in image_data:
-            url = data.get('url', '')
-            prompt = data.get('prompt', '')
-            custom_name = data.get('custom_name')
-            alt_text = data.get('alt_text')
-            
-            task = self.save_image(
-                url=url,
-                prompt=prompt,
-                tool_name=tool_name,
-                custom_name=custom_name,
-                alt_text=alt_text
-            )
-            tasks.append(task)
-        
-        # 限制并发数量
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-        
-        async def save_with_semaphore(task):
-            async with semaphore:
-                return await task
-        
-        # 执行所有任务
-        results = await asyncio.gather(
-            *[save_with_semaphore(task) for task in tasks],
-            return_exceptions=True
-        )
-        
-        # 处理异常结果
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                url = image_data[i].get('url', 'unknown')
-                processed_results.append(AutoSaveResult(
-                    success=False,
-                    original_url=url,
-                    error=str(result)
-                ))
-            else:
-                processed_results.append(result)
+        processed_results: List[AutoSaveResult] = [None] * len(image_data)
+        async for index, result in self.stream_images(image_data, tool_name, keep_content):
+            processed_results[index] = result
         
         # 统计结果
         success_count = sum(1 for r in processed_results if r.success)
@@ -354,48 +661,17 @@ class AutoSaveManager:
     async def save_multiple_base64_images(
         self,
         image_data: List[Dict[str, Any]],
-        tool_name: str = "seedream"
+        tool_name: str = "seedream",
+        keep_content: bool = False
     ) -> List[AutoSaveResult]:
         """
         并发保存多个 Base64 图片
         """
         logger.info(f"开始批量保存 {len(image_data)} 个 Base64 图片")
 
-        tasks = []
-        for data in image_data:
-            b64 = data.get('b64_json', '')
-            prompt = data.get('prompt', '')
-            custom_name = data.get('custom_name')
-            alt_text = data.get('alt_text')
-            tasks.append(self.save_base64_image(
-                b64_data=b64,
-                prompt=prompt,
-                tool_name=tool_name,
-                custom_name=custom_name,
-                alt_text=alt_text
-            ))
-
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-
-        async def save_with_semaphore(task):
-            async with semaphore:
-                return await task
-
-        results = await asyncio.gather(
-            *[save_with_semaphore(task) for task in tasks],
-            return_exceptions=True
-        )
-
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed_results.append(AutoSaveResult(
-                    success=False,
-                    original_url='base64',
-                    error=str(result)
-                ))
-            else:
-                processed_results.append(result)
+        processed_results: List[AutoSaveResult] = [None] * len(image_data)
+        async for index, result in self.stream_base64_images(image_data, tool_name, keep_content):
+            processed_results[index] = result
 
         success_count = sum(1 for r in processed_results if r.success)
         logger.info(f"批量 Base64 保存完成: {success_count}/{len(image_data)} 成功")
@@ -503,28 +779,58 @@ class AutoSaveManager:
         """
         获取存储信息
         
+        启用存储索引时查询索引，并附带按工具和按日期的汇总；否则遍历目录统计。
+        
         Returns:
             存储信息
         """
         base_dir = self.file_manager.base_dir
         
         try:
+            if self.storage_index is not None and base_dir.exists():
+                summary = self.storage_index.summary()
+                info = {
+                    'base_directory': str(base_dir),
+                    'total_files': summary['total_files'],
+                    'total_size_bytes': summary['total_size_bytes'],
+                    'total_size_mb': round(summary['total_size_bytes'] / (1024 * 1024), 2),
+                    'directory_exists': True,
+                    'by_tool': summary['by_tool'],
+                    'by_day': summary['by_day'],
+                    'index_reconciled_at': summary['reconciled_at']
+                }
+                if self.object_store is not None:
+                    info['dedup'] = self.object_store.get_stats()
+                return info
+            
             # 计算目录大小和文件数量
             total_size = 0
             file_count = 0
+            # 硬链接到同一对象的文件只计算一次占用空间
+            seen_inodes = set()
             
             for file_path in base_dir.rglob("*"):
+                # 跳过隐藏目录中的内部数据（对象存储、暂存文件、缓存数据库）
+                if any(part.startswith('.') for part in file_path.relative_to(base_dir).parts[:-1]):
+                    continue
                 if file_path.is_file():
                     file_count += 1
-                    total_size += file_path.stat().st_size
+                    stat = file_path.stat()
+                    inode = (stat.st_dev, stat.st_ino)
+                    if inode not in seen_inodes:
+                        seen_inodes.add(inode)
+                        total_size += stat.st_size
             
-            return {
+            info = {
                 'base_directory': str(base_dir),
                 'total_files': file_count,
                 'total_size_bytes': total_size,
                 'total_size_mb': round(total_size / (1024 * 1024), 2),
                 'directory_exists': base_dir.exists()
             }
+            if self.object_store is not None:
+                info['dedup'] = self.object_store.get_stats()
+            return info
             
         except Exception as e:
             logger.error(f"获取存储信息失败: {e}")
@@ -533,6 +839,17 @@ class AutoSaveManager:
                 'error': str(e)
             }
     
+    async def reconcile_index(self) -> Dict[str, Any]:
+        """
+        遍历磁盘重建存储索引（如图片在服务之外被手动删除或复制进来后）
+        
+        Returns:
+            重建结果，未启用索引时返回空字典
+        """
+        if self.storage_index is None:
+            return {}
+        return await run_in_thread(self.storage_index.reconcile)
+    
     async def cleanup_old_files(self, days: int = 30) -> Dict[str, Any]:
         """
         清理旧文件
@@ -543,4 +860,103 @@ class AutoSaveManager:
         Returns:
             清理结果
         """
-        return self.file_manager.cleanup_old_files(days)
+        if self.storage_index is not None:
+            # 从索引中查询过期文件，不遍历目录
+            try:
+                result = await run_in_thread(self.storage_index.cleanup, days)
+            finally:
+                self.file_manager.invalidate_directory_cache()
+        else:
+            result = self.file_manager.cleanup_old_files(days)
+        if self.object_store is not None:
+            # 可读路径删除后，没有引用的对象一并删除
+            result['pruned_objects'] = await run_in_thread(self.object_store.prune)
+        return result
+
+
+class AutoSaveManagerRegistry:
+    """自动保存管理器注册表
+    
+    按解析后的基础目录缓存 AutoSaveManager 实例，使重复保存到同一目录的调用
+    复用文件管理器的目录缓存、下载会话和并发预算。
+    """
+    
+    def __init__(self):
+        """初始化注册表"""
+        self._managers: Dict[Path, AutoSaveManager] = {}
+        self._hits = 0
+        self._misses = 0
+    
+    def get_manager(self, base_dir: Optional[Path], config) -> AutoSaveManager:
+        """
+        获取指定目录的自动保存管理器，不存在时按配置创建
+        
+        Args:
+            base_dir: 基础保存目录，为None时使用默认目录
+            config: SeedreamConfig 配置对象
+            
+        Returns:
+            AutoSaveManager 实例
+        """
+        key = resolve_base_dir(base_dir)
+        manager = self._managers.get(key)
+        if manager is not None:
+            self._hits += 1
+            return manager
+        
+        self._misses += 1
+        manager = AutoSaveManager(
+            base_dir=key,
+            download_timeout=config.auto_save_download_timeout,
+            max_retries=config.auto_save_max_retries,
+            max_file_size=config.auto_save_max_file_size,
+            max_concurrent=config.auto_save_max_concurrent,
+            connection_limit_per_host=config.auto_save_connection_limit_per_host,
+            dns_cache_ttl=config.auto_save_dns_cache_ttl,
+            write_buffer_size=config.auto_save_write_buffer_size,
+            dedup_enabled=config.auto_save_dedup_enabled,
+            index_enabled=config.auto_save_index_enabled
+        )
+        self._managers[key] = manager
+        logger.debug(f"创建自动保存管理器: {key}")
+        return manager
+    
+    async def close_all(self) -> None:
+        """关闭并移除所有管理器"""
+        managers = list(self._managers.values())
+        self._managers.clear()
+        for manager in managers:
+            try:
+                await manager.close()
+            except Exception as e:
+                logger.warning(f"关闭自动保存管理器失败: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取注册表统计信息
+        
+        Returns:
+            统计信息
+        """
+        return {
+            'managers': len(self._managers),
+            'hits': self._hits,
+            'misses': self._misses
+        }
+
+
+# 全局单例
+_registry: Optional[AutoSaveManagerRegistry] = None
+
+
+def get_auto_save_registry() -> AutoSaveManagerRegistry:
+    """
+    获取自动保存管理器注册表单例
+    
+    Returns:
+        AutoSaveManagerRegistry 实例
+    """
+    global _registry
+    if _registry is None:
+        _registry = AutoSaveManagerRegistry()
+    return _registry
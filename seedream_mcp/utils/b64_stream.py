@@ -0,0 +1,423 @@
+"""
+Seedream 4.0 MCP工具 - Base64 响应流式解析模块
+
+组图生成以 b64_json 格式返回时，响应体包含每张图片的 Base64 字符串，4K 组图可达数百 MB。
+解析器逐块扫描响应体，把 data[].b64_json 字段边解码边写入暂存文件并计算 SHA-256，
+其余字段照常收集后用 json 解析。内存占用只取决于数据块与写入缓冲区大小，与图片数量无关。
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import re
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .async_writer import DEFAULT_WRITE_BUFFER_SIZE, AsyncFileWriter
+
+logger = logging.getLogger(__name__)
+
+# 暂存目录相对于自动保存目录的位置（与最终保存位置在同一文件系统，保存时只需重命名）
+SPOOL_DIR_NAME = ".seedream_spool"
+
+# 结果中代替 b64_json 的暂存文件路径字段
+SPOOL_FIELD = "b64_json_spool"
+
+# data URI 前缀的最大长度
+_MAX_DATA_URI_HEADER = 256
+
+# 字符串中需要特殊处理的字符：结束引号与转义符
+_STRING_SPECIAL = re.compile(rb'["\\]')
+
+
+class B64StreamError(Exception):
+    """Base64 响应流式解析错误"""
+    pass
+
+
+class Base64StreamDecoder:
+    """增量 Base64 解码器
+
+    输入可以在任意位置切分，按 4 个字符对齐后解码，支持 data URI 前缀。
+    """
+
+    def __init__(self):
+        """初始化解码器"""
+        self._header: Optional[bytearray] = bytearray()
+        self._pending = b""
+        self.mime: Optional[str] = None
+        self.length = 0
+
+    def feed(self, data: bytes) -> bytes:
+        """
+        输入一段 Base64 字符
+
+        Args:
+            data: Base64 字符（ASCII 字节）
+
+        Returns:
+            本次可以解码出的字节
+        """
+        if self._header is not None:
+            self._header += data
+            data = self._take_payload()
+            if data is None:
+                return b""
+
+        self.length += len(data)
+        data = self._pending + data
+        aligned = len(data) - len(data) % 4
+        self._pending = data[aligned:]
+        return self._decode(data[:aligned])
+
+    def finish(self) -> bytes:
+        """
+        结束输入，解码剩余字符
+
+        Returns:
+            剩余的字节
+        """
+        if self._header is not None:
+            if self._header.startswith(b"data:"):
+                raise B64StreamError("data URI 缺少数据部分")
+            data, self._header = bytes(self._header), None
+            self.length += len(data)
+            self._pending += data
+        data, self._pending = self._pending, b""
+        if not data:
+            return b""
+        # 缺少的填充字符按标准补齐
+        return self._decode(data + b"=" * (-len(data) % 4))
+
+    def _take_payload(self) -> Optional[bytes]:
+        """识别 data URI 前缀，返回前缀之后的字符；仍无法判断时返回 None"""
+        header = bytes(self._header)
+        if len(header) < 5 and b"data:".startswith(header):
+            return None
+        if header.startswith(b"data:"):
+            comma = header.find(b",")
+            if comma < 0:
+                if len(header) > _MAX_DATA_URI_HEADER:
+                    raise B64StreamError("data URI 前缀过长")
+                return None
+            mime = header[5:comma].split(b";")[0].decode("ascii", "replace")
+            self.mime = mime or None
+            header = header[comma + 1:]
+        self._header = None
+        return header
+
+    @staticmethod
+    def _decode(data: bytes) -> bytes:
+        """解码对齐的 Base64 字符"""
+        try:
+            return base64.b64decode(data, validate=True)
+        except binascii.Error as e:
+            raise B64StreamError(f"Base64解码失败: {e}")
+
+
+class _Frame:
+    """JSON 容器的解析状态"""
+
+    __slots__ = ("is_object", "key", "expect_key", "index")
+
+    def __init__(self, is_object: bool):
+        self.is_object = is_object
+        self.key: Optional[bytes] = None
+        self.expect_key = is_object
+        self.index = 0
+
+
+class _SpoolTarget:
+    """正在写入的暂存文件"""
+
+    def __init__(self, index: int, path: Path, buffer_size: int):
+        self.index = index
+        self.path = path
+        # 哈希在写入线程中随数据写入磁盘时更新
+        self.writer = AsyncFileWriter(path, "wb", buffer_size=buffer_size, hasher=hashlib.sha256())
+        self.decoder = Base64StreamDecoder()
+
+    async def write(self, data: bytes) -> None:
+        """写入解码后的字节"""
+        if data:
+            await self.writer.write(data)
+
+
+class B64JSONResponseParser:
+    """b64_json 响应流式解析器
+
+    用法::
+
+        parser = B64JSONResponseParser(spool_dir)
+        try:
+            async for chunk in response.aiter_bytes():
+                await parser.feed(chunk)
+            result = await parser.finish()
+        except BaseException:
+            await parser.discard()
+            raise
+
+    返回的结果中 data[i].b64_json 由以下字段代替：
+    b64_json_spool（暂存文件路径）、b64_json_length（Base64 字符数）、
+    file_size、sha256 与 content_type（data URI 中的 MIME 类型）。
+    """
+
+    def __init__(self, spool_dir: Path, buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE):
+        """
+        初始化解析器
+
+        Args:
+            spool_dir: 暂存文件目录
+            buffer_size: 暂存文件写入缓冲区大小（字节）
+        """
+        self.spool_dir = Path(spool_dir)
+        self.buffer_size = buffer_size
+        # 除图片数据以外的响应内容，图片字段以 null 占位
+        self._skeleton = bytearray()
+        self._stack: List[_Frame] = []
+        # 当前字符串的类型："key"、"value"、"spool"，不在字符串中时为 None
+        self._string: Optional[str] = None
+        self._key = bytearray()
+        self._escape: Optional[bytearray] = None
+        self._target: Optional[_SpoolTarget] = None
+        self._spooled: Dict[int, Dict[str, Any]] = {}
+        self._files: List[Path] = []
+
+    async def feed(self, chunk: bytes) -> None:
+        """
+        输入一段响应体
+
+        Args:
+            chunk: 响应体数据块
+        """
+        pos = 0
+        end = len(chunk)
+        while pos < end:
+            if self._string is not None:
+                pos = await self._scan_string(chunk, pos)
+                continue
+
+            byte = chunk[pos:pos + 1]
+            pos += 1
+            if byte == b'"':
+                await self._start_string()
+                continue
+
+            self._skeleton += byte
+            frame = self._stack[-1] if self._stack else None
+            if byte == b"{" or byte == b"[":
+                self._stack.append(_Frame(byte == b"{"))
+            elif byte == b"}" or byte == b"]":
+                if frame is None:
+                    raise B64StreamError("响应体不是有效的JSON")
+                self._stack.pop()
+            elif frame is not None and byte == b":":
+                frame.expect_key = False
+            elif frame is not None and byte == b",":
+                if frame.is_object:
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+
+    async def finish(self) -> Dict[str, Any]:
+        """
+        结束输入并解析响应
+
+        Returns:
+            响应字典，图片数据已写入暂存文件
+
+        Raises:
+            B64StreamError: 响应体不完整或不是有效的JSON
+        """
+        if self._string is not None or self._stack:
+            raise B64StreamError("响应体不完整")
+        try:
+            result = json.loads(bytes(self._skeleton))
+        except ValueError as e:
+            raise B64StreamError(f"响应体不是有效的JSON: {e}")
+
+        data = result.get("data") if isinstance(result, dict) else None
+        for index, info in self._spooled.items():
+            item = data[index]
+            item.pop("b64_json", None)
+            item.update(info)
+        logger.debug(f"流式解析响应完成: {len(self._spooled)} 张图片写入暂存文件")
+        return result
+
+    async def discard(self) -> None:
+        """关闭并删除已写入的暂存文件（解析失败或重试前调用）"""
+        target, self._target = self._target, None
+        if target is not None:
+            try:
+                await target.writer.close()
+            except OSError:
+                pass
+        for path in self._files:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"删除暂存文件失败: {path} -> {e}")
+        self._files.clear()
+
+    def _b64_field_index(self) -> Optional[int]:
+        """当前位置是 data[i].b64_json 的值时返回 i"""
+        if len(self._stack) != 3:
+            return None
+        root, items, item = self._stack
+        if (root.is_object and root.key == b"data" and not items.is_object
+                and item.is_object and item.key == b"b64_json" and not item.expect_key):
+            return items.index
+        return None
+
+    async def _start_string(self) -> None:
+        """遇到字符串起始引号"""
+        frame = self._stack[-1] if self._stack else None
+        if frame is not None and frame.is_object and frame.expect_key:
+            self._string = "key"
+            self._key.clear()
+            self._skeleton += b'"'
+            return
+
+        index = self._b64_field_index()
+        if index is None:
+            self._string = "value"
+            self._skeleton += b'"'
+            return
+
+        self._string = "spool"
+        self._skeleton += b"null"
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spool_dir / f"{uuid.uuid4().hex}.bin"
+        self._target = _SpoolTarget(index, path, self.buffer_size)
+        self._files.append(path)
+        await self._target.writer.open()
+
+    async def _scan_string(self, chunk: bytes, pos: int) -> int:
+        """扫描字符串内容，返回下一个未处理的位置"""
+        if self._escape is not None:
+            return await self._scan_escape(chunk, pos)
+
+        if self._string == "spool":
+            # Base64 中只会出现 \/ 转义（部分服务端转义斜杠），整段替换后写入，
+            # 其他转义序列按下面的通用方式逐个处理
+            quote = chunk.find(b'"', pos)
+            end = quote if quote >= 0 else len(chunk)
+            segment = chunk[pos:end]
+            # 数据块末尾被切开的转义序列留到下一个数据块
+            split_escape = quote < 0 and segment.endswith(b"\\")
+            if split_escape:
+                segment = segment[:-1]
+            if b"\\" in segment:
+                segment = segment.replace(b"\\/", b"/")
+            if b"\\" not in segment:
+                if segment:
+                    await self._string_data(segment)
+                if split_escape:
+                    self._escape = bytearray(b"\\")
+                if quote < 0:
+                    return end
+                await self._end_string()
+                return end + 1
+
+        match = _STRING_SPECIAL.search(chunk, pos)
+        end = match.start() if match else len(chunk)
+        if end > pos:
+            await self._string_data(chunk[pos:end])
+        if match is None:
+            return end
+        if chunk[end:end + 1] == b'"':
+            await self._end_string()
+        else:
+            self._escape = bytearray(b"\\")
+        return end + 1
+
+    async def _scan_escape(self, chunk: bytes, pos: int) -> int:
+        """收集转义序列（可能跨越数据块）"""
+        escape = self._escape
+        while pos < len(chunk):
+            escape += chunk[pos:pos + 1]
+            pos += 1
+            needed = 6 if escape[1:2] == b"u" else 2
+            if len(escape) < needed:
+                continue
+            self._escape = None
+            if self._string == "spool":
+                # Base64 字符可能被转义（如 \/），空白字符直接忽略
+                try:
+                    char = json.loads(b'"' + bytes(escape) + b'"')
+                except ValueError:
+                    raise B64StreamError(f"无效的转义序列: {bytes(escape)!r}")
+                if not char.isspace():
+                    await self._string_data(char.encode("ascii", "replace"))
+            else:
+                await self._string_data(bytes(escape))
+            break
+        return pos
+
+    async def _string_data(self, data: bytes) -> None:
+        """处理字符串内容"""
+        if self._string == "spool":
+            await self._target.write(self._target.decoder.feed(data))
+            return
+        if self._string == "key":
+            self._key += data
+        self._skeleton += data
+
+    async def _end_string(self) -> None:
+        """遇到字符串结束引号"""
+        kind, self._string = self._string, None
+        if kind == "key":
+            self._stack[-1].key = bytes(self._key)
+            self._skeleton += b'"'
+        elif kind == "value":
+            self._skeleton += b'"'
+        else:
+            await self._finish_target()
+
+    async def _finish_target(self) -> None:
+        """写入剩余数据并记录暂存文件信息"""
+        target = self._target
+        await target.write(target.decoder.finish())
+        await target.writer.close()
+        self._target = None
+        if target.writer.flushed == 0:
+            raise B64StreamError("空的Base64数据")
+        self._spooled[target.index] = {
+            SPOOL_FIELD: str(target.path),
+            "b64_json_length": target.decoder.length,
+            "file_size": target.writer.flushed,
+            "sha256": target.writer.hasher.hexdigest(),
+            "content_type": target.decoder.mime or "",
+        }
+
+
+def release_spooled(result: Dict[str, Any]) -> int:
+    """
+    移除结果中的暂存文件字段，并删除未被保存移走的暂存文件
+
+    自动保存成功时暂存文件已重命名到最终位置，保存失败或跳过保存时在这里清理。
+
+    Args:
+        result: 流式解析得到的 API 结果
+
+    Returns:
+        删除的暂存文件数量
+    """
+    removed = 0
+    for item in result.get("data") or []:
+        if not isinstance(item, dict) or SPOOL_FIELD not in item:
+            continue
+        path = Path(item.pop(SPOOL_FIELD))
+        try:
+            path.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"删除暂存文件失败: {path} -> {e}")
+    return removed
@@ -0,0 +1,154 @@
+"""
+Seedream 4.0 MCP工具 - 熔断器模块
+
+生成接口连续失败达到阈值后熔断，熔断期间请求立即失败而不再等待超时与重试；
+冷却时间结束后进入半开状态，只放行一个探测请求，成功则恢复，失败则重新熔断。
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from .errors import SeedreamCircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# 熔断器状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """熔断器
+
+    调用方在每次请求前调用 allow()，请求结束后根据结果调用 record_success()、
+    record_failure() 或 record_ignored()（如限流响应，既不代表故障也不代表恢复）。
+    failure_threshold 为 0 时不熔断。
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 触发熔断的连续失败次数
+            reset_timeout: 熔断后进入半开状态前的冷却时间（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._opened_count = 0
+        self._rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用熔断"""
+        return self.failure_threshold > 0
+
+    @property
+    def state(self) -> str:
+        """当前状态，冷却时间结束的熔断状态视为半开"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def allow(self) -> None:
+        """
+        检查是否允许发起请求
+
+        Raises:
+            SeedreamCircuitOpenError: 熔断中，或半开状态下已有探测请求在进行
+        """
+        if not self.enabled:
+            return
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._state = HALF_OPEN
+            self._probe_in_flight = True
+            logger.info("熔断器半开，发送探测请求")
+            return
+
+        self._rejected += 1
+        retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise SeedreamCircuitOpenError(
+            f"生成接口连续失败 {self._consecutive_failures} 次，已暂时熔断，请约 {retry_in:.0f} 秒后重试",
+            retry_after=retry_in
+        )
+
+    def record_success(self) -> None:
+        """记录成功（包括参数错误等说明服务可用的响应）"""
+        if self._state != CLOSED:
+            logger.info("探测请求成功，熔断器恢复")
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """记录失败（服务端错误、超时、网络错误）"""
+        self._consecutive_failures += 1
+        self._probe_in_flight = False
+        if not self.enabled:
+            return
+        if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != OPEN:
+                self._opened_count += 1
+                logger.warning(
+                    f"生成接口连续失败 {self._consecutive_failures} 次，熔断 {self.reset_timeout} 秒"
+                )
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+
+    def record_ignored(self) -> None:
+        """记录不影响熔断状态的结果，释放探测名额"""
+        self._probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取熔断器统计信息
+
+        Returns:
+            统计信息
+        """
+        return {
+            "enabled": self.enabled,
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "opened_count": self._opened_count,
+            "rejected": self._rejected,
+        }
+
+
+# 全局单例
+_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def get_circuit_breaker(
+    failure_threshold: Optional[int] = None,
+    reset_timeout: Optional[float] = None
+) -> CircuitBreaker:
+    """
+    获取进程级熔断器单例
+
+    Args:
+        failure_threshold: 触发熔断的连续失败次数，提供时更新现有熔断器
+        reset_timeout: 熔断冷却时间（秒），提供时更新现有熔断器
+
+    Returns:
+        CircuitBreaker 实例
+    """
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker()
+    if failure_threshold is not None:
+        _circuit_breaker.failure_threshold = failure_threshold
+    if reset_timeout is not None:
+        _circuit_breaker.reset_timeout = reset_timeout
+    return _circuit_breaker
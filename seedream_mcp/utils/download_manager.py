@@ -5,17 +5,105 @@
 
 import asyncio
 import aiohttp
+import hashlib
 import logging
+import os
+import re
 from typing import Optional, Dict, Any
 from pathlib import Path
 import time
 
+from .async_writer import DEFAULT_WRITE_BUFFER_SIZE, AsyncFileWriter, run_in_thread
+from .retry import (
+    CLIENT_ERROR,
+    FATAL,
+    NETWORK_ERROR,
+    TIMEOUT,
+    RetryDecision,
+    RetryPolicy,
+    classify_status,
+    parse_retry_after,
+)
+
 logger = logging.getLogger(__name__)
 
+# 下载中的临时文件后缀，下载完成后原子重命名为目标文件，
+# 浏览图片和清理旧文件不会把不完整的文件当作图片
+PART_SUFFIX = ".part"
+
+# 每次从响应中读取的数据块大小（字节）
+READ_CHUNK_SIZE = 64 * 1024
+
+_CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
 
 class DownloadError(Exception):
     """下载错误异常"""
-    pass
+    
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        retryable: bool = True
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+def _classify_download_error(error: Exception) -> RetryDecision:
+    """对下载异常分类"""
+    if isinstance(error, asyncio.TimeoutError):
+        return RetryDecision(TIMEOUT)
+    if isinstance(error, aiohttp.ClientError):
+        return RetryDecision(NETWORK_ERROR)
+    if isinstance(error, DownloadError):
+        if error.status_code is not None:
+            return RetryDecision(classify_status(error.status_code), error.retry_after)
+        return RetryDecision(NETWORK_ERROR if error.retryable else CLIENT_ERROR)
+    if isinstance(error, OSError):
+        return RetryDecision(NETWORK_ERROR)
+    return RetryDecision(FATAL)
+
+
+def _content_range_start(value: Optional[str]) -> Optional[int]:
+    """解析 Content-Range 响应头，返回起始字节位置"""
+    match = _CONTENT_RANGE_PATTERN.match(value or "")
+    return int(match.group(1)) if match else None
+
+
+def _range_validator(response_headers) -> Optional[str]:
+    """
+    获取续传时用于 If-Range 的校验值
+    
+    弱 ETag 不能用于 If-Range，此时退回到 Last-Modified。
+    """
+    etag = response_headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response_headers.get('last-modified')
+
+
+def get_file_extension_from_url(url: str) -> str:
+    """
+    从URL获取文件扩展名
+    
+    Args:
+        url: 图片URL
+        
+    Returns:
+        文件扩展名（包含点号）
+    """
+    try:
+        from urllib.parse import urlparse
+        path = urlparse(url).path
+        if '.' in path:
+            return Path(path).suffix.lower()
+        return '.jpg'  # 默认扩展名
+    except Exception:
+        return '.jpg'
 
 
 class DownloadManager:
@@ -26,7 +114,12 @@ class DownloadManager:
         timeout: int = 30,
         max_retries: int = 3,
         retry_delay: float = 1.0,
-        max_file_size: int = 50 * 1024 * 1024  # 50MB
+        max_file_size: int = 50 * 1024 * 1024,  # 50MB
+        connection_limit: int = 20,
+        limit_per_host: int = 5,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30.0,
+        write_buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE
     ):
         """
         初始化下载管理器
@@ -34,19 +127,88 @@ class DownloadManager:
         Args:
             timeout: 下载超时时间（秒）
             max_retries: 最大重试次数
-            retry_delay: 重试延迟时间（秒）
+            retry_delay: 最小重试退避时间（秒）
             max_file_size: 最大文件大小（字节）
+            connection_limit: 连接池总连接数上限
+            limit_per_host: 单个主机的连接数上限
+            dns_cache_ttl: DNS缓存时间（秒）
+            keepalive_timeout: 空闲连接保活时间（秒）
+            write_buffer_size: 写入磁盘前合并数据块的缓冲区大小（字节）
         """
         self.timeout = timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.max_file_size = max_file_size
+        self.connection_limit = connection_limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.write_buffer_size = write_buffer_size
+        
+        # 与 API 调用共用的重试策略：仅重试限流、服务端错误和网络类错误
+        self.retry_policy = RetryPolicy(
+            max_attempts=max_retries + 1,
+            base_delay=retry_delay,
+            max_delay=max(retry_delay * 10, retry_delay)
+        )
+        
+        # 长生命周期会话，所有下载共享同一个连接池
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def __aenter__(self):
+        """异步上下文管理器入口"""
+        await self._get_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """异步上下文管理器出口"""
+        await self.close()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        获取共享的下载会话，不存在时创建
+        
+        会话绑定在创建它的事件循环上，事件循环变化时重新创建。
+        
+        Returns:
+            aiohttp.ClientSession 实例
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._session_loop is loop:
+            return self._session
+        
+        connector = aiohttp.TCPConnector(
+            limit=self.connection_limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        self._session_loop = loop
+        logger.debug(
+            f"创建下载会话: limit={self.connection_limit}, "
+            f"limit_per_host={self.limit_per_host}, dns_cache_ttl={self.dns_cache_ttl}"
+        )
+        return self._session
+    
+    async def close(self) -> None:
+        """关闭下载会话，释放所有连接"""
+        session = self._session
+        self._session = None
+        if session is not None and not session.closed and self._session_loop is asyncio.get_running_loop():
+            await session.close()
+        self._session_loop = None
         
     async def download_image(
         self,
         url: str,
         save_path: Path,
-        headers: Optional[Dict[str, str]] = None
+        headers: Optional[Dict[str, str]] = None,
+        keep_content: bool = False
     ) -> Dict[str, Any]:
         """
         异步下载图片
@@ -55,6 +217,8 @@ class DownloadManager:
             url: 图片URL
             save_path: 保存路径
             headers: 请求头
+            keep_content: 是否在写入磁盘的同时保留图片字节（结果中的 content 字段），
+                供后续直接从内存上传，避免重新读取文件
             
         Returns:
             下载结果信息
@@ -69,79 +233,141 @@ class DownloadManager:
             }
             
         start_time = time.time()
-        last_error = None
         
-        for attempt in range(self.max_retries + 1):
-            try:
-                logger.info(f"开始下载图片 (尝试 {attempt + 1}/{self.max_retries + 1}): {url}")
+        # 先写入临时文件，完成后再重命名为目标文件
+        part_path = save_path.with_name(save_path.name + PART_SUFFIX)
+        # 跨重试保留的续传状态：已写入临时文件的字节数、服务器是否支持 Range、资源校验值，
+        # 以及已写入部分的 SHA-256（随数据写入磁盘增量计算，续传时继续累加）
+        state: Dict[str, Any] = {
+            "received": 0, "resumable": False, "validator": None, "hasher": hashlib.sha256()
+        }
+        content = bytearray() if keep_content else None
+        
+        def restart() -> None:
+            """放弃已下载的部分，下次从头下载"""
+            state["received"] = 0
+            state["hasher"] = hashlib.sha256()
+            if content is not None:
+                content.clear()
+        
+        async def attempt_once(attempt: int) -> Dict[str, Any]:
+            logger.info(f"开始下载图片 (尝试 {attempt}/{self.max_retries + 1}): {url}")
+            
+            # 上次尝试中断且服务器支持 Range 时，只请求缺失的字节
+            resume_from = state["received"] if state["resumable"] and part_path.exists() else 0
+            request_headers = dict(headers)
+            if resume_from:
+                request_headers['Range'] = f"bytes={resume_from}-"
+                # 资源已变化时服务器返回完整内容，而不是拼接到旧内容之后
+                request_headers['If-Range'] = state["validator"]
+            
+            session = await self._get_session()
+            async with session.get(url, headers=request_headers) as response:
+                # 检查响应状态
+                if resume_from and response.status == 206:
+                    if _content_range_start(response.headers.get('content-range')) != resume_from:
+                        restart()
+                        raise DownloadError("续传响应的字节范围不匹配，将重新下载")
+                    logger.info(f"从第 {resume_from} 字节继续下载: {url}")
+                elif resume_from and response.status == 416:
+                    restart()
+                    raise DownloadError("服务器拒绝续传范围，将重新下载")
+                elif response.status != 200:
+                    raise DownloadError(
+                        f"HTTP错误: {response.status}",
+                        status_code=response.status,
+                        retry_after=parse_retry_after(response.headers.get('retry-after'))
+                    )
+                else:
+                    # 完整响应（包括服务器忽略 Range 的情况），从头写入
+                    resume_from = 0
+                    restart()
+                    state["validator"] = _range_validator(response.headers)
+                # 没有强 ETag 或 Last-Modified 时无法确认资源未变化，不续传而是重新下载
+                state["resumable"] = state["validator"] is not None and (
+                    response.status == 206
+                    or response.headers.get('accept-ranges', '').lower() == 'bytes'
+                )
                 
-                async with aiohttp.ClientSession(
-                    timeout=aiohttp.ClientTimeout(total=self.timeout)
-                ) as session:
-                    async with session.get(url, headers=headers) as response:
-                        # 检查响应状态
-                        if response.status != 200:
-                            raise DownloadError(f"HTTP错误: {response.status}")
-                        
-                        # 检查内容类型
-                        content_type = response.headers.get('content-type', '')
-                        if not content_type.startswith('image/'):
-                            logger.warning(f"内容类型可能不是图片: {content_type}")
-                        
-                        # 检查文件大小
-                        content_length = response.headers.get('content-length')
-                        if content_length and int(content_length) > self.max_file_size:
-                            raise DownloadError(f"文件过大: {content_length} 字节")
-                        
-                        # 确保目录存在
-                        save_path.parent.mkdir(parents=True, exist_ok=True)
-                        
-                        # 下载并保存文件
-                        total_size = 0
-                        with open(save_path, 'wb') as f:
-                            async for chunk in response.content.iter_chunked(8192):
-                                total_size += len(chunk)
-                                if total_size > self.max_file_size:
-                                    raise DownloadError(f"文件过大: {total_size} 字节")
-                                f.write(chunk)
-                        
-                        download_time = time.time() - start_time
-                        
-                        result = {
-                            'success': True,
-                            'file_path': str(save_path),
-                            'file_size': total_size,
-                            'download_time': download_time,
-                            'content_type': content_type,
-                            'attempts': attempt + 1
-                        }
-                        
-                        logger.info(f"图片下载成功: {save_path} ({total_size} 字节, {download_time:.2f}秒)")
-                        return result
-                        
-            except asyncio.TimeoutError as e:
-                last_error = DownloadError(f"下载超时: {e}")
-                logger.warning(f"下载超时 (尝试 {attempt + 1}): {url}")
+                # 检查内容类型
+                content_type = response.headers.get('content-type', '')
+                if not content_type.startswith('image/'):
+                    logger.warning(f"内容类型可能不是图片: {content_type}")
                 
-            except aiohttp.ClientError as e:
-                last_error = DownloadError(f"网络错误: {e}")
-                logger.warning(f"网络错误 (尝试 {attempt + 1}): {e}")
+                # 检查文件大小
+                content_length = response.headers.get('content-length')
+                if content_length and resume_from + int(content_length) > self.max_file_size:
+                    raise DownloadError(f"文件过大: {resume_from + int(content_length)} 字节", retryable=False)
                 
-            except OSError as e:
-                last_error = DownloadError(f"文件系统错误: {e}")
-                logger.warning(f"文件系统错误 (尝试 {attempt + 1}): {e}")
+                # 确保目录存在
+                save_path.parent.mkdir(parents=True, exist_ok=True)
                 
-            except Exception as e:
-                last_error = DownloadError(f"未知错误: {e}")
-                logger.warning(f"下载失败 (尝试 {attempt + 1}): {e}")
-            
-            # 如果不是最后一次尝试，等待后重试
-            if attempt < self.max_retries:
-                await asyncio.sleep(self.retry_delay * (attempt + 1))
+                # 下载并写入临时文件，续传时追加到已下载的部分之后；
+                # 磁盘写入合并成大块在线程中执行，不阻塞事件循环
+                writer = AsyncFileWriter(
+                    part_path, 'ab' if resume_from else 'wb',
+                    buffer_size=self.write_buffer_size, hasher=state["hasher"]
+                )
+                try:
+                    async with writer:
+                        async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+                            if resume_from + writer.size + len(chunk) > self.max_file_size:
+                                raise DownloadError(
+                                    f"文件过大: {resume_from + writer.size + len(chunk)} 字节", retryable=False
+                                )
+                            await writer.write(chunk)
+                            if content is not None:
+                                content.extend(chunk)
+                finally:
+                    # 续传位置只计入实际写入磁盘的字节
+                    state["received"] = resume_from + writer.flushed
+                    if content is not None:
+                        del content[state["received"]:]
+                
+                # 下载完整后原子替换为目标文件（在线程中执行，不阻塞事件循环）
+                await run_in_thread(os.replace, part_path, save_path)
+                total_size = state["received"]
+                download_time = time.time() - start_time
+                
+                result = {
+                    'success': True,
+                    'file_path': str(save_path),
+                    'file_size': total_size,
+                    'download_time': download_time,
+                    'content_type': content_type,
+                    'attempts': attempt,
+                    'resumed_bytes': resume_from,
+                    'sha256': state["hasher"].hexdigest()
+                }
+                if content is not None:
+                    result['content'] = bytes(content)
+                
+                logger.info(f"图片下载成功: {save_path} ({total_size} 字节, {download_time:.2f}秒)")
+                return result
         
-        # 所有重试都失败了
-        logger.error(f"图片下载失败，已重试 {self.max_retries} 次: {url}")
-        raise last_error or DownloadError("下载失败")
+        try:
+            return await self.retry_policy.run(attempt_once, _classify_download_error, f"下载图片 {url}")
+        except DownloadError:
+            logger.error(f"图片下载失败: {url}")
+            raise
+        except asyncio.TimeoutError as e:
+            logger.error(f"图片下载失败: {url}")
+            raise DownloadError(f"下载超时: {e}")
+        except aiohttp.ClientError as e:
+            logger.error(f"图片下载失败: {url}")
+            raise DownloadError(f"网络错误: {e}")
+        except OSError as e:
+            logger.error(f"图片下载失败: {url}")
+            raise DownloadError(f"文件系统错误: {e}")
+        except Exception as e:
+            logger.error(f"图片下载失败: {url}")
+            raise DownloadError(f"未知错误: {e}")
+        finally:
+            # 成功时临时文件已被重命名；失败或被取消时删除不完整的临时文件
+            try:
+                part_path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"删除临时文件失败: {part_path} -> {e}")
     
     async def download_multiple_images(
         self,
@@ -225,11 +451,4 @@ class DownloadManager:
         Returns:
             文件扩展名（包含点号）
         """
-        try:
-            from urllib.parse import urlparse
-            path = urlparse(url).path
-            if '.' in path:
-                return Path(path).suffix.lower()
-            return '.jpg'  # 默认扩展名
-        except Exception:
-            return '.jpg'
\ No newline at end of file
+        return get_file_extension_from_url(url)
\ No newline at end of file
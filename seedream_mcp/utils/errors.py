@@ -34,10 +34,18 @@ class SeedreamConfigError(SeedreamMCPError):
 class SeedreamAPIError(SeedreamMCPError):
     """API调用相关错误"""
     
-    def __init__(self, message: str, status_code: Optional[int] = None, response_data: Optional[Dict[str, Any]] = None):
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        response_data: Optional[Dict[str, Any]] = None,
+        retry_after: Optional[float] = None
+    ):
         super().__init__(message)
         self.status_code = status_code
         self.response_data = response_data or {}
+        # 服务端通过 Retry-After 要求的等待时间（秒）
+        self.retry_after = retry_after
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -49,6 +57,13 @@ class SeedreamAPIError(SeedreamMCPError):
         return result
 
 
+class SeedreamCircuitOpenError(SeedreamAPIError):
+    """生成接口熔断中，请求被立即拒绝"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message, retry_after=retry_after)
+
+
 class SeedreamValidationError(SeedreamMCPError):
     """参数验证错误"""
     
@@ -132,6 +147,8 @@ def format_error_for_user(error: Exception) -> str:
     """
     if isinstance(error, SeedreamConfigError):
         return f"配置错误: {error.message}"
+    elif isinstance(error, SeedreamCircuitOpenError):
+        return f"服务暂时不可用: {error.message}"
     elif isinstance(error, SeedreamAPIError):
         if error.status_code == 401:
             return f"认证失败: {error.message}\n请检查您的API密钥是否正确设置。"
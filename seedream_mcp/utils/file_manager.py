@@ -9,7 +9,9 @@ import os
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set
+
+from .async_writer import DEFAULT_WRITE_BUFFER_SIZE, write_file_async
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,57 @@ class FileManagerError(Exception):
     pass
 
 
+def _is_unsafe_path(path: Path) -> bool:
+    """
+    检查路径是否不安全
+    
+    Args:
+        path: 要检查的路径
+        
+    Returns:
+        路径是否不安全
+    """
+    try:
+        # 检查是否包含危险的路径遍历
+        path_str = str(path)
+        if '..' in path.parts or path_str.startswith('\\\\') or ':' in path.name:
+            return True
+        
+        # 检查路径长度
+        if len(str(path)) > 260:  # Windows路径长度限制
+            return True
+        
+        return False
+    except Exception:
+        return True
+
+
+def resolve_base_dir(base_dir: Optional[Path] = None) -> Path:
+    """
+    解析基础保存目录
+    
+    Args:
+        base_dir: 用户提供的基础目录，为None时使用当前工作目录下的images文件夹
+        
+    Returns:
+        解析后的绝对路径，路径不安全或无效时回退到默认路径
+    """
+    if base_dir is None:
+        return Path.cwd() / "images"
+    
+    # 验证用户提供的路径
+    try:
+        resolved = Path(base_dir).resolve()
+        # 基本安全检查
+        if _is_unsafe_path(resolved):
+            logger.warning(f"提供的保存路径不安全: {resolved}，使用默认路径")
+            return Path.cwd() / "images"
+        return resolved
+    except (OSError, ValueError) as e:
+        logger.warning(f"解析保存路径时出错: {e}，使用默认路径")
+        return Path.cwd() / "images"
+
+
 class FileManager:
     """文件管理器"""
     
@@ -29,39 +82,37 @@ class FileManager:
         Args:
             base_dir: 基础目录,默认为当前工作目录下的images文件夹
         """
-        if base_dir is None:
-            base_dir = Path.cwd() / "images"
-        else:
-            # 验证用户提供的路径
-            try:
-                base_dir = Path(base_dir).resolve()
-                # 基本安全检查
-                if self._is_unsafe_path(base_dir):
-                    logger.warning(f"提供的保存路径不安全: {base_dir}，使用默认路径")
-                    base_dir = Path.cwd() / "images"
-            except (OSError, ValueError) as e:
-                logger.warning(f"解析保存路径时出错: {e}，使用默认路径")
-                base_dir = Path.cwd() / "images"
-        
-        self.base_dir = base_dir
+        self.base_dir = resolve_base_dir(base_dir)
+        
+        # 已确认存在的目录缓存，避免重复 mkdir 系统调用
+        self._known_dirs: Set[Path] = set()
         self.ensure_directory(self.base_dir)
     
     def ensure_directory(self, path: Path) -> None:
         """
         确保目录存在
         
+        已确认存在的目录会被缓存，后续调用直接返回。
+        
         Args:
             path: 目录路径
             
         Raises:
             FileManagerError: 创建目录失败时抛出
         """
+        if path in self._known_dirs:
+            return
         try:
             path.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(path)
             logger.debug(f"确保目录存在: {path}")
         except OSError as e:
             raise FileManagerError(f"创建目录失败: {path} -> {e}")
     
+    def invalidate_directory_cache(self) -> None:
+        """清空目录存在性缓存（目录可能已被删除时调用）"""
+        self._known_dirs.clear()
+    
     def _is_unsafe_path(self, path: Path) -> bool:
         """
         检查路径是否不安全
@@ -72,19 +123,7 @@ class FileManager:
         Returns:
             路径是否不安全
         """
-        try:
-            # 检查是否包含危险的路径遍历
-            path_str = str(path)
-            if '..' in path.parts or path_str.startswith('\\\\') or ':' in path.name:
-                return True
-            
-            # 检查路径长度
-            if len(str(path)) > 260:  # Windows路径长度限制
-                return True
-            
-            return False
-        except Exception:
-            return True
+        return _is_unsafe_path(path)
 
     def validate_path(self, path: Path) -> bool:
         """
@@ -319,9 +358,8 @@ class FileManager:
             base_name = self.generate_name_from_prompt(prompt)
         
         # 获取文件扩展名
-        from .download_manager import DownloadManager
-        dm = DownloadManager()
-        extension = dm.get_file_extension_from_url(url)
+        from .download_manager import get_file_extension_from_url
+        extension = get_file_extension_from_url(url)
         
         # 生成唯一文件名
         filename = self.generate_unique_filename(base_name, extension)
@@ -384,7 +422,13 @@ class FileManager:
             content_hash=content_hash
         )
 
-    def save_bytes(self, file_path: Path, data: bytes, overwrite: bool = False) -> Dict[str, Any]:
+    def save_bytes(
+        self,
+        file_path: Path,
+        data: bytes,
+        overwrite: bool = False,
+        content_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         将字节数据写入文件
         
@@ -392,24 +436,61 @@ class FileManager:
             file_path: 目标路径
             data: 字节数据
             overwrite: 是否覆盖已有文件
+            content_hash: 已计算的内容哈希，文件名冲突时直接使用，不再重新计算
         
         Returns:
             保存结果元数据
         """
         try:
-            # 目录保证存在
-            self.ensure_directory(file_path.parent)
-            # 如果文件存在并且不允许覆盖，生成新的唯一文件名
-            final_path = file_path
-            if final_path.exists() and not overwrite:
-                base = final_path.stem
-                ext = final_path.suffix
-                # 添加一个短哈希避免冲突
-                short_hash = self.get_content_hash(data)[:8]
-                final_path = final_path.with_name(f"{base}_{short_hash}{ext}")
+            final_path = self._prepare_write_path(file_path, data, overwrite, content_hash)
             # 写入数据
-            with open(final_path, 'wb') as f:
-                f.write(data)
+            try:
+                with open(final_path, 'wb') as f:
+                    f.write(data)
+            except FileNotFoundError:
+                # 缓存的目录可能已被外部删除，重建后重试
+                self.invalidate_directory_cache()
+                self.ensure_directory(final_path.parent)
+                with open(final_path, 'wb') as f:
+                    f.write(data)
+            return {
+                'file_path': str(final_path),
+                'file_size': len(data),
+                'save_time': datetime.now().isoformat()
+            }
+        except OSError as e:
+            raise FileManagerError(f"写入文件失败: {file_path} -> {e}")
+    
+    async def save_bytes_async(
+        self,
+        file_path: Path,
+        data: bytes,
+        overwrite: bool = False,
+        buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE,
+        content_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        将字节数据写入文件，写入在线程中执行，不阻塞事件循环
+        
+        Args:
+            file_path: 目标路径
+            data: 字节数据
+            overwrite: 是否覆盖已有文件
+            buffer_size: 写入缓冲区大小（字节）
+            content_hash: 已计算的内容哈希，文件名冲突时直接使用，不再重新计算
+        
+        Returns:
+            保存结果元数据
+        """
+        try:
+            final_path = self._prepare_write_path(file_path, data, overwrite, content_hash)
+            try:
+                await write_file_async(final_path, data, buffer_size)
+            except FileNotFoundError:
+                # 缓存的目录可能已被外部删除，重建后重试
+                self.invalidate_directory_cache()
+                self.ensure_directory(final_path.parent)
+                await write_file_async(final_path, data, buffer_size)
             return {
                 'file_path': str(final_path),
                 'file_size': len(data),
@@ -418,6 +499,37 @@ class FileManager:
         except OSError as e:
             raise FileManagerError(f"写入文件失败: {file_path} -> {e}")
     
+    def _prepare_write_path(
+        self,
+        file_path: Path,
+        data: bytes,
+        overwrite: bool,
+        content_hash: Optional[str] = None
+    ) -> Path:
+        """
+        确保目录存在并确定实际写入路径
+        
+        Args:
+            file_path: 目标路径
+            data: 字节数据
+            overwrite: 是否覆盖已有文件
+            content_hash: 已计算的内容哈希
+        
+        Returns:
+            实际写入路径
+        """
+        # 目录保证存在
+        self.ensure_directory(file_path.parent)
+        # 如果文件存在并且不允许覆盖，生成新的唯一文件名
+        final_path = file_path
+        if final_path.exists() and not overwrite:
+            base = final_path.stem
+            ext = final_path.suffix
+            # 添加一个短哈希避免冲突
+            short_hash = (content_hash or self.get_content_hash(data))[:8]
+            final_path = final_path.with_name(f"{base}_{short_hash}{ext}")
+        return final_path
+    
     def get_relative_path(self, file_path: Path) -> str:
         """
         获取相对于基础目录的路径
@@ -489,6 +601,9 @@ class FileManager:
         
         try:
             for file_path in self.base_dir.rglob("*"):
+                # 跳过隐藏目录中的内部数据（如生成结果缓存数据库）
+                if any(part.startswith('.') for part in file_path.relative_to(self.base_dir).parts[:-1]):
+                    continue
                 if file_path.is_file():
                     try:
                         # 检查文件修改时间
@@ -516,6 +631,9 @@ class FileManager:
         except Exception as e:
             errors.append(f"清理过程出错: {e}")
             logger.error(f"清理过程出错: {e}")
+        finally:
+            # 清理可能删除了目录，缓存失效
+            self.invalidate_directory_cache()
         
         return {
             'deleted_files': len(deleted_files),
@@ -0,0 +1,161 @@
+"""
+Seedream 4.0 MCP工具 - 对冲请求模块
+
+生成耗时存在长尾：请求在历史耗时的指定分位数内仍未完成时，再发出一个相同的请求，
+取先完成的结果并取消另一个，以少量额外调用换取有界的尾部延迟。
+对冲调用占比受预算限制，避免在整体变慢时成倍增加调用量。
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 计算分位数所需的最少样本数，样本不足时不对冲
+MIN_SAMPLES = 20
+
+# 保留的最近耗时样本数
+LATENCY_WINDOW = 200
+
+
+class Hedger:
+    """对冲请求执行器"""
+
+    def __init__(self, percentile: float = 0.95, max_ratio: float = 0.1):
+        """
+        初始化对冲请求执行器
+
+        Args:
+            percentile: 触发对冲的耗时分位数（0-1）
+            max_ratio: 对冲调用占全部调用的比例上限
+        """
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._calls = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    def record(self, latency: float) -> None:
+        """
+        记录一次成功请求的耗时
+
+        Args:
+            latency: 耗时（秒）
+        """
+        self._latencies.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        计算触发对冲的等待时间
+
+        Returns:
+            历史耗时的分位数，样本不足时返回 None
+        """
+        if len(self._latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return ordered[index]
+
+    def _within_budget(self) -> bool:
+        """对冲调用占比是否仍在预算内"""
+        return self._hedged + 1 <= self.max_ratio * self._calls
+
+    async def run(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行调用，超过分位数耗时仍未完成时发出对冲请求
+
+        Args:
+            func: 发起请求的协程函数，可被多次调用
+
+        Returns:
+            先成功完成的请求结果
+
+        Raises:
+            所有请求都失败时抛出主请求的异常
+        """
+        self._calls += 1
+
+        async def timed() -> Any:
+            start = time.monotonic()
+            result = await func()
+            self.record(time.monotonic() - start)
+            return result
+
+        delay = self.hedge_delay()
+        if delay is None:
+            return await timed()
+
+        primary = asyncio.ensure_future(timed())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._within_budget():
+                return await primary
+
+            self._hedged += 1
+            logger.info(f"请求超过 {delay:.2f}秒 仍未完成，发出对冲请求")
+            tasks.append(asyncio.ensure_future(timed()))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        if task is not primary:
+                            self._hedge_wins += 1
+                        return task.result()
+            # 两个请求都失败，抛出主请求的异常
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            # 等待被取消的请求结束，释放其持有的连接、限流名额等资源
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取对冲统计信息
+
+        Returns:
+            统计信息
+        """
+        delay = self.hedge_delay()
+        return {
+            "calls": self._calls,
+            "hedged": self._hedged,
+            "hedge_wins": self._hedge_wins,
+            "hedge_ratio": round(self._hedged / self._calls, 4) if self._calls else 0.0,
+            "hedge_delay_seconds": round(delay, 4) if delay is not None else None,
+            "samples": len(self._latencies),
+        }
+
+
+# 全局单例
+_hedger: Optional[Hedger] = None
+
+
+def get_hedger(percentile: Optional[float] = None, max_ratio: Optional[float] = None) -> Hedger:
+    """
+    获取对冲请求执行器单例
+
+    Args:
+        percentile: 触发对冲的耗时分位数，提供时更新现有执行器
+        max_ratio: 对冲调用占比上限，提供时更新现有执行器
+
+    Returns:
+        Hedger 实例
+    """
+    global _hedger
+    if _hedger is None:
+        _hedger = Hedger()
+    if percentile is not None:
+        _hedger.percentile = percentile
+    if max_ratio is not None:
+        _hedger.max_ratio = max_ratio
+    return _hedger
@@ -0,0 +1,212 @@
+"""
+Seedream 4.0 MCP工具 - HTTP连接池模块
+
+提供进程级共享的 httpx.AsyncClient 传输层，支持连接池参数调优、
+可选的 HTTP/2 多路复用以及服务启动时的连接预热。
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    """检查是否安装了 HTTP/2 所需的 h2 依赖"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HTTPTransportPool:
+    """共享 HTTP 传输池
+
+    按 (base_url, 请求头, 连接池参数) 复用 httpx.AsyncClient，
+    使同一进程内的所有 SeedreamClient 共享已建立的 TCP/TLS 连接。
+    """
+
+    def __init__(self):
+        """初始化传输池"""
+        self._clients: Dict[Tuple, Tuple[httpx.AsyncClient, Any]] = {}
+        self._lock = threading.Lock()
+        # 统计的是 AsyncClient 对象的复用，而不是底层 TCP/TLS 连接的复用
+        self._client_reuses = 0
+        self._client_creations = 0
+        # 因事件循环变化被替换的客户端：已在其事件循环上关闭的 / 无法关闭而丢弃的
+        self._retired_closed = 0
+        self._retired_dropped = 0
+        self._warmups = 0
+        self._warmup_failures = 0
+
+    def _make_key(self, config, headers: Dict[str, str]) -> Tuple:
+        return (
+            config.base_url,
+            tuple(sorted(headers.items())),
+            config.api_timeout,
+            config.http_max_connections,
+            config.http_max_keepalive_connections,
+            config.http_keepalive_expiry,
+            config.http2_enabled,
+        )
+
+    def get_client(self, config, headers: Dict[str, str]) -> httpx.AsyncClient:
+        """获取共享的 AsyncClient，不存在时创建
+
+        httpx 的连接绑定在创建它的事件循环上，因此当事件循环变化
+        （例如多次调用 asyncio.run）时会重新创建客户端，被替换的客户端
+        交给 _retire 在其原事件循环上关闭。
+
+        Args:
+            config: SeedreamConfig 配置对象
+            headers: 默认请求头
+
+        Returns:
+            共享的 httpx.AsyncClient 实例
+        """
+        key = self._make_key(config, headers)
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                client, owner_loop = entry
+                if owner_loop is loop and not client.is_closed:
+                    self._client_reuses += 1
+                    return client
+                # 旧事件循环上的连接无法复用，关闭后替换
+                self._retire(client, owner_loop)
+
+            self._client_creations += 1
+            client = self._create_client(config, headers)
+            self._clients[key] = (client, loop)
+            return client
+
+    def _retire(self, client: httpx.AsyncClient, owner_loop: Any) -> None:
+        """关闭属于其他事件循环的客户端
+
+        客户端的连接只能在创建它的事件循环上关闭：该循环仍在运行时
+        把 aclose() 提交到该循环；循环已结束时无法再关闭，记录日志并计数，
+        剩余的套接字随垃圾回收释放。
+
+        Args:
+            client: 被替换的客户端
+            owner_loop: 创建该客户端的事件循环
+        """
+        if client.is_closed:
+            return
+        if owner_loop.is_running() and not owner_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), owner_loop)
+            self._retired_closed += 1
+            return
+        self._retired_dropped += 1
+        logger.warning("HTTP客户端所属的事件循环已结束，无法关闭其连接，将随垃圾回收释放")
+
+    def _create_client(self, config, headers: Dict[str, str]) -> httpx.AsyncClient:
+        """按配置创建新的 AsyncClient"""
+        http2 = config.http2_enabled
+        if http2 and not _http2_available():
+            logger.warning("未安装 h2 依赖，HTTP/2 已禁用。请运行: pip install httpx[http2]")
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=config.http_max_connections,
+            max_keepalive_connections=config.http_max_keepalive_connections,
+            keepalive_expiry=config.http_keepalive_expiry,
+        )
+
+        logger.debug(
+            f"创建共享HTTP客户端: base_url={config.base_url}, "
+            f"max_connections={config.http_max_connections}, "
+            f"max_keepalive={config.http_max_keepalive_connections}, http2={http2}"
+        )
+        return httpx.AsyncClient(
+            timeout=config.api_timeout,
+            headers=headers,
+            limits=limits,
+            http2=http2,
+        )
+
+    async def warm_up(self, client: httpx.AsyncClient, url: str, timeout: float = 10.0) -> bool:
+        """预热连接
+
+        向目标主机发送一个轻量请求以提前完成 DNS 解析和 TCP/TLS 握手，
+        建立的连接会保留在连接池中供后续请求复用。任何响应状态码都视为成功。
+
+        Args:
+            client: 要预热的客户端
+            url: 预热请求的 URL
+            timeout: 预热超时时间（秒）
+
+        Returns:
+            预热是否成功建立连接
+        """
+        try:
+            await client.head(url, timeout=timeout)
+            self._warmups += 1
+            logger.info(f"HTTP连接预热完成: {url}")
+            return True
+        except Exception as e:
+            self._warmup_failures += 1
+            logger.warning(f"HTTP连接预热失败: {url} -> {e}")
+            return False
+
+    async def close_all(self):
+        """关闭所有共享客户端
+
+        当前事件循环上的客户端直接关闭，其他事件循环上的客户端交给 _retire 处理。
+        """
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+
+        loop = asyncio.get_running_loop()
+        for client, owner_loop in entries:
+            if owner_loop is not loop:
+                with self._lock:
+                    self._retire(client, owner_loop)
+            elif not client.is_closed:
+                try:
+                    await client.aclose()
+                except Exception as e:
+                    logger.warning(f"关闭HTTP客户端失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息
+
+        Returns:
+            包含 AsyncClient 对象复用/创建次数等信息的字典。
+            底层连接的复用由 httpx 连接池负责，不在此统计
+        """
+        total = self._client_reuses + self._client_creations
+        return {
+            "clients": len(self._clients),
+            "client_reuses": self._client_reuses,
+            "client_creations": self._client_creations,
+            "client_reuse_rate": round(self._client_reuses / total, 4) if total else 0.0,
+            "retired_closed": self._retired_closed,
+            "retired_dropped": self._retired_dropped,
+            "warmups": self._warmups,
+            "warmup_failures": self._warmup_failures,
+        }
+
+
+# 全局单例
+_pool: Optional[HTTPTransportPool] = None
+
+
+def get_http_pool() -> HTTPTransportPool:
+    """获取共享HTTP传输池单例
+
+    Returns:
+        HTTPTransportPool 实例
+    """
+    global _pool
+    if _pool is None:
+        _pool = HTTPTransportPool()
+    return _pool
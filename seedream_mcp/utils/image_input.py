@@ -0,0 +1,586 @@
+"""
+Seedream 4.0 MCP工具 - 图像输入流式编码模块
+
+本地参考图需要以 Base64 Data URI 的形式写入 JSON 请求体。整图读取再编码会在内存中
+同时保留原始字节、Base64 字节、字符串和拼接后的 Data URI 等多份副本。本模块把本地
+图片表示为延迟编码的引用，在发送请求时按块读取文件、逐块编码并直接写入请求体，
+峰值内存只与块大小相关，文件读取在线程中执行，不阻塞事件循环。
+
+同一张参考图被反复使用时，编码结果按 (解析后的路径, 修改时间, 文件大小) 缓存在
+进程级 LRU 缓存中，后续请求直接复用，跳过磁盘读取与编码。
+
+可选的缩放预处理（需要 Pillow）会把参考图缩小到目标尺寸档位并重新编码为
+JPEG/WebP，缩小后的结果同样进入编码缓存。
+"""
+
+import asyncio
+import base64
+import io
+import json
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 每次读取的原始字节数，必须是 3 的倍数，保证各块的 Base64 编码可直接拼接
+DEFAULT_CHUNK_SIZE = 3 * 64 * 1024
+
+# 编码缓存默认字节预算（256MB）
+DEFAULT_IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# 尺寸档位对应的最长边像素
+SIZE_MAX_EDGE = {
+    "1K": 1024,
+    "2K": 2048,
+    "4K": 4096
+}
+
+# 缩放输出格式对应的 (Pillow 格式名, MIME 类型)
+DOWNSCALE_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp")
+}
+
+# 不进行缩放处理的格式（矢量图、动图、图标）
+_DOWNSCALE_SKIP_SUFFIXES = {'.svg', '.gif', '.ico'}
+
+MIME_TYPE_MAP = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+    '.tiff': 'image/tiff',
+    '.tif': 'image/tiff',
+    '.webp': 'image/webp',
+    '.svg': 'image/svg+xml',
+    '.ico': 'image/x-icon'
+}
+
+
+def get_mime_type(path: Path) -> str:
+    """
+    根据文件扩展名获取 MIME 类型
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        MIME 类型，未知扩展名默认为 image/jpeg
+    """
+    return MIME_TYPE_MAP.get(path.suffix.lower(), 'image/jpeg')
+
+
+CacheKey = Tuple[str, int, int, str]
+
+
+class EncodedImageCache:
+    """
+    参考图编码缓存
+
+    以 (解析后的路径, 修改时间纳秒, 文件大小) 为键缓存编码后的 Data URI 字节，
+    文件被修改后键随之变化，旧条目自然失效。按总字节数预算进行 LRU 淘汰。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_IMAGE_CACHE_MAX_BYTES):
+        """
+        初始化编码缓存
+
+        Args:
+            max_bytes: 缓存总字节预算，0 表示禁用缓存
+        """
+        self.max_bytes = max(0, max_bytes)
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(path: Path, variant: str = "") -> CacheKey:
+        """
+        生成缓存键
+
+        Args:
+            path: 图片路径
+            variant: 预处理变体标识（原图为空字符串）
+
+        Returns:
+            (解析后的路径, 修改时间纳秒, 文件大小, 变体标识)
+        """
+        stat = path.stat()
+        return (str(path.resolve()), stat.st_mtime_ns, stat.st_size, variant)
+
+    def can_store(self, nbytes: int) -> bool:
+        """判断指定大小的条目能否放入缓存"""
+        return 0 < nbytes <= self.max_bytes
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        """
+        查找缓存的编码结果
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            编码后的 Data URI 字节，未命中返回 None
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return data
+
+    def put(self, key: CacheKey, data: bytes) -> None:
+        """
+        写入编码结果，超出预算时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            data: 编码后的 Data URI 字节
+        """
+        if not self.can_store(len(data)):
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = data
+            self._bytes += len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        """淘汰条目直到总字节数不超过预算（调用方需持有锁）"""
+        while self._bytes > self.max_bytes and self._entries:
+            _, data = self._entries.popitem(last=False)
+            self._bytes -= len(data)
+            self._evictions += 1
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """
+        调整缓存字节预算
+
+        Args:
+            max_bytes: 新的字节预算，0 表示禁用缓存
+        """
+        with self._lock:
+            self.max_bytes = max(0, max_bytes)
+            self._evict()
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / total, 4) if total else 0.0,
+            }
+
+
+class ImageDownscaler:
+    """
+    参考图缩放器
+
+    将参考图按比例缩小到目标尺寸档位（最长边不超过 1024/2048/4096），并重新编码为
+    JPEG 或 WebP。仅当结果小于原文件时才使用缩放结果；不适合缩放的图片会被记住，
+    之后不再重复解码。依赖 Pillow，未安装时 available() 返回 False。
+    """
+
+    # 记住的“不缩放”图片数量上限
+    _MAX_SKIPPED = 1024
+
+    def __init__(self, output_format: str = "jpeg", quality: int = 85):
+        """
+        初始化缩放器
+
+        Args:
+            output_format: 输出格式，jpeg 或 webp
+            quality: 编码质量（1-100）
+        """
+        self.output_format = output_format.lower()
+        self.pil_format, self.mime_type = DOWNSCALE_FORMATS[self.output_format]
+        self.quality = quality
+        self._skipped: "OrderedDict[CacheKey, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._downscaled = 0
+        self._skipped_count = 0
+        self._bytes_before = 0
+        self._bytes_after = 0
+
+    @staticmethod
+    def available() -> bool:
+        """检查是否安装了 Pillow"""
+        try:
+            import PIL  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def variant(self, size: str) -> str:
+        """
+        获取指定尺寸档位的缓存变体标识
+
+        Args:
+            size: 目标尺寸档位（1K/2K/4K）
+
+        Returns:
+            变体标识，尺寸档位未知时返回空字符串
+        """
+        max_edge = SIZE_MAX_EDGE.get(size)
+        if max_edge is None:
+            return ""
+        return f"{self.output_format}:{self.quality}:{max_edge}"
+
+    def downscale(self, path: Path, size: str, key: CacheKey) -> Optional[bytes]:
+        """
+        缩放并重新编码图片（同步执行，应在线程中调用）
+
+        Args:
+            path: 图片路径
+            size: 目标尺寸档位
+            key: 该变体的缓存键，用于记住不需要缩放的图片
+
+        Returns:
+            缩放后的图片字节，不适合缩放或结果不小于原文件时返回 None
+        """
+        if path.suffix.lower() in _DOWNSCALE_SKIP_SUFFIXES:
+            return None
+        with self._lock:
+            if key in self._skipped:
+                return None
+
+        original_size = key[2]
+        try:
+            data = self._encode(path, SIZE_MAX_EDGE[size])
+        except Exception as e:
+            logger.warning(f"参考图缩放失败，使用原图: {path} -> {e}")
+            data = None
+
+        with self._lock:
+            if data is None or len(data) >= original_size:
+                self._skipped[key] = None
+                while len(self._skipped) > self._MAX_SKIPPED:
+                    self._skipped.popitem(last=False)
+                self._skipped_count += 1
+                return None
+            self._downscaled += 1
+            self._bytes_before += original_size
+            self._bytes_after += len(data)
+
+        logger.info(f"参考图已缩放: {path} ({original_size} -> {len(data)} bytes, {self.output_format})")
+        return data
+
+    def _encode(self, path: Path, max_edge: int) -> bytes:
+        """使用 Pillow 缩放并编码图片"""
+        from PIL import Image, ImageOps
+
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            if self.pil_format == "JPEG" and img.mode != "RGB":
+                # JPEG 不支持透明通道，合成到白色背景上
+                rgba = img.convert("RGBA")
+                background = Image.new("RGB", rgba.size, (255, 255, 255))
+                background.paste(rgba, mask=rgba.getchannel("A"))
+                img = background
+            buffer = io.BytesIO()
+            img.save(buffer, format=self.pil_format, quality=self.quality)
+            return buffer.getvalue()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缩放统计信息
+
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            return {
+                "format": self.output_format,
+                "quality": self.quality,
+                "downscaled": self._downscaled,
+                "skipped": self._skipped_count,
+                "bytes_before": self._bytes_before,
+                "bytes_after": self._bytes_after,
+            }
+
+
+class LocalImageReference:
+    """
+    本地参考图引用
+
+    记录文件路径、MIME 类型与大小，在构建请求体时才按块读取并编码为 Data URI。
+    提供编码缓存时，命中的引用直接使用缓存数据，未命中的引用在首次完整编码后写入缓存。
+    提供缩放器与目标尺寸时，会先尝试缩放（在构造时同步执行，调用方应在线程中创建），
+    缩放成功则直接使用缩放后的编码结果。
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        cache: Optional[EncodedImageCache] = None,
+        downscaler: Optional[ImageDownscaler] = None,
+        size: Optional[str] = None
+    ):
+        """
+        初始化本地参考图引用
+
+        Args:
+            path: 本地图片路径
+            chunk_size: 每次读取的原始字节数（会向下取整为 3 的倍数）
+            cache: 编码缓存（可选）
+            downscaler: 参考图缩放器（可选）
+            size: 目标尺寸档位（1K/2K/4K），与 downscaler 一起使用
+        """
+        self.path = Path(path)
+        self.mime_type = get_mime_type(self.path)
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+        self.cache = cache
+        self.cache_key = EncodedImageCache.make_key(self.path)
+        self.size = self.cache_key[2]
+        self.downscaled = False
+        self._encoded: Optional[bytes] = None
+        self._from_cache = False
+
+        variant = downscaler.variant(size) if downscaler is not None and size else ""
+        if variant:
+            variant_key = self.cache_key[:3] + (variant,)
+            self._encoded = cache.get(variant_key) if cache is not None else None
+            self._from_cache = self._encoded is not None
+            if self._encoded is None:
+                data = downscaler.downscale(self.path, size, variant_key)
+                if data is not None:
+                    self._encoded = (
+                        f"data:{downscaler.mime_type};base64,".encode('ascii') + base64.b64encode(data)
+                    )
+                    if cache is not None:
+                        cache.put(variant_key, self._encoded)
+            if self._encoded is not None:
+                self.mime_type = downscaler.mime_type
+                self.downscaled = True
+                return
+
+        if cache is not None:
+            self._encoded = cache.get(self.cache_key)
+            self._from_cache = self._encoded is not None
+
+    @property
+    def fingerprint(self) -> List[Any]:
+        """用于请求合并的内容标识（路径、修改时间、大小与编码格式）"""
+        return ["local-image", *self.cache_key, self.mime_type]
+
+    @property
+    def cache_hit(self) -> bool:
+        """编码结果是否来自缓存"""
+        return self._from_cache
+
+    @property
+    def prefix(self) -> bytes:
+        """Data URI 前缀"""
+        return f"data:{self.mime_type};base64,".encode('ascii')
+
+    @property
+    def encoded_length(self) -> int:
+        """编码后 Data URI 的字节长度"""
+        if self._encoded is not None:
+            return len(self._encoded)
+        return len(self.prefix) + 4 * ((self.size + 2) // 3)
+
+    async def iter_encoded(self) -> AsyncIterator[bytes]:
+        """
+        按块生成 Data URI 字节
+
+        Yields:
+            Data URI 前缀及逐块的 Base64 编码数据
+        """
+        if self._encoded is not None:
+            # 已缓存：直接按块输出，无磁盘读取与编码
+            encoded = memoryview(self._encoded)
+            step = self.chunk_size // 3 * 4
+            for start in range(0, len(encoded), step):
+                yield bytes(encoded[start:start + step])
+            return
+
+        # 可缓存时在流式编码的同时收集各块，完整读取后写入缓存
+        parts: Optional[List[bytes]] = (
+            [] if self.cache is not None and self.cache.can_store(self.encoded_length) else None
+        )
+        prefix = self.prefix
+        if parts is not None:
+            parts.append(prefix)
+        yield prefix
+        f = await asyncio.to_thread(open, self.path, 'rb')
+        try:
+            # 只读取创建引用时记录的大小，保证与预先计算的 Content-Length 一致
+            remaining = self.size
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    raise OSError(f"图片文件在读取过程中被截断: {self.path}")
+                remaining -= len(chunk)
+                encoded_chunk = base64.b64encode(chunk)
+                if parts is not None:
+                    parts.append(encoded_chunk)
+                yield encoded_chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+        if parts is not None:
+            self._encoded = b"".join(parts)
+            self.cache.put(self.cache_key, self._encoded)
+
+    async def to_data_uri(self) -> str:
+        """
+        完整编码为 Data URI 字符串（在线程中执行）
+
+        Returns:
+            Data URI 字符串
+        """
+        if self._encoded is None:
+            def _encode() -> bytes:
+                with open(self.path, 'rb') as f:
+                    return self.prefix + base64.b64encode(f.read())
+
+            self._encoded = await asyncio.to_thread(_encode)
+            if self.cache is not None:
+                self.cache.put(self.cache_key, self._encoded)
+        return self._encoded.decode('ascii')
+
+    def __repr__(self) -> str:
+        # 日志中只显示路径与大小，避免输出整段 Base64
+        return f"LocalImageReference({str(self.path)!r}, {self.mime_type}, {self.size} bytes)"
+
+
+def contains_local_images(data: Any) -> bool:
+    """
+    检查请求数据中是否包含本地参考图引用
+
+    Args:
+        data: 请求数据
+
+    Returns:
+        是否包含 LocalImageReference
+    """
+    if isinstance(data, LocalImageReference):
+        return True
+    if isinstance(data, dict):
+        return any(contains_local_images(v) for v in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(contains_local_images(v) for v in data)
+    return False
+
+
+class StreamingJSONBody:
+    """
+    流式 JSON 请求体
+
+    将请求数据中的 LocalImageReference 替换为占位符后序列化，再在占位符处
+    逐块写入图片的 Base64 编码。Base64 字符无需 JSON 转义，因此可以预先
+    计算出精确的 Content-Length。
+    """
+
+    def __init__(self, request_data: Dict[str, Any]):
+        """
+        初始化流式请求体
+
+        Args:
+            request_data: 可能包含 LocalImageReference 的请求数据
+        """
+        marker_id = uuid.uuid4().hex
+        self._images: List[LocalImageReference] = []
+
+        def replace(value: Any) -> Any:
+            if isinstance(value, LocalImageReference):
+                self._images.append(value)
+                return f"@@seedream-image-{marker_id}-{len(self._images) - 1}@@"
+            if isinstance(value, dict):
+                return {k: replace(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [replace(v) for v in value]
+            return value
+
+        body = json.dumps(replace(request_data), ensure_ascii=False).encode('utf-8')
+
+        # 按占位符切分为静态片段，片段数 = 图片数 + 1
+        self._segments: List[bytes] = []
+        for index in range(len(self._images)):
+            marker = f"@@seedream-image-{marker_id}-{index}@@".encode('ascii')
+            head, body = body.split(marker, 1)
+            self._segments.append(head)
+        self._segments.append(body)
+
+    @property
+    def content_length(self) -> int:
+        """请求体总字节数"""
+        return sum(len(s) for s in self._segments) + sum(i.encoded_length for i in self._images)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """流式请求所需的请求头"""
+        return {"Content-Length": str(self.content_length)}
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """
+        生成请求体字节流
+
+        每次调用都会返回新的迭代器，可用于重试。
+
+        Yields:
+            请求体字节块
+        """
+        for segment, image in zip(self._segments, self._images):
+            if segment:
+                yield segment
+            async for chunk in image.iter_encoded():
+                yield chunk
+        if self._segments[-1]:
+            yield self._segments[-1]
+
+
+# 全局单例
+_image_cache: Optional[EncodedImageCache] = None
+
+
+def get_encoded_image_cache(max_bytes: Optional[int] = None) -> EncodedImageCache:
+    """
+    获取参考图编码缓存单例
+
+    Args:
+        max_bytes: 缓存字节预算，提供时更新现有缓存的预算
+
+    Returns:
+        EncodedImageCache 实例
+    """
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = EncodedImageCache(
+            DEFAULT_IMAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        )
+    elif max_bytes is not None and max_bytes != _image_cache.max_bytes:
+        _image_cache.set_max_bytes(max_bytes)
+    return _image_cache
@@ -0,0 +1,282 @@
+"""
+Seedream 4.0 MCP工具 - 后台任务模块
+
+组图生成加上下载、上传可能超过 MCP 客户端的请求超时。后台任务把工具调用放到进程内的
+任务表中执行，提交后立即返回任务 ID，客户端随后轮询进度、已完成的阶段和最终结果，
+也可以取消任务。任务表只保存在内存中，服务器重启后丢失。
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .errors import SeedreamMCPError
+from .progress import ProgressReporter, progress_scope
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = frozenset({SUCCEEDED, FAILED, CANCELLED})
+
+# 执行工具调用的函数：(工具名称, 参数) -> 工具返回的内容列表
+ToolRunner = Callable[[str, Dict[str, Any]], Awaitable[list]]
+
+_in_job: ContextVar[bool] = ContextVar("seedream_in_job", default=False)
+
+
+class JobFailedError(SeedreamMCPError):
+    """工具在后台任务中执行失败"""
+
+
+def running_as_job() -> bool:
+    """
+    当前是否在后台任务中执行
+
+    同步调用时工具处理函数把失败格式化为文本返回；后台任务中需抛出 JobFailedError，
+    任务才会标记为失败。
+
+    Returns:
+        是否在后台任务中
+    """
+    return _in_job.get()
+
+
+@dataclass
+class Job:
+    """后台任务"""
+
+    job_id: str
+    tool_name: str
+    arguments: Dict[str, Any]
+    status: str = PENDING
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: int = 0
+    total: Optional[int] = None
+    message: str = ""
+    # 已完成的阶段，按完成顺序排列
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    # 工具返回的内容列表
+    result: Optional[list] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        """任务是否已结束"""
+        return self.status in FINISHED_STATES
+
+    def to_dict(self, include_events: bool = True) -> Dict[str, Any]:
+        """转换为字典（不含工具返回的内容）"""
+        data = {
+            "job_id": self.job_id,
+            "tool_name": self.tool_name,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress,
+            "total": self.total,
+            "message": self.message,
+            "error": self.error,
+        }
+        if include_events:
+            data["events"] = list(self.events)
+        return data
+
+
+class JobManager:
+    """进程内后台任务表"""
+
+    def __init__(self, max_jobs: int = 100, retention: float = 3600.0):
+        """
+        初始化任务表
+
+        Args:
+            max_jobs: 保留的最大任务数，超出时清理最早结束的任务
+            retention: 已结束任务的保留时间（秒）
+        """
+        self.max_jobs = max_jobs
+        self.retention = retention
+        self._jobs: Dict[str, Job] = {}
+        self._counter = itertools.count(1)
+        self._submitted = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._cancelled = 0
+
+    def submit(self, tool_name: str, arguments: Dict[str, Any], runner: ToolRunner) -> Job:
+        """
+        提交后台任务
+
+        Args:
+            tool_name: 工具名称
+            arguments: 工具参数
+            runner: 执行工具调用的协程函数
+
+        Returns:
+            已开始执行的任务
+        """
+        self._prune()
+        job_id = f"job-{next(self._counter)}-{uuid.uuid4().hex[:8]}"
+        job = Job(job_id=job_id, tool_name=tool_name, arguments=arguments)
+        self._jobs[job_id] = job
+        self._submitted += 1
+        job.task = asyncio.create_task(self._run(job, runner))
+        logger.info(f"已提交后台任务 {job_id}: {tool_name}")
+        return job
+
+    async def _run(self, job: Job, runner: ToolRunner) -> None:
+        """执行任务并记录各阶段进度"""
+
+        async def record(progress: float, total: Optional[float], message: str,
+                         data: Optional[Dict[str, Any]]) -> None:
+            job.progress = int(progress)
+            job.total = int(total) if total is not None else None
+            job.message = message
+            event = {"time": time.time(), "progress": job.progress, "message": message}
+            if data:
+                event["data"] = data
+            job.events.append(event)
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        token = _in_job.set(True)
+        try:
+            # 后台任务使用自己的进度报告器，不继承提交请求的进度通知
+            with progress_scope(ProgressReporter(record)):
+                job.result = await runner(job.tool_name, job.arguments)
+            job.status = SUCCEEDED
+            job.message = "任务完成"
+            self._succeeded += 1
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            job.message = "任务已取消"
+            self._cancelled += 1
+        except Exception as e:
+            logger.error(f"后台任务 {job.job_id} 失败: {e}")
+            job.status = FAILED
+            job.error = str(e)
+            job.message = "任务失败"
+            self._failed += 1
+        finally:
+            _in_job.reset(token)
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        查询任务
+
+        Args:
+            job_id: 任务 ID
+
+        Returns:
+            任务，不存在或已被清理时返回 None
+        """
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        """
+        列出任务表中的任务
+
+        Returns:
+            按提交时间排列的任务列表
+        """
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        取消任务
+
+        Args:
+            job_id: 任务 ID
+
+        Returns:
+            是否发出了取消请求（任务不存在或已结束时返回 False）
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished or job.task is None:
+            return False
+        job.task.cancel()
+        if job.status == PENDING:
+            # 尚未开始执行的任务被取消后不会再运行，直接标记为已取消
+            job.status = CANCELLED
+            job.message = "任务已取消"
+            job.finished_at = time.time()
+            self._cancelled += 1
+        logger.info(f"已请求取消后台任务 {job_id}")
+        return True
+
+    def _prune(self) -> None:
+        """清理超过保留时间或超出数量上限的已结束任务"""
+        now = time.time()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished),
+            key=lambda job: job.finished_at or 0
+        )
+        excess = len(self._jobs) - self.max_jobs + 1
+        for job in finished:
+            if excess > 0 or now - (job.finished_at or now) > self.retention:
+                del self._jobs[job.job_id]
+                excess -= 1
+
+    async def shutdown(self) -> None:
+        """取消仍在执行的任务并等待其结束"""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取任务统计信息
+
+        Returns:
+            统计信息
+        """
+        return {
+            "jobs": len(self._jobs),
+            "running": sum(1 for job in self._jobs.values() if not job.finished),
+            "submitted": self._submitted,
+            "succeeded": self._succeeded,
+            "failed": self._failed,
+            "cancelled": self._cancelled,
+        }
+
+
+# 全局单例
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager(max_jobs: Optional[int] = None, retention: Optional[float] = None) -> JobManager:
+    """
+    获取后台任务表单例
+
+    Args:
+        max_jobs: 保留的最大任务数，提供时更新现有任务表
+        retention: 已结束任务的保留时间（秒），提供时更新现有任务表
+
+    Returns:
+        JobManager 实例
+    """
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager()
+    if max_jobs is not None:
+        _job_manager.max_jobs = max_jobs
+    if retention is not None:
+        _job_manager.retention = retention
+    return _job_manager
@@ -0,0 +1,163 @@
+"""
+Seedream 4.0 MCP工具 - 内容寻址对象存储模块
+
+自动保存的图片按日期、工具和提示词命名，同一张图片保存多次（重复生成、缓存回放后再次保存等）
+会占用多份磁盘空间。对象存储在自动保存目录下按 SHA-256 为每份内容保留一个对象文件，
+按日期组织的可读路径都是指向该对象的硬链接，相同内容只占一份磁盘空间。
+"""
+
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# 对象目录相对于自动保存目录的位置（隐藏目录，浏览和清理图片时跳过）
+OBJECTS_DIR_NAME = ".seedream_objects"
+
+
+class ObjectStore:
+    """内容寻址对象存储
+
+    对象文件位于 <root>/<摘要前两位>/<摘要>，与可读路径互为硬链接。
+    所有方法都是阻塞的文件系统操作，应在线程中调用。
+    """
+
+    def __init__(self, root: Path):
+        """
+        初始化对象存储
+
+        Args:
+            root: 对象目录，需与可读路径位于同一文件系统
+        """
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._stored = 0
+        self._deduplicated = 0
+        self._bytes_saved = 0
+        self._link_failures = 0
+
+    def object_path(self, digest: str) -> Path:
+        """
+        获取摘要对应的对象文件路径
+
+        Args:
+            digest: SHA-256 十六进制摘要
+
+        Returns:
+            对象文件路径
+        """
+        return self.root / digest[:2] / digest
+
+    def link(self, path: Path, digest: str) -> bool:
+        """
+        把刚写入的文件登记到对象存储
+
+        对象不存在时为文件创建对象硬链接；对象已存在时把文件原子替换为指向对象的硬链接，
+        释放重复内容占用的空间。文件系统不支持硬链接时保留原文件。
+
+        Args:
+            path: 已写入完成的文件路径
+            digest: 文件内容的 SHA-256 十六进制摘要
+
+        Returns:
+            文件是否与已有对象合并
+        """
+        target = self.object_path(digest)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(path, target)
+            except FileExistsError:
+                return self._replace_with_link(path, target)
+        except OSError as e:
+            with self._lock:
+                self._link_failures += 1
+            logger.warning(f"登记对象存储失败，保留原文件: {path} -> {e}")
+            return False
+
+        with self._lock:
+            self._stored += 1
+        logger.debug(f"对象存储新增对象: {digest[:12]} <- {path}")
+        return False
+
+    def _replace_with_link(self, path: Path, target: Path) -> bool:
+        """把文件替换为指向已有对象的硬链接"""
+        if os.path.samefile(path, target):
+            return False
+        size = path.stat().st_size
+        # 先在同一目录创建临时链接，再原子替换，过程中可读路径始终可用
+        temp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.link")
+        os.link(target, temp)
+        try:
+            os.replace(temp, path)
+        except OSError:
+            temp.unlink()
+            raise
+        # 硬链接共享对象的修改时间，可能是数周前首次保存的时间；清理按修改时间判断过期，
+        # 刷新为本次保存的时间，避免刚保存的图片被当作旧文件删除（较早的同内容图片随之延后过期）
+        try:
+            os.utime(path)
+        except OSError as e:
+            logger.warning(f"刷新对象修改时间失败: {path} -> {e}")
+
+        with self._lock:
+            self._deduplicated += 1
+            self._bytes_saved += size
+        logger.info(f"相同内容已存在，合并为硬链接: {path} -> {target.name[:12]}")
+        return True
+
+    def prune(self) -> Dict[str, Any]:
+        """
+        删除没有可读路径引用的对象（链接数为1）
+
+        清理旧图片删除可读路径后调用，释放对象占用的空间。
+
+        Returns:
+            删除的对象数量与释放的字节数
+        """
+        removed = 0
+        freed = 0
+        if not self.root.is_dir():
+            return {'removed': 0, 'freed_bytes': 0}
+
+        for shard in self.root.iterdir():
+            if not shard.is_dir():
+                continue
+            for entry in shard.iterdir():
+                try:
+                    stat = entry.stat()
+                    if stat.st_nlink <= 1:
+                        entry.unlink()
+                        removed += 1
+                        freed += stat.st_size
+                except OSError as e:
+                    logger.warning(f"删除无引用对象失败: {entry} -> {e}")
+            try:
+                shard.rmdir()
+            except OSError:
+                # 目录中仍有对象
+                pass
+
+        if removed:
+            logger.info(f"删除无引用对象 {removed} 个，释放 {freed} 字节")
+        return {'removed': removed, 'freed_bytes': freed}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取对象存储统计信息
+
+        Returns:
+            新增对象数、合并次数、节省的字节数与硬链接失败次数
+        """
+        with self._lock:
+            return {
+                'root': str(self.root),
+                'stored': self._stored,
+                'deduplicated': self._deduplicated,
+                'bytes_saved': self._bytes_saved,
+                'link_failures': self._link_failures,
+            }
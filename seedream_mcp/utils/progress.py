@@ -0,0 +1,98 @@
+"""
+Seedream 4.0 MCP工具 - 进度报告模块
+
+工具调用的各个阶段（API调用、每张图片的下载、每张图片的上传）完成时报告进度。
+报告器通过上下文变量传递，同步调用时转发为 MCP 进度通知，后台任务中记录到任务表；
+没有报告器时报告为空操作，工具处理函数无需关心调用方式。
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# 进度回调：(已完成步数, 总步数, 说明, 附加数据)
+ProgressCallback = Callable[[float, Optional[float], str, Optional[Dict[str, Any]]], Awaitable[None]]
+
+
+class ProgressReporter:
+    """进度报告器
+
+    每次报告代表一个阶段完成，进度单调递增；总步数在得知图片数量后补充。
+    """
+
+    def __init__(self, callback: ProgressCallback):
+        """
+        初始化进度报告器
+
+        Args:
+            callback: 接收进度的协程函数
+        """
+        self._callback = callback
+        self.progress = 0
+        self.total: Optional[int] = None
+
+    async def report(
+        self,
+        message: str,
+        total: Optional[int] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        报告一个阶段完成
+
+        Args:
+            message: 阶段说明
+            total: 总步数，提供时更新
+            data: 阶段产出的附加数据（如已保存图片的路径）
+        """
+        self.progress += 1
+        if total is not None:
+            self.total = max(total, self.progress)
+        elif self.total is not None and self.progress > self.total:
+            self.total = self.progress
+        try:
+            await self._callback(self.progress, self.total, message, data)
+        except Exception as e:
+            # 进度通知失败不影响工具调用本身
+            logger.debug(f"发送进度失败: {e}")
+
+
+_current_reporter: ContextVar[Optional[ProgressReporter]] = ContextVar(
+    "seedream_progress_reporter", default=None
+)
+
+
+@contextmanager
+def progress_scope(reporter: Optional[ProgressReporter]) -> Iterator[Optional[ProgressReporter]]:
+    """
+    在当前上下文中启用进度报告器
+
+    Args:
+        reporter: 进度报告器，None 表示不报告进度
+    """
+    token = _current_reporter.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current_reporter.reset(token)
+
+
+async def report_progress(
+    message: str,
+    total: Optional[int] = None,
+    data: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    向当前上下文的进度报告器报告一个阶段完成，没有报告器时不做任何事
+
+    Args:
+        message: 阶段说明
+        total: 总步数，提供时更新
+        data: 阶段产出的附加数据
+    """
+    reporter = _current_reporter.get()
+    if reporter is not None:
+        await reporter.report(message, total=total, data=data)
@@ -6,17 +6,29 @@
 """
 
 import os
+import asyncio
 import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from dotenv import load_dotenv
 
+from .progress import report_progress
+
 # 加载环境变量
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# 上传凭证有效期（秒）
+TOKEN_TTL = 3600
+# 凭证到期前提前刷新的时间（秒），避免上传过程中凭证过期
+TOKEN_REFRESH_MARGIN = 300
+
 
 class QiniuUploader:
     """七牛云上传器
@@ -29,7 +41,8 @@ class QiniuUploader:
         access_key: Optional[str] = None,
         secret_key: Optional[str] = None,
         bucket_name: Optional[str] = None,
-        domain: Optional[str] = None
+        domain: Optional[str] = None,
+        max_workers: Optional[int] = None
     ):
         """初始化七牛云上传器
         
@@ -38,11 +51,27 @@ class QiniuUploader:
             secret_key: 七牛云 Secret Key，默认从环境变量 QINIU_SECRET_KEY 读取
             bucket_name: 存储空间名称，默认从环境变量 QINIU_BUCKET_NAME 读取
             domain: CDN 域名，默认从环境变量 QINIU_DOMAIN 读取
+            max_workers: 并发上传线程数，默认从环境变量 QINIU_UPLOAD_MAX_WORKERS 读取（默认4）
         """
         self.access_key = access_key or os.getenv("QINIU_ACCESS_KEY")
         self.secret_key = secret_key or os.getenv("QINIU_SECRET_KEY")
         self.bucket_name = bucket_name or os.getenv("QINIU_BUCKET_NAME")
         self.domain = domain or os.getenv("QINIU_DOMAIN")
+        self.max_workers = max(1, max_workers or _parse_workers(os.getenv("QINIU_UPLOAD_MAX_WORKERS", "4")))
+        
+        # 上传线程池（延迟创建），qiniu SDK 为同步阻塞调用，需在线程中执行
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        # 存储空间级上传凭证缓存（不绑定文件名，可用于任意新文件），在到期前复用
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        
+        # 统计信息
+        self._uploads = 0
+        self._failures = 0
+        self._token_cache_hits = 0
+        self._token_cache_misses = 0
         
         # 检查是否配置了七牛云
         self.enabled = bool(self.access_key and self.secret_key and self.bucket_name and self.domain)
@@ -50,9 +79,10 @@ class QiniuUploader:
         if self.enabled:
             try:
                 # 延迟导入 qiniu SDK
-                from qiniu import Auth, put_file
+                from qiniu import Auth, put_data, put_file
                 self.auth = Auth(self.access_key, self.secret_key)
                 self.put_file = put_file
+                self.put_data = put_data
                 logger.info(f"七牛云上传器初始化成功: bucket={self.bucket_name}, domain={self.domain}")
             except ImportError:
                 logger.warning("未安装 qiniu SDK，七牛云上传功能将被禁用。请运行: pip install qiniu")
@@ -60,6 +90,56 @@ class QiniuUploader:
         else:
             logger.info("七牛云配置未完整，上传功能已禁用")
     
+    def _make_key(self, filename: str) -> str:
+        """生成七牛云存储的文件名（时间戳 + 随机后缀 + 原文件名）
+        
+        上传凭证不限定文件名，只允许新增不允许覆盖，随机后缀保证同一秒内
+        上传的同名文件不会冲突（614 文件已存在）。
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"seedream/{timestamp}_{uuid.uuid4().hex[:8]}_{filename}"
+    
+    def _get_upload_token(self) -> str:
+        """获取上传凭证
+        
+        凭证的上传策略仅限定存储空间（不限定文件名），因此可被所有上传复用，
+        直到到期前 TOKEN_REFRESH_MARGIN 秒才重新签名。多个上传线程共享同一凭证。
+        
+        Returns:
+            上传凭证
+        """
+        with self._token_lock:
+            now = time.monotonic()
+            if self._token is not None and now < self._token_expires_at - TOKEN_REFRESH_MARGIN:
+                self._token_cache_hits += 1
+                return self._token
+            
+            self._token_cache_misses += 1
+            self._token = self.auth.upload_token(self.bucket_name, None, TOKEN_TTL)
+            self._token_expires_at = now + TOKEN_TTL
+            logger.debug(f"生成七牛云上传凭证: bucket={self.bucket_name}, 有效期={TOKEN_TTL}秒")
+            return self._token
+    
+    def _handle_upload_result(self, key: str, info: Any) -> Optional[str]:
+        """根据七牛云返回信息生成公开访问 URL，失败返回 None"""
+        self._uploads += 1
+        if info.status_code == 200:
+            url = f"{self.domain.rstrip('/')}/{key}"
+            logger.info(f"文件上传成功: {url}")
+            return url
+        self._failures += 1
+        if info.status_code == 401:
+            # 凭证失效（例如时钟偏差），丢弃缓存以便下次重新签名
+            self._invalidate_token()
+        logger.error(f"文件上传失败: status={info.status_code}, error={info.error}")
+        return None
+    
+    def _invalidate_token(self) -> None:
+        """丢弃缓存的上传凭证"""
+        with self._token_lock:
+            self._token = None
+            self._token_expires_at = 0.0
+    
     def upload_file(self, local_path: str, key: Optional[str] = None) -> Optional[str]:
         """上传文件到七牛云
         
@@ -80,47 +160,212 @@ class QiniuUploader:
                 logger.error(f"文件不存在: {local_path}")
                 return None
             
-            # 生成文件名
             if not key:
-                # 使用时间戳 + 原文件名
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = Path(local_path).name
-                key = f"seedream/{timestamp}_{filename}"
+                key = self._make_key(Path(local_path).name)
             
             # 生成上传凭证
-            token = self.auth.upload_token(self.bucket_name, key, 3600)
+            token = self._get_upload_token()
             
             # 上传文件
             logger.info(f"开始上传文件到七牛云: {local_path} -> {key}")
             ret, info = self.put_file(token, key, local_path)
-            
-            if info.status_code == 200:
-                # 生成公开访问 URL
-                url = f"{self.domain.rstrip('/')}/{key}"
-                logger.info(f"文件上传成功: {url}")
-                return url
-            else:
-                logger.error(f"文件上传失败: status={info.status_code}, error={info.error}")
-                return None
+            return self._handle_upload_result(key, info)
                 
         except Exception as e:
+            self._failures += 1
             logger.error(f"上传文件到七牛云时出错: {e}", exc_info=True)
             return None
     
-    def upload_multiple(self, local_paths: list[str]) -> list[Optional[str]]:
-        """批量上传文件
+    def upload_data(self, data: bytes, filename: str, key: Optional[str] = None) -> Optional[str]:
+        """直接上传内存中的图片数据到七牛云，无需先落盘再读取
+        
+        Args:
+            data: 图片字节数据
+            filename: 用于生成存储文件名的原文件名
+            key: 七牛云存储的文件名，如果不指定则自动生成
+            
+        Returns:
+            上传成功返回文件的公开访问 URL，失败返回 None
+        """
+        if not self.enabled:
+            logger.debug("七牛云上传未启用")
+            return None
+        
+        try:
+            if not key:
+                key = self._make_key(filename)
+            
+            token = self._get_upload_token()
+            
+            logger.info(f"开始上传内存数据到七牛云: {filename} ({len(data)} 字节) -> {key}")
+            ret, info = self.put_data(token, key, data)
+            return self._handle_upload_result(key, info)
+                
+        except Exception as e:
+            self._failures += 1
+            logger.error(f"上传数据到七牛云时出错: {e}", exc_info=True)
+            return None
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取上传线程池，不存在时创建"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="qiniu-upload"
+            )
+        return self._executor
+    
+    def upload_multiple(self, local_paths: List[str]) -> List[Optional[str]]:
+        """批量上传文件（在线程池中并发执行）
+        
+        Args:
+            local_paths: 本地文件路径列表
+            
+        Returns:
+            URL 列表（与输入顺序一致），失败的项为 None
+        """
+        if not self.enabled:
+            return [None] * len(local_paths)
+        return list(self._get_executor().map(self.upload_file, local_paths))
+    
+    async def upload_file_async(self, local_path: str, key: Optional[str] = None) -> Optional[str]:
+        """异步上传文件，上传在线程池中执行，不阻塞事件循环
+        
+        Args:
+            local_path: 本地文件路径
+            key: 七牛云存储的文件名，如果不指定则自动生成
+            
+        Returns:
+            上传成功返回文件的公开访问 URL，失败返回 None
+        """
+        if not self.enabled:
+            logger.debug("七牛云上传未启用")
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.upload_file, local_path, key)
+    
+    async def upload_data_async(
+        self,
+        data: bytes,
+        filename: str,
+        key: Optional[str] = None
+    ) -> Optional[str]:
+        """异步上传内存中的图片数据，上传在线程池中执行，不阻塞事件循环
+        
+        Args:
+            data: 图片字节数据
+            filename: 用于生成存储文件名的原文件名
+            key: 七牛云存储的文件名，如果不指定则自动生成
+            
+        Returns:
+            上传成功返回文件的公开访问 URL，失败返回 None
+        """
+        if not self.enabled:
+            logger.debug("七牛云上传未启用")
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.upload_data, data, filename, key)
+    
+    async def upload_multiple_async(
+        self,
+        local_paths: List[str],
+        contents: Optional[List[Optional[bytes]]] = None
+    ) -> List[Optional[str]]:
+        """异步并发批量上传文件
+        
+        并发度由线程池大小（max_workers）限制。提供 contents 时，对应项直接
+        从内存上传（文件名取自 local_paths），不再从磁盘重新读取；内容为 None
+        的项回退为按路径上传文件。
         
         Args:
             local_paths: 本地文件路径列表
+            contents: 与 local_paths 一一对应的图片字节数据（可选）
+            
+        Returns:
+            URL 列表（与输入顺序一致），失败的项为 None
+        """
+        if not self.enabled:
+            return [None] * len(local_paths)
+        if contents is None:
+            contents = [None] * len(local_paths)
+        
+        logger.info(f"开始并发上传 {len(local_paths)} 个文件到七牛云 (并发数: {self.max_workers})")
+        total = len(local_paths)
+        return list(await asyncio.gather(*[
+            self.upload_image_async(path, content, index=i, total=total)
+            for i, (path, content) in enumerate(zip(local_paths, contents))
+        ]))
+
+    async def upload_image_async(
+        self,
+        local_path: str,
+        content: Optional[bytes] = None,
+        index: int = 0,
+        total: int = 1
+    ) -> Optional[str]:
+        """异步上传单张图片并报告进度
+        
+        提供 content 时直接从内存上传（文件名取自 local_path），否则按路径上传文件。
+        
+        Args:
+            local_path: 本地文件路径
+            content: 图片字节数据（可选）
+            index: 图片在本批次中的序号（从0开始），用于进度说明
+            total: 本批次的图片总数
             
         Returns:
-            URL 列表，失败的项为 None
+            上传成功返回文件的公开访问 URL，失败返回 None
         """
-        urls = []
-        for path in local_paths:
-            url = self.upload_file(path)
-            urls.append(url)
-        return urls
+        if not self.enabled:
+            return None
+        try:
+            if content is not None:
+                url = await self.upload_data_async(content, Path(local_path).name)
+            else:
+                url = await self.upload_file_async(local_path)
+        except Exception as e:
+            logger.error(f"上传文件到七牛云时出错: {local_path} -> {e}")
+            url = None
+        # 每张图片上传结束后报告进度
+        if url:
+            await report_progress(
+                f"图片 {index + 1}/{total} 已上传到七牛云: {url}",
+                data={"index": index, "local_path": local_path, "qiniu_url": url}
+            )
+        else:
+            await report_progress(f"图片 {index + 1}/{total} 上传到七牛云失败", data={"index": index})
+        return url
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取上传统计信息
+        
+        Returns:
+            统计信息
+        """
+        lookups = self._token_cache_hits + self._token_cache_misses
+        return {
+            "enabled": self.enabled,
+            "uploads": self._uploads,
+            "failures": self._failures,
+            "token_cache_hits": self._token_cache_hits,
+            "token_cache_misses": self._token_cache_misses,
+            "token_cache_hit_rate": round(self._token_cache_hits / lookups, 4) if lookups else 0.0
+        }
+    
+    def shutdown(self) -> None:
+        """关闭上传线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _parse_workers(value: str) -> int:
+    """解析并发上传线程数"""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        logger.warning(f"无效的 QINIU_UPLOAD_MAX_WORKERS: {value}，使用默认值 4")
+        return 4
 
 
 # 全局单例
@@ -138,3 +383,9 @@ def get_qiniu_uploader() -> QiniuUploader:
         _uploader = QiniuUploader()
     return _uploader
 
+
+def close_qiniu_uploader() -> None:
+    """关闭七牛云上传器单例持有的线程池（如已创建）"""
+    if _uploader is not None:
+        _uploader.shutdown()
+
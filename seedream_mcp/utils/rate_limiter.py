@@ -0,0 +1,190 @@
+"""
+Seedream 4.0 MCP工具 - 限流模块
+
+在发往 Ark API 的请求前进行客户端限流：
+- 令牌桶限制每秒请求数，允许一定突发
+- 信号量限制同时进行中的请求数
+多个客户端共享同一个进程级限流器，排队等待时间作为指标暴露在统计信息中。
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """令牌桶限流器与并发控制器
+
+    rate 为 0 时不限制请求速率，max_in_flight 为 0 时不限制并发数。
+    等待者按到达顺序获取令牌。
+    """
+
+    def __init__(self, rate: float = 0.0, burst: int = 1, max_in_flight: int = 0):
+        """
+        初始化限流器
+
+        Args:
+            rate: 每秒允许的请求数
+            burst: 令牌桶容量（允许的突发请求数）
+            max_in_flight: 最大同时进行中的请求数
+        """
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self.configure(rate, burst, max_in_flight)
+
+        # 事件循环相关的同步原语，事件循环变化时重建
+        self._lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._acquired = 0
+        self._waiting = 0
+        self._in_flight = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def configure(self, rate: float, burst: int, max_in_flight: int) -> None:
+        """
+        更新限流参数
+
+        Args:
+            rate: 每秒允许的请求数
+            burst: 令牌桶容量
+            max_in_flight: 最大同时进行中的请求数
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        if getattr(self, "max_in_flight", None) != max_in_flight:
+            self.max_in_flight = max_in_flight
+            # 下次获取时按新的并发上限重建信号量
+            self._semaphore = None
+            self._loop = None
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用了任一限制"""
+        return self.rate > 0 or self.max_in_flight > 0
+
+    def _ensure_primitives(self) -> None:
+        """确保同步原语绑定在当前事件循环上"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_in_flight) if self.max_in_flight > 0 else None
+            self._loop = loop
+
+    def _refill(self) -> None:
+        """按流逝时间补充令牌"""
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def _take_token(self) -> None:
+        """获取一个令牌，不足时等待"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[float]:
+        """
+        获取一次请求许可
+
+        Yields:
+            本次排队等待的时间（秒）
+        """
+        if not self.enabled:
+            yield 0.0
+            return
+
+        self._ensure_primitives()
+        semaphore = self._semaphore
+        start = time.monotonic()
+        self._waiting += 1
+        try:
+            if semaphore is not None:
+                await semaphore.acquire()
+            try:
+                if self.rate > 0:
+                    await self._take_token()
+            except BaseException:
+                if semaphore is not None:
+                    semaphore.release()
+                raise
+        finally:
+            self._waiting -= 1
+
+        wait = time.monotonic() - start
+        self._acquired += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        if wait > 1:
+            logger.info(f"请求在限流队列中等待了 {wait:.2f}秒")
+
+        self._in_flight += 1
+        try:
+            yield wait
+        finally:
+            self._in_flight -= 1
+            if semaphore is not None:
+                semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取限流统计信息
+
+        Returns:
+            统计信息
+        """
+        return {
+            "enabled": self.enabled,
+            "rate": self.rate,
+            "burst": self.burst,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "acquired": self._acquired,
+            "total_wait_seconds": round(self._total_wait, 4),
+            "avg_wait_seconds": round(self._total_wait / self._acquired, 4) if self._acquired else 0.0,
+            "max_wait_seconds": round(self._max_wait, 4),
+        }
+
+
+# 全局单例
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter(
+    rate: Optional[float] = None,
+    burst: Optional[int] = None,
+    max_in_flight: Optional[int] = None
+) -> RateLimiter:
+    """
+    获取进程级限流器单例
+
+    Args:
+        rate: 每秒允许的请求数，提供时更新现有限流器
+        burst: 令牌桶容量
+        max_in_flight: 最大同时进行中的请求数
+
+    Returns:
+        RateLimiter 实例
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(rate or 0.0, burst or 1, max_in_flight or 0)
+    elif rate is not None and (rate, max(1, burst or 1), max_in_flight or 0) != (
+        _rate_limiter.rate, _rate_limiter.burst, _rate_limiter.max_in_flight
+    ):
+        _rate_limiter.configure(rate, burst or 1, max_in_flight or 0)
+    return _rate_limiter
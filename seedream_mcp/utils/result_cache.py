@@ -0,0 +1,334 @@
+"""
+Seedream 4.0 MCP工具 - 生成结果缓存模块
+
+将生成请求的规范化参数（模型、工具、提示词、尺寸、水印、参考图内容摘要等）映射到
+已自动保存的图片文件与 API 返回的元数据，持久化在自动保存目录下的 SQLite 数据库中。
+相同请求再次到达时直接回放已保存的结果，不再调用 API。缓存条目带有过期时间与数量上限，
+引用的本地文件被删除时条目自动失效。
+"""
+
+import asyncio
+import base64
+import copy
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .auto_save import AutoSaveResult
+from .file_manager import resolve_base_dir
+
+logger = logging.getLogger(__name__)
+
+# 缓存数据库相对于自动保存目录的位置
+CACHE_DB_NAME = ".seedream_cache/results.sqlite3"
+
+# b64_json 结果不直接存入数据库，回放时从本地文件重新编码
+_B64_FILE_FIELD = "b64_json_file"
+
+
+class ResultCache:
+    """生成结果缓存
+
+    SQLite 连接在线程池中访问，所有数据库操作串行执行。
+    """
+
+    # 参考图摘要缓存数量上限，键为 (解析后的路径, 修改时间, 大小)
+    _MAX_DIGESTS = 256
+
+    def __init__(self, db_path: Path, ttl: int = 7 * 24 * 3600, max_entries: int = 1000):
+        """
+        初始化生成结果缓存
+
+        Args:
+            db_path: SQLite 数据库文件路径
+            ttl: 条目有效期（秒），0 表示不过期
+            max_entries: 最大条目数，超出时淘汰最久未使用的条目
+        """
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._digests: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取数据库连接，不存在时创建（调用方需持有锁）"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    tool_name TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    result TEXT NOT NULL,
+                    auto_save TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _reference_digest(self, image: str) -> str:
+        """计算参考图摘要：URL 使用原文，本地文件使用内容的 SHA-256"""
+        if image.startswith(("http://", "https://")):
+            return image
+        path = Path(image).expanduser()
+        try:
+            stat = path.stat()
+        except OSError:
+            return image
+        stat_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._digests.get(stat_key)
+            if digest is not None:
+                self._digests.move_to_end(stat_key)
+                return digest
+
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        digest = f"sha256:{sha256.hexdigest()}"
+        with self._lock:
+            self._digests[stat_key] = digest
+            while len(self._digests) > self._MAX_DIGESTS:
+                self._digests.popitem(last=False)
+        return digest
+
+    async def make_key(
+        self,
+        tool_name: str,
+        model_id: str,
+        prompt: str,
+        size: str,
+        watermark: bool,
+        response_format: str,
+        images: Optional[List[str]] = None,
+        **extra: Any
+    ) -> str:
+        """
+        生成缓存键
+
+        Args:
+            tool_name: 工具名称
+            model_id: 模型 ID
+            prompt: 提示词
+            size: 图像尺寸
+            watermark: 是否添加水印
+            response_format: API 响应格式
+            images: 参考图 URL 或本地路径列表（本地文件按内容摘要计入）
+            **extra: 其他影响结果的参数（如 max_images、save_path、custom_name）
+
+        Returns:
+            SHA-256 十六进制摘要
+        """
+        digests = await asyncio.to_thread(
+            lambda: [self._reference_digest(image) for image in images or []]
+        )
+        canonical = json.dumps(
+            {
+                "tool_name": tool_name,
+                "model_id": model_id,
+                "prompt": prompt,
+                "size": size,
+                "watermark": watermark,
+                "response_format": response_format,
+                "images": digests,
+                "extra": extra,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Tuple[Dict[str, Any], List[AutoSaveResult]]]:
+        """
+        查找缓存的生成结果
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            (API 结果, 自动保存结果列表)，未命中、已过期或本地文件缺失时返回 None
+        """
+        try:
+            return await asyncio.to_thread(self._get_sync, key)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.warning(f"读取生成结果缓存失败: {e}")
+            return None
+
+    def _get_sync(self, key: str) -> Optional[Tuple[Dict[str, Any], List[AutoSaveResult]]]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT created_at, result, auto_save FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+
+            created_at, result_json, auto_save_json = row
+            saved = [AutoSaveResult.from_dict(item) for item in json.loads(auto_save_json)]
+            expired = self.ttl > 0 and now - created_at > self.ttl
+            missing = any(not Path(r.local_path).is_file() for r in saved)
+            if expired or missing:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                conn.commit()
+                self._misses += 1
+                logger.info(f"生成结果缓存条目失效({'已过期' if expired else '本地文件缺失'}): {key[:12]}")
+                return None
+
+            conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self._hits += 1
+
+        result = json.loads(result_json)
+        for item in result.get("data") or []:
+            if isinstance(item, dict) and _B64_FILE_FIELD in item:
+                with open(item.pop(_B64_FILE_FIELD), "rb") as f:
+                    item["b64_json"] = base64.b64encode(f.read()).decode("ascii")
+        return result, saved
+
+    async def put(
+        self,
+        key: str,
+        tool_name: str,
+        result: Dict[str, Any],
+        auto_save_results: List[AutoSaveResult]
+    ) -> bool:
+        """
+        写入生成结果
+
+        只有全部图片都已成功保存到本地时才写入，保证回放时文件可用。
+
+        Args:
+            key: 缓存键
+            tool_name: 工具名称
+            result: 已包含自动保存信息的 API 结果
+            auto_save_results: 自动保存结果列表
+
+        Returns:
+            是否写入
+        """
+        if not result.get("success") or not auto_save_results:
+            return False
+        if not all(r.success and r.local_path for r in auto_save_results):
+            return False
+
+        stored = copy.deepcopy(result)
+        for item, saved in zip(stored.get("data") or [], auto_save_results):
+            if isinstance(item, dict) and "b64_json" in item:
+                item.pop("b64_json")
+                item[_B64_FILE_FIELD] = saved.local_path
+
+        try:
+            await asyncio.to_thread(
+                self._put_sync,
+                key,
+                tool_name,
+                json.dumps(stored, ensure_ascii=False),
+                json.dumps([r.to_dict() for r in auto_save_results], ensure_ascii=False),
+            )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"写入生成结果缓存失败: {e}")
+            return False
+        return True
+
+    def _put_sync(self, key: str, tool_name: str, result_json: str, auto_save_json: str) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, tool_name, created_at, last_used, result, auto_save) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, tool_name, now, now, result_json, auto_save_json),
+            )
+            if self.ttl > 0:
+                conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM results WHERE key NOT IN "
+                "(SELECT key FROM results ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+            self._stores += 1
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            entries = 0
+            if self._conn is not None:
+                entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            total = self._hits + self._misses
+            return {
+                "db_path": str(self.db_path),
+                "entries": entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stores": self._stores,
+                "hit_rate": round(self._hits / total, 4) if total else 0.0,
+            }
+
+
+# 按数据库路径缓存的实例
+_caches: Dict[Path, ResultCache] = {}
+
+
+def get_result_cache(config) -> Optional[ResultCache]:
+    """
+    获取生成结果缓存
+
+    缓存数据库位于配置的自动保存目录下，同一目录共享一个实例。
+
+    Args:
+        config: SeedreamConfig 配置对象
+
+    Returns:
+        ResultCache 实例，未启用时返回 None
+    """
+    if not config.result_cache_enabled:
+        return None
+    db_path = resolve_base_dir(
+        Path(config.auto_save_base_dir) if config.auto_save_base_dir else None
+    ) / CACHE_DB_NAME
+    cache = _caches.get(db_path)
+    if cache is None:
+        cache = ResultCache(
+            db_path,
+            ttl=config.result_cache_ttl,
+            max_entries=config.result_cache_max_entries
+        )
+        _caches[db_path] = cache
+    return cache
+
+
+def close_result_caches() -> None:
+    """关闭所有生成结果缓存的数据库连接"""
+    for cache in _caches.values():
+        cache.close()
+    _caches.clear()
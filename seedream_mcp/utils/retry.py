@@ -0,0 +1,209 @@
+"""
+Seedream 4.0 MCP工具 - 重试策略模块
+
+统一 API 调用与图片下载的重试逻辑：
+- 按错误类型分类：限流(429)、服务端错误(5xx/408)、客户端错误(其他4xx)、超时、网络错误
+- 客户端错误不重试，避免在参数错误上浪费配额
+- 退避时间使用去相关抖动（decorrelated jitter），避免多个调用方同步重试
+- 服务端返回 Retry-After 时以其为准
+- 支持总时长预算，预算内无法完成下一次重试时立即放弃
+"""
+
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# 错误分类
+RATE_LIMITED = "rate_limited"
+SERVER_ERROR = "server_error"
+CLIENT_ERROR = "client_error"
+TIMEOUT = "timeout"
+NETWORK_ERROR = "network_error"
+FATAL = "fatal"
+
+# 可重试的错误分类
+RETRYABLE_CATEGORIES = frozenset({RATE_LIMITED, SERVER_ERROR, TIMEOUT, NETWORK_ERROR})
+
+
+class RetryDecision(NamedTuple):
+    """单次失败的分类结果"""
+
+    category: str
+    retry_after: Optional[float] = None
+
+    @property
+    def retryable(self) -> bool:
+        """是否可重试"""
+        return self.category in RETRYABLE_CATEGORIES
+
+
+def classify_status(status_code: int) -> str:
+    """
+    根据 HTTP 状态码对错误分类
+
+    Args:
+        status_code: HTTP 状态码
+
+    Returns:
+        错误分类
+    """
+    if status_code == 429:
+        return RATE_LIMITED
+    if status_code == 408 or status_code >= 500:
+        return SERVER_ERROR
+    if 400 <= status_code < 500:
+        return CLIENT_ERROR
+    return FATAL
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头
+
+    Args:
+        value: 响应头的值，可以是秒数或 HTTP 日期
+
+    Returns:
+        需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """重试策略
+
+    调用方提供单次尝试的协程函数和异常分类函数，由策略决定是否重试以及等待多久。
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        deadline: Optional[float] = None
+    ):
+        """
+        初始化重试策略
+
+        Args:
+            max_attempts: 最大尝试次数（包含首次调用）
+            base_delay: 最小退避时间（秒）
+            max_delay: 单次退避时间上限（秒），不限制服务端通过 Retry-After 要求的等待时间
+            deadline: 总时长预算（秒），为 None 或 0 时不限制
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max(max_delay, base_delay)
+        self.deadline = deadline or None
+        self._attempts = 0
+        self._retries = 0
+        self._non_retryable = 0
+        self._exhausted = 0
+        self._retry_after_honored = 0
+        self._by_category: Dict[str, int] = {}
+
+    def next_delay(self, previous_delay: float, retry_after: Optional[float] = None) -> float:
+        """
+        计算下一次重试前的等待时间
+
+        Args:
+            previous_delay: 上一次的等待时间（首次重试时传入 base_delay）
+            retry_after: 服务端要求的等待时间
+
+        Returns:
+            等待时间（秒）
+        """
+        if retry_after is not None:
+            return retry_after
+        upper = max(self.base_delay, previous_delay * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+    async def run(
+        self,
+        operation: Callable[[int], Awaitable[Any]],
+        classify: Callable[[Exception], RetryDecision],
+        description: str = ""
+    ) -> Any:
+        """
+        按策略执行操作
+
+        Args:
+            operation: 单次尝试的协程函数，参数为从 1 开始的尝试序号
+            classify: 将异常分类为 RetryDecision 的函数
+            description: 用于日志的操作描述
+
+        Returns:
+            操作的返回值
+
+        Raises:
+            不可重试、重试次数用尽或超出总时长预算时，抛出最后一次尝试的异常
+        """
+        start = time.monotonic()
+        delay = self.base_delay
+        attempt = 0
+        while True:
+            attempt += 1
+            self._attempts += 1
+            try:
+                return await operation(attempt)
+            except Exception as e:
+                decision = classify(e)
+                self._by_category[decision.category] = self._by_category.get(decision.category, 0) + 1
+
+                if not decision.retryable:
+                    self._non_retryable += 1
+                    logger.warning(f"{description} 失败且不可重试 ({decision.category}): {e}")
+                    raise
+                if attempt >= self.max_attempts:
+                    self._exhausted += 1
+                    logger.warning(f"{description} 重试次数已用尽 ({attempt}/{self.max_attempts}): {e}")
+                    raise
+
+                delay = self.next_delay(delay, decision.retry_after)
+                if self.deadline is not None and time.monotonic() - start + delay > self.deadline:
+                    self._exhausted += 1
+                    logger.warning(f"{description} 超出重试时长预算 {self.deadline}秒，放弃重试: {e}")
+                    raise
+                if decision.retry_after is not None:
+                    self._retry_after_honored += 1
+
+                self._retries += 1
+                logger.warning(
+                    f"{description} 失败 ({decision.category}, 尝试 {attempt}/{self.max_attempts})，"
+                    f"{delay:.2f}秒后重试: {e}"
+                )
+                await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取重试统计信息
+
+        Returns:
+            统计信息
+        """
+        return {
+            "attempts": self._attempts,
+            "retries": self._retries,
+            "non_retryable": self._non_retryable,
+            "exhausted": self._exhausted,
+            "retry_after_honored": self._retry_after_honored,
+            "failures_by_category": dict(self._by_category),
+        }
@@ -0,0 +1,123 @@
+"""
+Seedream 4.0 MCP工具 - 请求合并模块
+
+对进行中的相同请求进行合并（single-flight）：相同键的并发调用只触发一次上游调用，
+其余调用等待并共享同一结果，避免重复计费。
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _fingerprint(value: Any) -> Any:
+    """序列化无法直接转为 JSON 的对象（如本地参考图引用）"""
+    fingerprint = getattr(value, "fingerprint", None)
+    if fingerprint is not None:
+        return fingerprint
+    return repr(value)
+
+
+class SingleFlight:
+    """请求合并器
+
+    上游调用在独立任务中执行，单个等待方被取消不会影响其他等待方；
+    每个等待方拿到结果的深拷贝，可各自修改而互不影响。
+    """
+
+    def __init__(self):
+        """初始化请求合并器"""
+        self._inflight: Dict[Tuple[Any, str], asyncio.Task] = {}
+        self._calls = 0
+        self._coalesced = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        根据请求内容生成规范化的合并键
+
+        字典按键排序后序列化，顺序不同但内容相同的请求得到相同的键。
+
+        Args:
+            *parts: 参与生成键的请求内容
+
+        Returns:
+            SHA-256 十六进制摘要
+        """
+        canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=_fingerprint)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行调用，相同键的调用正在进行时等待并共享其结果
+
+        Args:
+            key: 合并键
+            func: 发起上游调用的协程函数
+
+        Returns:
+            调用结果的深拷贝
+
+        Raises:
+            上游调用抛出的异常会传递给所有等待方
+        """
+        loop = asyncio.get_running_loop()
+        # 任务绑定在事件循环上，不同事件循环之间不合并
+        inflight_key = (loop, key)
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            self._calls += 1
+            task = loop.create_task(func())
+            self._inflight[inflight_key] = task
+            task.add_done_callback(lambda t: self._on_done(inflight_key, t))
+        else:
+            self._coalesced += 1
+            logger.info(f"合并进行中的相同请求: {key[:12]}")
+
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    def _on_done(self, inflight_key: Tuple[Any, str], task: asyncio.Task) -> None:
+        """上游调用完成后移除记录"""
+        if self._inflight.get(inflight_key) is task:
+            del self._inflight[inflight_key]
+        # 所有等待方都被取消时，避免出现未获取异常的警告
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取合并统计信息
+
+        Returns:
+            统计信息
+        """
+        total = self._calls + self._coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "upstream_calls": self._calls,
+            "coalesced": self._coalesced,
+            "coalesce_rate": round(self._coalesced / total, 4) if total else 0.0,
+        }
+
+
+# 全局单例
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    获取请求合并器单例
+
+    Returns:
+        SingleFlight 实例
+    """
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
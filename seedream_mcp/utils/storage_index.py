@@ -0,0 +1,376 @@
+"""
+Seedream 4.0 MCP工具 - 存储索引模块
+
+记录自动保存目录中每张图片的大小、保存时间、所属工具与日期，持久化在 SQLite 数据库中。
+保存时间在保存时写入，与文件的修改时间无关（启用内容去重时硬链接共享对象的修改时间）。
+保存和删除图片时同步更新索引，统计存储占用、按工具/日期汇总以及查找过期图片
+只需查询索引，不必遍历整个目录树。索引与磁盘不一致时（如手动删除了图片）可执行:
+
+    python -m seedream_mcp.utils.storage_index reconcile [--dir 自动保存目录]
+
+从磁盘重建索引。
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .download_manager import PART_SUFFIX
+from .file_manager import resolve_base_dir
+
+logger = logging.getLogger(__name__)
+
+# 索引数据库相对于自动保存目录的位置
+INDEX_DB_NAME = ".seedream_cache/storage_index.sqlite3"
+
+# 日期文件夹名称格式（与 FileManager.get_organized_path 一致）
+_DAY_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# 一行索引记录：(相对路径, 工具, 日期, 大小, 修改时间, inode, 保存时间)
+_Row = Tuple[str, str, str, int, float, str, float]
+
+
+class StorageIndex:
+    """存储索引
+
+    所有方法都是阻塞的数据库与文件系统操作，应在线程中调用；数据库访问串行执行。
+    首次打开时（数据库不存在或从未重建过）自动从磁盘重建索引。
+    """
+
+    def __init__(self, db_path: Path, base_dir: Path):
+        """
+        初始化存储索引
+
+        Args:
+            db_path: SQLite 数据库文件路径
+            base_dir: 自动保存目录
+        """
+        self.db_path = Path(db_path)
+        self.base_dir = Path(base_dir)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取数据库连接，不存在时创建并从磁盘重建索引（调用方需持有锁）"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    tool_name TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    inode TEXT NOT NULL,
+                    sha256 TEXT,
+                    saved_at REAL NOT NULL
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+            if "saved_at" not in columns:
+                # 早期版本的索引没有保存时间，以记录时的修改时间代替
+                conn.execute("ALTER TABLE files ADD COLUMN saved_at REAL")
+                conn.execute("UPDATE files SET saved_at = mtime")
+                conn.execute("DROP INDEX IF EXISTS files_mtime")
+            conn.execute("CREATE INDEX IF NOT EXISTS files_saved_at ON files (saved_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.commit()
+            self._conn = conn
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'reconciled_at'").fetchone() is None:
+                logger.info(f"存储索引不存在，从磁盘建立: {self.base_dir}")
+                self._reconcile_locked()
+        return self._conn
+
+    def _relative(self, path: Path) -> Optional[str]:
+        """返回相对于自动保存目录的路径，不应索引的文件返回 None"""
+        try:
+            parts = Path(path).relative_to(self.base_dir).parts
+        except ValueError:
+            return None
+        # 隐藏目录与隐藏文件是内部数据（缓存数据库、对象存储、暂存文件等），下载中的临时文件不计入
+        if not parts or any(part.startswith('.') for part in parts) or parts[-1].endswith(PART_SUFFIX):
+            return None
+        return "/".join(parts)
+
+    @staticmethod
+    def _classify(relative: str, saved_at: float) -> Tuple[str, str]:
+        """从 <日期>/<工具>/<文件名> 形式的路径中获取工具与日期，没有日期文件夹时按保存时间"""
+        parts = relative.split("/")
+        if len(parts) > 1 and _DAY_PATTERN.fullmatch(parts[0]):
+            day = parts[0]
+            parts = parts[1:]
+        else:
+            day = datetime.fromtimestamp(saved_at).strftime("%Y-%m-%d")
+        tool_name = parts[0] if len(parts) > 1 else ""
+        return tool_name, day
+
+    def _make_row(self, relative: str, stat: os.stat_result, saved_at: float) -> _Row:
+        """根据文件状态和保存时间构造索引记录"""
+        tool_name, day = self._classify(relative, saved_at)
+        return (relative, tool_name, day, stat.st_size, stat.st_mtime, f"{stat.st_dev}:{stat.st_ino}", saved_at)
+
+    def record(self, path: Path, sha256: Optional[str] = None) -> bool:
+        """
+        记录新保存的文件
+
+        Args:
+            path: 文件路径
+            sha256: 文件内容的 SHA-256
+
+        Returns:
+            是否写入索引
+        """
+        relative = self._relative(path)
+        if relative is None:
+            return False
+        row = self._make_row(relative, Path(path).stat(), time.time())
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO files (path, tool_name, day, size, mtime, inode, saved_at, sha256) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                row + (sha256,),
+            )
+            conn.commit()
+        return True
+
+    def forget(self, paths: List[str]) -> None:
+        """
+        从索引中删除文件记录
+
+        Args:
+            paths: 相对于自动保存目录的路径列表
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths])
+            conn.commit()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        查询存储占用统计
+
+        Returns:
+            文件数、占用字节数（硬链接到同一内容的文件只计一次）以及按工具、按日期的汇总
+        """
+        with self._lock:
+            conn = self._connect()
+            total_files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            total_size = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM files GROUP BY inode)"
+            ).fetchone()[0]
+            by_tool = conn.execute(
+                "SELECT tool_name, COUNT(*), SUM(size) FROM files GROUP BY tool_name ORDER BY tool_name"
+            ).fetchall()
+            by_day = conn.execute(
+                "SELECT day, COUNT(*), SUM(size) FROM files GROUP BY day ORDER BY day"
+            ).fetchall()
+            reconciled_at = conn.execute("SELECT value FROM meta WHERE key = 'reconciled_at'").fetchone()
+
+        return {
+            'total_files': total_files,
+            'total_size_bytes': total_size,
+            'by_tool': {name: {'files': count, 'size_bytes': size} for name, count, size in by_tool},
+            'by_day': {day: {'files': count, 'size_bytes': size} for day, count, size in by_day},
+            'reconciled_at': float(reconciled_at[0]) if reconciled_at else None,
+        }
+
+    def expired(self, cutoff: float) -> List[Tuple[str, int]]:
+        """
+        查询保存时间早于截止时间的文件
+
+        Args:
+            cutoff: 截止时间戳
+
+        Returns:
+            (相对路径, 大小) 列表
+        """
+        with self._lock:
+            conn = self._connect()
+            return conn.execute(
+                "SELECT path, size FROM files WHERE saved_at < ? ORDER BY saved_at", (cutoff,)
+            ).fetchall()
+
+    def cleanup(self, days: int = 30) -> Dict[str, Any]:
+        """
+        删除超过保留天数的文件及随之变空的目录
+
+        Args:
+            days: 保留天数
+
+        Returns:
+            清理结果，格式与 FileManager.cleanup_old_files 相同
+        """
+        deleted_files = []
+        deleted_size = 0
+        errors = []
+        forgotten = []
+        parents = set()
+
+        for relative, size in self.expired(time.time() - days * 86400):
+            file_path = self.base_dir / relative
+            try:
+                file_path.unlink()
+                deleted_files.append(str(file_path))
+                deleted_size += size
+                logger.info(f"删除旧文件: {file_path}")
+            except FileNotFoundError:
+                # 文件已被外部删除，只需移除索引记录
+                pass
+            except OSError as e:
+                errors.append(f"删除文件失败 {file_path}: {e}")
+                logger.warning(f"删除文件失败: {file_path} -> {e}")
+                continue
+            forgotten.append(relative)
+            parents.add(file_path.parent)
+
+        if forgotten:
+            self.forget(forgotten)
+
+        # 只检查删除过文件的目录及其上级目录
+        for directory in sorted(parents, key=lambda p: len(p.parts), reverse=True):
+            while directory != self.base_dir and self.base_dir in directory.parents:
+                try:
+                    directory.rmdir()
+                    logger.info(f"删除空目录: {directory}")
+                except OSError:
+                    # 目录非空或已删除
+                    break
+                directory = directory.parent
+
+        return {
+            'deleted_files': len(deleted_files),
+            'deleted_size': deleted_size,
+            'errors': errors
+        }
+
+    def reconcile(self) -> Dict[str, Any]:
+        """
+        遍历磁盘重建索引
+
+        新增磁盘上未索引的文件（以修改时间作为保存时间），更新大小或修改时间变化的记录
+        （保留原保存时间），删除已不存在的文件的记录。
+
+        Returns:
+            扫描的文件数与新增、更新、删除的记录数
+        """
+        with self._lock:
+            self._connect()
+            return self._reconcile_locked()
+
+    def _scan(self) -> Iterator[Tuple[str, os.stat_result]]:
+        """遍历自动保存目录，跳过隐藏目录"""
+        for root, dirs, files in os.walk(self.base_dir):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            for name in files:
+                path = Path(root) / name
+                relative = self._relative(path)
+                if relative is None:
+                    continue
+                try:
+                    yield relative, path.stat()
+                except OSError:
+                    # 遍历过程中被删除
+                    continue
+
+    def _reconcile_locked(self) -> Dict[str, Any]:
+        """重建索引（调用方需持有锁）"""
+        conn = self._conn
+        indexed = {
+            path: (size, mtime, inode, saved_at)
+            for path, size, mtime, inode, saved_at in conn.execute(
+                "SELECT path, size, mtime, inode, saved_at FROM files"
+            )
+        }
+
+        scanned = 0
+        added = 0
+        updated = 0
+        for relative, stat in self._scan():
+            scanned += 1
+            previous = indexed.pop(relative, None)
+            if previous is None:
+                added += 1
+                row = self._make_row(relative, stat, stat.st_mtime)
+            else:
+                # 修改时间可能因硬链接共享而变化，保存时间以首次记录为准
+                row = self._make_row(relative, stat, previous[3])
+                if previous[:3] == row[3:6]:
+                    continue
+                updated += 1
+            # 内容可能已变化，哈希未知
+            conn.execute(
+                "INSERT OR REPLACE INTO files (path, tool_name, day, size, mtime, inode, saved_at, sha256) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, NULL)",
+                row,
+            )
+
+        conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in indexed])
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('reconciled_at', ?)", (str(time.time()),)
+        )
+        conn.commit()
+
+        result = {'scanned': scanned, 'added': added, 'updated': updated, 'removed': len(indexed)}
+        logger.info(f"存储索引已重建: {result}")
+        return result
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def open_storage_index(base_dir: Path) -> StorageIndex:
+    """
+    打开自动保存目录的存储索引
+
+    Args:
+        base_dir: 自动保存目录
+
+    Returns:
+        StorageIndex 实例
+    """
+    return StorageIndex(Path(base_dir) / INDEX_DB_NAME, Path(base_dir))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口：重建或查看存储索引"""
+    parser = argparse.ArgumentParser(description="Seedream 自动保存目录的存储索引")
+    parser.add_argument("command", choices=["reconcile", "info"], help="reconcile 从磁盘重建索引，info 查看统计")
+    parser.add_argument(
+        "--dir", default=os.getenv("SEEDREAM_AUTO_SAVE_BASE_DIR"),
+        help="自动保存目录，默认读取 SEEDREAM_AUTO_SAVE_BASE_DIR，未设置时为当前目录下的 images"
+    )
+    args = parser.parse_args(argv)
+
+    base_dir = resolve_base_dir(Path(args.dir) if args.dir else None)
+    if not base_dir.is_dir():
+        print(f"目录不存在: {base_dir}", file=sys.stderr)
+        return 1
+
+    index = open_storage_index(base_dir)
+    try:
+        result = index.reconcile() if args.command == "reconcile" else index.summary()
+    finally:
+        index.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Seedream 4.0 MCP工具 - 工具调用调度模块
+
+服务器并发处理工具调用，调度器在此基础上控制资源占用：
+- 生成类工具共享一个并发池，排队时按优先级放行（单图生成优先于组图生成）
+- 组图生成额外限制自身并发数，避免长任务占满并发池
+- 本地工具（浏览图片、提示词模板）不经过并发池，不会排在生成任务之后
+并记录各工具的排队深度与等待时间。
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PriorityLimiter:
+    """按优先级放行的并发限制器
+
+    并发数达到上限时，等待者按优先级（数值越小越优先）和到达顺序依次获得名额。
+    """
+
+    def __init__(self, limit: int):
+        """
+        初始化并发限制器
+
+        Args:
+            limit: 最大并发数
+        """
+        self.limit = max(1, limit)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    @property
+    def active(self) -> int:
+        """当前占用的名额数"""
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        """当前排队的等待者数量"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int = 0) -> None:
+        """
+        获取一个名额
+
+        Args:
+            priority: 优先级，数值越小越优先
+        """
+        if self._active < self.limit and not self.waiting:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 名额已分配但等待方被取消时，把名额交给下一个等待者
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """释放一个名额"""
+        self._active -= 1
+        while self._waiters and self._active < self.limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            future.set_result(None)
+            self._active += 1
+
+
+@dataclass(frozen=True)
+class ToolPolicy:
+    """工具调度策略"""
+
+    # 是否占用生成并发池
+    generation: bool = False
+    # 在生成并发池中的优先级，数值越小越优先
+    priority: int = 0
+    # 工具自身的并发上限，None 表示不单独限制
+    max_concurrent: Optional[int] = None
+
+
+class _ToolStats:
+    """单个工具的调度统计"""
+
+    def __init__(self):
+        self.calls = 0
+        self.running = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "avg_wait_seconds": round(self.total_wait / self.calls, 4) if self.calls else 0.0,
+            "max_wait_seconds": round(self.max_wait, 4),
+        }
+
+
+class ToolScheduler:
+    """工具调用调度器"""
+
+    def __init__(self, policies: Dict[str, ToolPolicy], generation_concurrency: int = 4):
+        """
+        初始化调度器
+
+        Args:
+            policies: 工具名称到调度策略的映射，未列出的工具直接执行
+            generation_concurrency: 生成类工具共享的最大并发数
+        """
+        self.policies = policies
+        self._generation = PriorityLimiter(generation_concurrency)
+        self._tool_limiters: Dict[str, PriorityLimiter] = {
+            name: PriorityLimiter(policy.max_concurrent)
+            for name, policy in policies.items()
+            if policy.max_concurrent
+        }
+        self._stats: Dict[str, _ToolStats] = {}
+
+    async def run(self, tool_name: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        按调度策略执行工具调用
+
+        Args:
+            tool_name: 工具名称
+            func: 执行工具调用的协程函数
+
+        Returns:
+            工具调用结果
+        """
+        policy = self.policies.get(tool_name, ToolPolicy())
+        stats = self._stats.setdefault(tool_name, _ToolStats())
+        tool_limiter = self._tool_limiters.get(tool_name)
+
+        start = time.monotonic()
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        acquired: List[PriorityLimiter] = []
+        try:
+            # 先占用工具自身的名额，避免排队中的组图任务占住生成并发池
+            if tool_limiter is not None:
+                await tool_limiter.acquire(policy.priority)
+                acquired.append(tool_limiter)
+            if policy.generation:
+                await self._generation.acquire(policy.priority)
+                acquired.append(self._generation)
+        except BaseException:
+            for limiter in reversed(acquired):
+                limiter.release()
+            raise
+        finally:
+            stats.queued -= 1
+
+        wait = time.monotonic() - start
+        stats.calls += 1
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        if wait > 1:
+            logger.info(f"工具 {tool_name} 排队等待了 {wait:.2f}秒")
+
+        stats.running += 1
+        try:
+            return await func()
+        finally:
+            stats.running -= 1
+            for limiter in reversed(acquired):
+                limiter.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取调度统计信息
+
+        Returns:
+            统计信息
+        """
+        return {
+            "generation_pool": {
+                "limit": self._generation.limit,
+                "active": self._generation.active,
+                "waiting": self._generation.waiting,
+            },
+            "tools": {name: stats.to_dict() for name, stats in self._stats.items()},
+        }
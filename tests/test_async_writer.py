@@ -0,0 +1,83 @@
+"""
+测试异步文件写入器
+
+验证小块数据合并写入、异常退出时写入剩余数据，以及 Base64 保存经由线程写入。
+"""
+
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from seedream_mcp.utils.async_writer import AsyncFileWriter
+from seedream_mcp.utils.file_manager import FileManager
+
+
+class TestAsyncFileWriter(unittest.TestCase):
+    """测试异步文件写入器"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.temp_dir.cleanup()
+
+    def test_small_chunks_coalesced(self):
+        """测试小块数据合并成缓冲区大小的写入"""
+        chunks = [bytes([i]) * 1000 for i in range(100)]
+
+        async def run_test():
+            async with AsyncFileWriter(self.base / "out.bin", buffer_size=10_000) as writer:
+                for chunk in chunks:
+                    await writer.write(chunk)
+                self.assertEqual(writer.size, 100_000)
+            return writer
+
+        writer = asyncio.run(run_test())
+        self.assertEqual(writer.writes, 10)
+        self.assertEqual(writer.flushed, 100_000)
+        self.assertEqual((self.base / "out.bin").read_bytes(), b"".join(chunks))
+
+    def test_buffer_flushed_when_interrupted(self):
+        """测试异常退出时缓冲区中的数据仍写入磁盘，flushed 与文件大小一致"""
+        async def run_test():
+            writer = AsyncFileWriter(self.base / "part.bin", buffer_size=1 << 20)
+            with self.assertRaises(ConnectionError):
+                async with writer:
+                    await writer.write(b"x" * 5000)
+                    raise ConnectionError("连接中断")
+            async with AsyncFileWriter(self.base / "part.bin", "ab") as resumed:
+                await resumed.write(b"y" * 10)
+            return writer
+
+        writer = asyncio.run(run_test())
+        self.assertEqual(writer.flushed, 5000)
+        self.assertEqual((self.base / "part.bin").read_bytes(), b"x" * 5000 + b"y" * 10)
+
+    def test_save_bytes_async_writes_off_loop(self):
+        """测试异步保存字节在事件循环线程之外写入"""
+        threads = []
+        real_open = open
+
+        def recording_open(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return real_open(*args, **kwargs)
+
+        async def run_test():
+            manager = FileManager(self.base)
+            with patch("builtins.open", recording_open):
+                return await manager.save_bytes_async(self.base / "img.png", b"\x89PNG" + b"\x00" * 100)
+
+        result = asyncio.run(run_test())
+        self.assertEqual(Path(result["file_path"]).read_bytes(), b"\x89PNG" + b"\x00" * 100)
+        self.assertTrue(threads)
+        self.assertNotIn(threading.main_thread(), threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
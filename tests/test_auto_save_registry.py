@@ -0,0 +1,68 @@
+"""
+测试自动保存管理器注册表
+
+验证同一保存目录复用 AutoSaveManager，以及目录存在性缓存。
+"""
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.utils.auto_save import AutoSaveManagerRegistry
+
+
+class TestAutoSaveManagerRegistry(unittest.TestCase):
+    """测试自动保存管理器注册表"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.config = SeedreamConfig(api_key="test_key", auto_save_max_concurrent=3)
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.temp_dir.cleanup()
+
+    def test_same_directory_reuses_manager(self):
+        """测试相同目录（不同写法）复用同一个管理器"""
+        registry = AutoSaveManagerRegistry()
+        first = registry.get_manager(self.base / "out", self.config)
+        second = registry.get_manager(self.base / "sub" / ".." / "out", self.config)
+        other = registry.get_manager(self.base / "other", self.config)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(first.max_concurrent, 3)
+        self.assertEqual(registry.get_stats(), {"managers": 2, "hits": 1, "misses": 2})
+
+        asyncio.run(registry.close_all())
+        self.assertEqual(registry.get_stats()["managers"], 0)
+
+    def test_directory_existence_is_cached(self):
+        """测试重复创建保存路径不会重复mkdir"""
+        registry = AutoSaveManagerRegistry()
+        manager = registry.get_manager(self.base, self.config)
+        file_manager = manager.file_manager
+
+        file_manager.create_save_path_from_extension("cat", ".png", tool_name="text_to_image")
+        with patch.object(Path, "mkdir") as mock_mkdir:
+            file_manager.create_save_path_from_extension("dog", ".png", tool_name="text_to_image")
+            mock_mkdir.assert_not_called()
+
+    def test_save_bytes_recovers_from_removed_directory(self):
+        """测试缓存目录被外部删除后仍能写入"""
+        registry = AutoSaveManagerRegistry()
+        file_manager = registry.get_manager(self.base, self.config).file_manager
+
+        path = file_manager.create_save_path_from_extension("cat", ".png", tool_name="t2i")
+        path.parent.rmdir()
+        result = file_manager.save_bytes(path, b"data")
+        self.assertEqual(Path(result["file_path"]).read_bytes(), b"data")
+
+
+if __name__ == "__main__":
+    unittest.main()
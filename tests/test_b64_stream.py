@@ -0,0 +1,168 @@
+"""
+测试 b64_json 响应流式解析
+
+验证图片字段在任意切分下边解码边写入暂存文件、其余字段保持不变，
+客户端重试时清理中断尝试的暂存文件，以及自动保存直接移动暂存文件。
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import httpx
+
+from seedream_mcp.client import SeedreamClient
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.utils.auto_save import AutoSaveManager
+from seedream_mcp.utils.b64_stream import (
+    SPOOL_FIELD,
+    B64JSONResponseParser,
+    B64StreamError,
+    release_spooled,
+)
+from seedream_mcp.utils.circuit_breaker import CircuitBreaker
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+def _make_body(images):
+    """构造 b64_json 响应体，base64 中的 / 按部分服务端的做法转义为 \\/"""
+    body = {
+        "model": "doubao-seedream-4-0",
+        "data": [{"b64_json": base64.b64encode(image).decode(), "size": "2048x2048"} for image in images],
+        "usage": {"generated_images": len(images), "note": "含 \"引号\" 与 {括号}"},
+    }
+    return json.dumps(body, ensure_ascii=False).replace("/", "\\/").encode("utf-8")
+
+
+class TestB64JSONResponseParser(unittest.TestCase):
+    """测试 b64_json 响应流式解析器"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.spool_dir = Path(self.temp_dir.name) / "spool"
+        self.images = [PNG_HEADER + os.urandom(300_000), os.urandom(1000), PNG_HEADER + os.urandom(7)]
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.temp_dir.cleanup()
+
+    def _parse(self, body: bytes, chunk_size: int):
+        async def run_test():
+            parser = B64JSONResponseParser(self.spool_dir, buffer_size=4096)
+            for offset in range(0, len(body), chunk_size):
+                await parser.feed(body[offset:offset + chunk_size])
+            return await parser.finish(), len(parser._skeleton)
+
+        return asyncio.run(run_test())
+
+    def test_images_decoded_to_files(self):
+        """测试任意切分下图片写入暂存文件，其余字段不变，内存中不保留 Base64 字符串"""
+        body = _make_body(self.images)
+        for chunk_size in (1, 7, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                result, skeleton_size = self._parse(body, chunk_size)
+                self.assertLess(skeleton_size, 500)
+                self.assertEqual(result["usage"]["note"], "含 \"引号\" 与 {括号}")
+                for item, image in zip(result["data"], self.images):
+                    self.assertNotIn("b64_json", item)
+                    self.assertEqual(item["size"], "2048x2048")
+                    self.assertEqual(Path(item[SPOOL_FIELD]).read_bytes(), image)
+                    self.assertEqual(item["sha256"], hashlib.sha256(image).hexdigest())
+                    self.assertEqual(item["file_size"], len(image))
+                    self.assertEqual(item["b64_json_length"], len(base64.b64encode(image)))
+
+    def test_data_uri_and_invalid_data(self):
+        """测试识别 data URI 前缀，无效的 Base64 数据报错且可以清理暂存文件"""
+        body = json.dumps({"data": [{"b64_json": "data:image/webp;base64," + base64.b64encode(b"RIFF1234WEBP").decode()}]})
+        result, _ = self._parse(body.encode(), 3)
+        self.assertEqual(result["data"][0]["content_type"], "image/webp")
+        self.assertEqual(Path(result["data"][0][SPOOL_FIELD]).read_bytes(), b"RIFF1234WEBP")
+
+        async def run_invalid():
+            parser = B64JSONResponseParser(self.spool_dir)
+            try:
+                await parser.feed(b'{"data": [{"b64_json": "ab!d"}]}')
+                await parser.finish()
+            finally:
+                await parser.discard()
+
+        with self.assertRaises(B64StreamError):
+            asyncio.run(run_invalid())
+        self.assertEqual(len(list(self.spool_dir.iterdir())), 1)
+
+
+class TestSpooledGeneration(unittest.TestCase):
+    """测试客户端流式接收与自动保存"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.spool_dir = self.base / ".seedream_spool"
+        self.images = [PNG_HEADER + os.urandom(50_000) for _ in range(3)]
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.temp_dir.cleanup()
+
+    def test_client_retry_discards_partial_spool(self):
+        """测试响应体中断时删除本次尝试的暂存文件，重试后返回暂存文件信息"""
+        body = _make_body(self.images)
+        calls = {"count": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls["count"] += 1
+            # 第一次响应体被截断在第二张图片中间
+            return httpx.Response(200, content=body if calls["count"] > 1 else body[:len(body) // 2])
+
+        async def run_test():
+            config = SeedreamConfig(
+                api_key="test_key", max_retries=2, retry_base_delay=0.01, retry_max_delay=0.01
+            )
+            client = SeedreamClient(config)
+            client._circuit_breaker = CircuitBreaker()
+            client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                return await client.sequential_generation(
+                    prompt="猫", max_images=3, size="2K", response_format="b64_json", spool_dir=self.spool_dir
+                )
+            finally:
+                await client._client.aclose()
+
+        result = asyncio.run(run_test())
+        self.assertEqual(calls["count"], 2)
+        self.assertEqual(sorted(self.spool_dir.iterdir()), sorted(Path(item[SPOOL_FIELD]) for item in result["data"]))
+        self.assertEqual([Path(item[SPOOL_FIELD]).read_bytes() for item in result["data"]], self.images)
+
+    def test_auto_save_moves_spool_files(self):
+        """测试自动保存把暂存文件移动到最终路径，未保存的暂存文件被清理"""
+        async def run_test():
+            parser = B64JSONResponseParser(self.spool_dir)
+            await parser.feed(_make_body(self.images))
+            result = await parser.finish()
+
+            manager = AutoSaveManager(self.base)
+            image_data = [dict(item, prompt="猫", custom_name=f"cat_{i}") for i, item in enumerate(result["data"][:2])]
+            saved = [r async for _, r in manager.stream_base64_images(image_data, "sequential_generation")]
+            await manager.close()
+            removed = release_spooled(result)
+            return saved, removed
+
+        saved, removed = asyncio.run(run_test())
+        self.assertEqual(removed, 1)
+        self.assertEqual(list(self.spool_dir.iterdir()), [])
+        self.assertTrue(all(r.success for r in saved))
+        saved_bytes = sorted(Path(r.local_path).read_bytes() for r in saved)
+        self.assertEqual(saved_bytes, sorted(self.images[:2]))
+        self.assertTrue(all(r.local_path.endswith(".png") for r in saved))
+
+
+if __name__ == "__main__":
+    unittest.main()
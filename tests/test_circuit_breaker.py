@@ -0,0 +1,94 @@
+"""
+测试熔断器
+
+验证连续失败后熔断、熔断期间快速失败，以及半开状态的探测恢复。
+"""
+
+import asyncio
+import time
+import unittest
+
+import httpx
+
+from seedream_mcp.client import SeedreamClient
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from seedream_mcp.utils.errors import SeedreamCircuitOpenError, format_error_for_user
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """测试熔断器"""
+
+    def test_state_transitions(self):
+        """测试熔断、半开探测与恢复"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.allow()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(SeedreamCircuitOpenError):
+            breaker.allow()
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, HALF_OPEN)
+        breaker.allow()
+        # 半开状态只放行一个探测请求
+        with self.assertRaises(SeedreamCircuitOpenError):
+            breaker.allow()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+
+        time.sleep(0.06)
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        stats = breaker.get_stats()
+        self.assertEqual((stats["opened_count"], stats["rejected"]), (2, 2))
+
+    def test_client_fails_fast_while_open(self):
+        """测试接口故障时熔断，后续请求不再发出"""
+        calls = {"count": 0, "healthy": False}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls["count"] += 1
+            if calls["healthy"]:
+                return httpx.Response(200, json={"data": [{"url": "https://example.com/out.png"}]})
+            return httpx.Response(503, text="unavailable")
+
+        async def run_test():
+            config = SeedreamConfig(
+                api_key="test_key", max_retries=5, retry_base_delay=0.01, retry_max_delay=0.01
+            )
+            client = SeedreamClient(config)
+            client._circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+            client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                with self.assertRaises(SeedreamCircuitOpenError):
+                    await client.text_to_image(prompt="第一次", size="1K")
+                self.assertEqual(calls["count"], 2)
+
+                start = time.perf_counter()
+                with self.assertRaises(SeedreamCircuitOpenError) as ctx:
+                    await client.text_to_image(prompt="第二次", size="1K")
+                self.assertLess(time.perf_counter() - start, 0.05)
+                self.assertEqual(calls["count"], 2)
+                self.assertIn("服务暂时不可用", format_error_for_user(ctx.exception))
+
+                # 冷却结束后探测成功，熔断器恢复
+                await asyncio.sleep(0.11)
+                calls["healthy"] = True
+                result = await client.text_to_image(prompt="第三次", size="1K")
+                return result, client.get_stats()["circuit_breaker"]
+            finally:
+                await client._client.aclose()
+
+        result, stats = asyncio.run(run_test())
+
+        self.assertTrue(result["success"])
+        self.assertEqual(stats["state"], CLOSED)
+        self.assertEqual(stats["opened_count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,255 @@
+"""
+测试下载管理器
+
+使用本地 aiohttp 测试服务器验证下载会话复用、重试与断点续传等行为。
+"""
+
+import asyncio
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from seedream_mcp.utils.download_manager import PART_SUFFIX, DownloadError, DownloadManager
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2048
+
+# 断点续传测试使用的较大图片，内容逐字节不同以便发现拼接错误
+LARGE_PNG_BYTES = b"\x89PNG\r\n\x1a\n" + bytes(i % 251 for i in range(64 * 1024))
+
+
+def _make_app(state: dict) -> web.Application:
+    """创建测试用图片服务"""
+    async def handle_image(request: web.Request) -> web.Response:
+        state["requests"] += 1
+        return web.Response(body=PNG_BYTES, content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/{name}", handle_image)
+    return app
+
+
+class TestDownloadManager(unittest.TestCase):
+    """测试下载管理器"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.temp_dir.cleanup()
+
+    def test_session_reused_across_downloads(self):
+        """测试多次下载复用同一个会话"""
+        async def run_test():
+            state = {"requests": 0}
+            server = TestServer(_make_app(state))
+            await server.start_server()
+            try:
+                async with DownloadManager(timeout=5, max_retries=0) as manager:
+                    session = await manager._get_session()
+                    urls_and_paths = [
+                        (str(server.make_url(f"/img{i}.png")), self.base / f"img{i}.png")
+                        for i in range(5)
+                    ]
+                    results = await manager.download_multiple_images(urls_and_paths)
+                    self.assertIs(await manager._get_session(), session)
+                self.assertTrue(session.closed)
+            finally:
+                await server.close()
+
+            self.assertEqual(state["requests"], 5)
+            self.assertTrue(all(r["success"] for r in results))
+            for _, path in urls_and_paths:
+                self.assertEqual(path.read_bytes(), PNG_BYTES)
+
+        asyncio.run(run_test())
+
+    def test_keep_content_returns_downloaded_bytes(self):
+        """测试保留下载内容时同时写入磁盘并返回字节"""
+        async def run_test():
+            state = {"requests": 0}
+            server = TestServer(_make_app(state))
+            await server.start_server()
+            try:
+                async with DownloadManager(timeout=5, max_retries=0) as manager:
+                    path = self.base / "kept.png"
+                    kept = await manager.download_image(
+                        str(server.make_url("/kept.png")), path, keep_content=True
+                    )
+                    plain = await manager.download_image(
+                        str(server.make_url("/plain.png")), self.base / "plain.png"
+                    )
+            finally:
+                await server.close()
+
+            self.assertEqual(kept["content"], PNG_BYTES)
+            self.assertEqual(path.read_bytes(), PNG_BYTES)
+            self.assertNotIn("content", plain)
+
+        asyncio.run(run_test())
+
+    def test_retry_only_retryable_statuses(self):
+        """测试 503 按 Retry-After 重试，404 立即失败"""
+        async def run_test():
+            state = {"flaky": 0, "missing": 0}
+
+            async def handle_flaky(request: web.Request) -> web.Response:
+                state["flaky"] += 1
+                if state["flaky"] == 1:
+                    return web.Response(status=503, headers={"Retry-After": "0"})
+                return web.Response(body=PNG_BYTES, content_type="image/png")
+
+            async def handle_missing(request: web.Request) -> web.Response:
+                state["missing"] += 1
+                return web.Response(status=404)
+
+            app = web.Application()
+            app.router.add_get("/flaky.png", handle_flaky)
+            app.router.add_get("/missing.png", handle_missing)
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                async with DownloadManager(timeout=5, max_retries=3, retry_delay=5) as manager:
+                    result = await manager.download_image(
+                        str(server.make_url("/flaky.png")), self.base / "flaky.png"
+                    )
+                    with self.assertRaises(DownloadError) as ctx:
+                        await manager.download_image(
+                            str(server.make_url("/missing.png")), self.base / "missing.png"
+                        )
+            finally:
+                await server.close()
+
+            self.assertEqual(result["attempts"], 2)
+            self.assertEqual(state["missing"], 1)
+            self.assertEqual(ctx.exception.status_code, 404)
+
+        asyncio.run(run_test())
+
+    def test_resume_interrupted_download_with_range(self):
+        """测试下载中断后只请求缺失的字节，完成后才出现目标文件"""
+        async def run_test():
+            ranges = []
+            cut = len(LARGE_PNG_BYTES) // 2
+
+            async def handle_image(request: web.Request) -> web.StreamResponse:
+                range_header = request.headers.get("Range")
+                ranges.append(range_header)
+                if range_header is None:
+                    # 首次请求只发送一半内容后断开连接
+                    response = web.StreamResponse(headers={
+                        "Accept-Ranges": "bytes", "ETag": '"v1"', "Content-Type": "image/png",
+                        "Content-Length": str(len(LARGE_PNG_BYTES)),
+                    })
+                    await response.prepare(request)
+                    await response.write(LARGE_PNG_BYTES[:cut])
+                    await asyncio.sleep(0.05)
+                    self.assertTrue((self.base / f"resumed.png{PART_SUFFIX}").exists())
+                    self.assertFalse((self.base / "resumed.png").exists())
+                    request.transport.close()
+                    return response
+                self.assertEqual(request.headers.get("If-Range"), '"v1"')
+                start = int(range_header.split("=")[1].rstrip("-"))
+                return web.Response(status=206, body=LARGE_PNG_BYTES[start:], content_type="image/png", headers={
+                    "Content-Range": f"bytes {start}-{len(LARGE_PNG_BYTES) - 1}/{len(LARGE_PNG_BYTES)}",
+                })
+
+            app = web.Application()
+            app.router.add_get("/resumed.png", handle_image)
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                async with DownloadManager(timeout=5, max_retries=2, retry_delay=0.01) as manager:
+                    result = await manager.download_image(
+                        str(server.make_url("/resumed.png")), self.base / "resumed.png", keep_content=True
+                    )
+            finally:
+                await server.close()
+            return ranges, cut, result
+
+        ranges, cut, result = asyncio.run(run_test())
+        self.assertEqual(ranges, [None, f"bytes={cut}-"])
+        self.assertEqual(result["resumed_bytes"], cut)
+        self.assertEqual(result["content"], LARGE_PNG_BYTES)
+        # 哈希跨越中断的两次尝试增量计算
+        self.assertEqual(result["sha256"], hashlib.sha256(LARGE_PNG_BYTES).hexdigest())
+        self.assertEqual((self.base / "resumed.png").read_bytes(), LARGE_PNG_BYTES)
+        self.assertEqual(list(self.base.glob(f"*{PART_SUFFIX}")), [])
+
+    def test_no_resume_without_validator(self):
+        """测试首次响应没有强 ETag 和 Last-Modified 时不续传，重试时从头下载"""
+        async def run_test():
+            ranges = []
+
+            async def handle_image(request: web.Request) -> web.StreamResponse:
+                ranges.append(request.headers.get("Range"))
+                if len(ranges) == 1:
+                    # 支持 Range 但只有弱 ETag，发送一半内容后断开连接
+                    response = web.StreamResponse(headers={
+                        "Accept-Ranges": "bytes", "ETag": 'W/"v1"', "Content-Type": "image/png",
+                        "Content-Length": str(len(LARGE_PNG_BYTES)),
+                    })
+                    await response.prepare(request)
+                    await response.write(LARGE_PNG_BYTES[:1024])
+                    await asyncio.sleep(0.05)
+                    request.transport.close()
+                    return response
+                # 资源已变化，仍按请求的范围返回新内容
+                return web.Response(body=PNG_BYTES, content_type="image/png")
+
+            app = web.Application()
+            app.router.add_get("/changed.png", handle_image)
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                async with DownloadManager(timeout=5, max_retries=2, retry_delay=0.01) as manager:
+                    result = await manager.download_image(
+                        str(server.make_url("/changed.png")), self.base / "changed.png"
+                    )
+            finally:
+                await server.close()
+            return ranges, result
+
+        ranges, result = asyncio.run(run_test())
+        self.assertEqual(ranges, [None, None])
+        self.assertEqual(result["resumed_bytes"], 0)
+        self.assertEqual((self.base / "changed.png").read_bytes(), PNG_BYTES)
+
+    def test_failed_download_leaves_no_partial_file(self):
+        """测试下载失败时不留下目标文件和临时文件"""
+        async def run_test():
+            async def handle_image(request: web.Request) -> web.StreamResponse:
+                # 不支持 Range 的服务器，每次都在中途断开
+                response = web.StreamResponse(headers={
+                    "Content-Type": "image/png", "Content-Length": str(len(LARGE_PNG_BYTES)),
+                })
+                await response.prepare(request)
+                await response.write(LARGE_PNG_BYTES[:1024])
+                request.transport.close()
+                return response
+
+            app = web.Application()
+            app.router.add_get("/broken.png", handle_image)
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                async with DownloadManager(timeout=5, max_retries=1, retry_delay=0.01) as manager:
+                    with self.assertRaises(DownloadError):
+                        await manager.download_image(
+                            str(server.make_url("/broken.png")), self.base / "broken.png"
+                        )
+            finally:
+                await server.close()
+
+        asyncio.run(run_test())
+        self.assertEqual(list(self.base.iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+测试对冲请求
+
+验证慢请求超过分位数耗时后发出对冲请求并取消较慢的一方，以及对冲预算限制。
+"""
+
+import asyncio
+import time
+import unittest
+
+import httpx
+
+from seedream_mcp.client import SeedreamClient
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.utils.hedging import MIN_SAMPLES, Hedger
+
+
+def _warm(hedger: Hedger, latency: float = 0.02) -> Hedger:
+    """填充历史耗时样本"""
+    for _ in range(MIN_SAMPLES):
+        hedger.record(latency)
+    return hedger
+
+
+class TestHedging(unittest.TestCase):
+    """测试对冲请求"""
+
+    def test_budget_limits_hedged_calls(self):
+        """测试样本不足或超出预算时不对冲"""
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        cold = Hedger(max_ratio=1.0)
+        self.assertIsNone(cold.hedge_delay())
+        self.assertEqual(asyncio.run(cold.run(slow)), "ok")
+
+        no_budget = _warm(Hedger(max_ratio=0.0))
+        self.assertEqual(asyncio.run(no_budget.run(slow)), "ok")
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(no_budget.get_stats()["hedged"], 0)
+
+    def test_client_hedges_slow_request(self):
+        """测试文生图慢请求由对冲请求先返回，较慢的请求被取消"""
+        state = {"count": 0, "cancelled": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            state["count"] += 1
+            if state["count"] == 1:
+                try:
+                    await asyncio.sleep(2)
+                except asyncio.CancelledError:
+                    state["cancelled"] += 1
+                    raise
+            return httpx.Response(200, json={"data": [{"url": f"https://example.com/{state['count']}.png"}]})
+
+        async def run_test():
+            client = SeedreamClient(SeedreamConfig(api_key="test_key", hedge_enabled=True))
+            client._hedger = _warm(Hedger(percentile=0.95, max_ratio=1.0))
+            client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                start = time.perf_counter()
+                result = await client.text_to_image(prompt="对冲", size="1K")
+                return result, time.perf_counter() - start, client.get_stats()["hedging"]
+            finally:
+                await client._client.aclose()
+
+        result, elapsed, stats = asyncio.run(run_test())
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(result["data"][0]["url"], "https://example.com/2.png")
+        self.assertEqual(state["cancelled"], 1)
+        self.assertEqual((stats["hedged"], stats["hedge_wins"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
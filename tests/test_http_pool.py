@@ -0,0 +1,122 @@
+"""
+测试共享HTTP连接池
+
+验证 SeedreamClient 复用进程级 httpx.AsyncClient，以及连接池参数配置。
+"""
+
+import asyncio
+import threading
+import unittest
+
+from seedream_mcp.client import SeedreamClient
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.utils.errors import SeedreamConfigError
+from seedream_mcp.utils.http_pool import HTTPTransportPool, get_http_pool
+
+
+class TestHTTPTransportPool(unittest.TestCase):
+    """测试HTTP传输池"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.config = SeedreamConfig(
+            api_key="test_key",
+            http_max_connections=10,
+            http_max_keepalive_connections=5,
+            http_keepalive_expiry=15.0,
+        )
+
+    def test_clients_share_transport(self):
+        """测试多个客户端共享同一个AsyncClient"""
+        async def run_test():
+            pool = get_http_pool()
+            before = pool.get_stats()
+
+            async with SeedreamClient(self.config) as first:
+                shared = first._client
+            async with SeedreamClient(self.config) as second:
+                self.assertIs(second._client, shared)
+
+            # 退出上下文不应关闭共享连接
+            self.assertFalse(shared.is_closed)
+
+            after = pool.get_stats()
+            self.assertEqual(after["client_reuses"] - before["client_reuses"], 1)
+            await pool.close_all()
+            self.assertTrue(shared.is_closed)
+
+        asyncio.run(run_test())
+
+    def test_pool_limits_applied(self):
+        """测试连接池参数传递到httpx"""
+        async def run_test():
+            pool = HTTPTransportPool()
+            client = pool.get_client(self.config, {"Authorization": "Bearer test_key"})
+            pool_impl = client._transport._pool
+            self.assertEqual(pool_impl._max_connections, 10)
+            self.assertEqual(pool_impl._max_keepalive_connections, 5)
+            self.assertEqual(pool_impl._keepalive_expiry, 15.0)
+            await pool.close_all()
+
+        asyncio.run(run_test())
+
+    def test_new_event_loop_gets_new_client(self):
+        """测试事件循环变化时重新创建客户端"""
+        pool = HTTPTransportPool()
+        headers = {"Authorization": "Bearer test_key"}
+
+        async def get_client():
+            return pool.get_client(self.config, headers)
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+        self.assertIsNot(first, second)
+        stats = pool.get_stats()
+        self.assertEqual(stats["client_creations"], 2)
+        # 第一个事件循环已结束，被替换的客户端无法关闭，只能计数
+        self.assertEqual(stats["retired_dropped"], 1)
+
+    def test_replaced_client_closed_on_its_loop(self):
+        """测试被替换的客户端在仍在运行的原事件循环上关闭"""
+        pool = HTTPTransportPool()
+        headers = {"Authorization": "Bearer test_key"}
+        other_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+        thread.start()
+
+        async def get_client():
+            return pool.get_client(self.config, headers)
+
+        try:
+            first = asyncio.run_coroutine_threadsafe(get_client(), other_loop).result(5)
+
+            async def run_test():
+                second = await get_client()
+                self.assertIsNot(second, first)
+                await pool.close_all()
+
+            asyncio.run(run_test())
+            # 等待原事件循环执行完提交的关闭任务
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), other_loop).result(5)
+            self.assertTrue(first.is_closed)
+            stats = pool.get_stats()
+            self.assertEqual((stats["retired_closed"], stats["retired_dropped"]), (1, 0))
+        finally:
+            other_loop.call_soon_threadsafe(other_loop.stop)
+            thread.join(5)
+            other_loop.close()
+
+    def test_invalid_pool_config(self):
+        """测试无效的连接池配置"""
+        with self.assertRaises(SeedreamConfigError):
+            SeedreamConfig(api_key="test_key", http_max_connections=0)
+        with self.assertRaises(SeedreamConfigError):
+            SeedreamConfig(
+                api_key="test_key",
+                http_max_connections=5,
+                http_max_keepalive_connections=10,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
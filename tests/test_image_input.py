@@ -0,0 +1,212 @@
+"""
+测试本地参考图的流式编码
+
+验证流式请求体与整图编码结果一致，且 Content-Length 精确。
+"""
+
+import asyncio
+import base64
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+from seedream_mcp import client as client_module
+from seedream_mcp.client import SeedreamClient
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.utils.image_input import (
+    EncodedImageCache,
+    ImageDownscaler,
+    LocalImageReference,
+    StreamingJSONBody,
+)
+
+
+async def _collect(body: StreamingJSONBody) -> bytes:
+    """收集流式请求体的全部字节"""
+    return b"".join([chunk async for chunk in body.stream()])
+
+
+class TestImageInput(unittest.TestCase):
+    """测试本地参考图流式编码"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        # 大小分别覆盖 3 的倍数余 0/1/2 的情况
+        self.images = {}
+        for name, size in [("a.png", 3000), ("b.jpg", 10001), ("c.webp", 20002)]:
+            path = self.base / name
+            data = os.urandom(size)
+            path.write_bytes(data)
+            self.images[path] = data
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.temp_dir.cleanup()
+
+    def _expected_uri(self, path: Path) -> str:
+        mime = {"png": "image/png", "jpg": "image/jpeg", "webp": "image/webp"}[path.suffix[1:]]
+        return f"data:{mime};base64," + base64.b64encode(self.images[path]).decode()
+
+    def test_streaming_body_matches_full_encoding(self):
+        """测试按块编码的请求体与整图编码一致"""
+        paths = list(self.images)
+        request_data = {
+            "prompt": "融合“中文”提示词",
+            "images": [LocalImageReference(p, chunk_size=1000) for p in paths],
+            "size": "2K",
+        }
+        body = StreamingJSONBody(request_data)
+        raw = asyncio.run(_collect(body))
+
+        self.assertEqual(len(raw), body.content_length)
+        parsed = json.loads(raw)
+        self.assertEqual(parsed["prompt"], "融合“中文”提示词")
+        self.assertEqual(parsed["images"], [self._expected_uri(p) for p in paths])
+        # 可重复生成，用于重试
+        self.assertEqual(asyncio.run(_collect(body)), raw)
+
+    def test_client_streams_local_image(self):
+        """测试客户端以流式请求体发送本地参考图"""
+        path = next(iter(self.images))
+        received = {}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            received["content_length"] = request.headers.get("content-length")
+            received["body"] = json.loads(await request.aread())
+            return httpx.Response(200, json={"data": [{"url": "https://example.com/out.png"}]})
+
+        async def run_test():
+            client = SeedreamClient(SeedreamConfig(api_key="test_key"))
+            client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                return await client.image_to_image(prompt="测试", image=str(path))
+            finally:
+                await client._client.aclose()
+
+        result = asyncio.run(run_test())
+
+        self.assertTrue(result["success"])
+        self.assertEqual(received["body"]["image"], self._expected_uri(path))
+        self.assertEqual(received["body"]["prompt"], "测试")
+        self.assertIsNotNone(received["content_length"])
+
+    def test_reference_images_prepared_concurrently(self):
+        """测试多张参考图并发准备且保持输入顺序"""
+        paths = [str(p) for p in self.images]
+        original_validate = client_module.validate_image_path
+
+        def slow_validate(image):
+            time.sleep(0.2)
+            return original_validate(image)
+
+        async def run_test():
+            client = SeedreamClient(SeedreamConfig(api_key="test_key", image_cache_max_bytes=0))
+            start = time.perf_counter()
+            refs = await client._prepare_image_inputs(
+                [paths[0], "https://example.com/remote.png", paths[1], paths[2]]
+            )
+            return refs, time.perf_counter() - start
+
+        with patch.object(client_module, "validate_image_path", side_effect=slow_validate):
+            refs, elapsed = asyncio.run(run_test())
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(refs[1], "https://example.com/remote.png")
+        self.assertEqual(
+            [str(ref.path) for ref in (refs[0], refs[2], refs[3])],
+            [str(Path(p).resolve()) for p in paths]
+        )
+
+    def test_encoded_cache_reused_until_file_changes(self):
+        """测试重复使用同一参考图时命中缓存，文件修改后重新编码"""
+        path = next(iter(self.images))
+        cache = EncodedImageCache(max_bytes=1024 * 1024)
+
+        first = LocalImageReference(path, chunk_size=999, cache=cache)
+        self.assertFalse(first.cache_hit)
+        raw = asyncio.run(_collect(StreamingJSONBody({"image": first})))
+        self.assertEqual(json.loads(raw)["image"], self._expected_uri(path))
+
+        second = LocalImageReference(path, cache=cache)
+        self.assertTrue(second.cache_hit)
+        self.assertEqual(asyncio.run(second.to_data_uri()), self._expected_uri(path))
+
+        # 修改文件后缓存键变化
+        new_data = os.urandom(4000)
+        path.write_bytes(new_data)
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+        self.images[path] = new_data
+        third = LocalImageReference(path, cache=cache)
+        self.assertFalse(third.cache_hit)
+        self.assertEqual(asyncio.run(third.to_data_uri()), self._expected_uri(path))
+
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 2, 2))
+
+    def test_encoded_cache_evicts_by_byte_budget(self):
+        """测试超出字节预算时淘汰最久未使用的条目"""
+        paths = list(self.images)
+        cache = EncodedImageCache(max_bytes=15000)
+        for path in paths[:2]:
+            asyncio.run(LocalImageReference(path, cache=cache).to_data_uri())
+        # 第三张编码后约 26KB，超过预算，不会被缓存
+        asyncio.run(LocalImageReference(paths[2], cache=cache).to_data_uri())
+
+        stats = cache.get_stats()
+        self.assertLessEqual(stats["bytes"], 15000)
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertFalse(LocalImageReference(paths[0], cache=cache).cache_hit)
+        self.assertTrue(LocalImageReference(paths[1], cache=cache).cache_hit)
+
+    def test_downscale_to_size_bucket(self):
+        """测试参考图缩小到目标尺寸档位并缓存缩放结果"""
+        from PIL import Image
+
+        path = self.base / "large.png"
+        Image.frombytes("RGB", (3000, 2000), os.urandom(3000 * 2000 * 3)).save(path)
+        cache = EncodedImageCache(max_bytes=64 * 1024 * 1024)
+        downscaler = ImageDownscaler(output_format="jpeg", quality=80)
+
+        ref = LocalImageReference(path, cache=cache, downscaler=downscaler, size="1K")
+        self.assertTrue(ref.downscaled)
+        self.assertFalse(ref.cache_hit)
+        self.assertEqual(ref.mime_type, "image/jpeg")
+        self.assertLess(ref.encoded_length, path.stat().st_size / 2)
+
+        uri = asyncio.run(ref.to_data_uri())
+        self.assertTrue(uri.startswith("data:image/jpeg;base64,"))
+        with Image.open(io.BytesIO(base64.b64decode(uri.split(",", 1)[1]))) as img:
+            self.assertEqual(img.format, "JPEG")
+            self.assertEqual(max(img.size), 1024)
+
+        again = LocalImageReference(path, cache=cache, downscaler=downscaler, size="1K")
+        self.assertTrue(again.downscaled and again.cache_hit)
+        self.assertEqual(downscaler.get_stats()["downscaled"], 1)
+
+    def test_downscale_skipped_when_not_smaller(self):
+        """测试缩放结果不小于原图时使用原图"""
+        from PIL import Image
+
+        path = self.base / "tiny.png"
+        Image.new("RGB", (8, 8), (10, 20, 30)).save(path)
+        downscaler = ImageDownscaler(output_format="jpeg", quality=95)
+
+        ref = LocalImageReference(path, downscaler=downscaler, size="2K")
+        self.assertFalse(ref.downscaled)
+        self.assertEqual(ref.mime_type, "image/png")
+        LocalImageReference(path, downscaler=downscaler, size="2K")
+        self.assertEqual(downscaler.get_stats()["skipped"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
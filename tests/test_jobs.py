@@ -0,0 +1,249 @@
+"""
+测试后台任务与进度报告
+
+验证任务表记录各阶段进度与结果、取消任务，任务工具的提交与查询，
+以及同步调用时把进度转发为 MCP 进度通知。
+"""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from mcp.server.lowlevel.server import request_ctx
+from mcp.shared.context import RequestContext
+from mcp.types import RequestParams, TextContent
+
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.client import SeedreamClient
+from seedream_mcp.server import SeedreamMCPServer
+from seedream_mcp.tools.sequential_generation import handle_sequential_generation
+from seedream_mcp.tools.text_to_image import handle_text_to_image
+from seedream_mcp.tools.jobs import handle_cancel_job, handle_job_status, handle_submit_job
+from seedream_mcp.utils.errors import SeedreamAPIError
+from seedream_mcp.utils.jobs import CANCELLED, FAILED, RUNNING, SUCCEEDED, JobManager, get_job_manager
+from seedream_mcp.utils.progress import report_progress
+
+
+async def _wait_finished(job):
+    """等待任务结束"""
+    while not job.finished:
+        await asyncio.sleep(0.01)
+
+
+class TestJobManager(unittest.TestCase):
+    """测试后台任务表"""
+
+    def test_job_records_stages_and_result(self):
+        """测试任务记录每个阶段的进度与最终结果"""
+        async def runner(tool_name, arguments):
+            await report_progress("API调用完成，生成 2 张图片", total=3)
+            await report_progress("图片 1/2 已保存", data={"index": 0, "local_path": "/tmp/1.jpeg"})
+            await report_progress("图片 2/2 已保存", data={"index": 1, "local_path": "/tmp/2.jpeg"})
+            return [TextContent(type="text", text=f"{tool_name}: {arguments['prompt']}")]
+
+        async def run_test():
+            manager = JobManager()
+            job = manager.submit("seedream_sequential_generation", {"prompt": "猫"}, runner)
+            await _wait_finished(job)
+            return manager, job
+
+        manager, job = asyncio.run(run_test())
+        self.assertEqual(job.status, SUCCEEDED)
+        self.assertEqual((job.progress, job.total), (3, 3))
+        self.assertEqual([event["message"] for event in job.events][0], "API调用完成，生成 2 张图片")
+        self.assertEqual(job.events[1]["data"]["local_path"], "/tmp/1.jpeg")
+        self.assertEqual(job.result[0].text, "seedream_sequential_generation: 猫")
+        self.assertEqual(manager.get_stats()["succeeded"], 1)
+
+    def test_cancel_running_job(self):
+        """测试取消执行中的任务"""
+        async def runner(tool_name, arguments):
+            await report_progress("API调用完成")
+            await asyncio.sleep(10)
+
+        async def run_test():
+            manager = JobManager()
+            job = manager.submit("seedream_sequential_generation", {}, runner)
+            while not job.events:
+                await asyncio.sleep(0.01)
+            status_before = job.status
+            cancelled = manager.cancel(job.job_id)
+            await _wait_finished(job)
+            return status_before, cancelled, job, manager.cancel(job.job_id)
+
+        status_before, cancelled, job, cancelled_again = asyncio.run(run_test())
+        self.assertEqual(status_before, RUNNING)
+        self.assertTrue(cancelled)
+        self.assertEqual(job.status, CANCELLED)
+        self.assertFalse(cancelled_again)
+
+    def test_failed_generation_marks_job_failed(self):
+        """测试生成失败时任务标记为失败，同步调用仍返回错误文本"""
+        config = SeedreamConfig(api_key="test_key", auto_save_enabled=False)
+        client = AsyncMock()
+        client.text_to_image.side_effect = SeedreamAPIError("HTTP 500: down", status_code=500)
+
+        async def runner(tool_name, arguments):
+            return await handle_text_to_image(arguments, client=client)
+
+        async def run_test():
+            manager = JobManager()
+            job = manager.submit("seedream_text_to_image", {"prompt": "猫"}, runner)
+            await _wait_finished(job)
+            direct = await handle_text_to_image({"prompt": "猫"}, client=client)
+            return manager, job, direct
+
+        with patch("seedream_mcp.tools.text_to_image.get_global_config", return_value=config):
+            manager, job, direct = asyncio.run(run_test())
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "文生图生成失败: HTTP 500: down")
+        self.assertIsNone(job.result)
+        self.assertEqual(manager.get_stats()["failed"], 1)
+        self.assertEqual(direct[0].text, "文生图生成失败: HTTP 500: down")
+
+    def test_invalid_arguments_mark_job_failed(self):
+        """测试参数错误（如尺寸无效）时任务标记为失败，不调用API"""
+        config = SeedreamConfig(api_key="test_key", auto_save_enabled=False)
+        client = AsyncMock()
+
+        async def runner(tool_name, arguments):
+            if tool_name == "seedream_sequential_generation":
+                return await handle_sequential_generation(arguments, client=client)
+            # 文生图的参数由客户端校验，校验失败时不发出请求
+            async with SeedreamClient(config) as real_client:
+                return await handle_text_to_image(arguments, client=real_client)
+
+        async def run_test():
+            manager = JobManager()
+            jobs = [
+                manager.submit("seedream_sequential_generation", {"prompt": "猫", "size": "8K"}, runner),
+                manager.submit("seedream_text_to_image", {"prompt": "猫", "size": "8K"}, runner),
+            ]
+            for job in jobs:
+                await _wait_finished(job)
+            direct = await handle_sequential_generation({"prompt": "猫", "size": "8K"}, client=client)
+            return jobs, direct
+
+        with patch("seedream_mcp.tools.sequential_generation.get_global_config", return_value=config), \
+                patch("seedream_mcp.tools.text_to_image.get_global_config", return_value=config):
+            (sequential, text), direct = asyncio.run(run_test())
+        self.assertEqual(sequential.status, FAILED)
+        self.assertEqual(sequential.error, "错误：size必须是1K、2K或4K")
+        self.assertEqual(text.status, FAILED)
+        self.assertIn("图像尺寸必须是以下值之一", text.error)
+        self.assertEqual(client.sequential_generation.await_count, 0)
+        self.assertEqual(direct[0].text, "错误：size必须是1K、2K或4K")
+
+    def test_finished_jobs_are_pruned(self):
+        """测试超出数量上限时清理最早结束的任务"""
+        async def runner(tool_name, arguments):
+            return []
+
+        async def run_test():
+            manager = JobManager(max_jobs=2)
+            jobs = []
+            for _ in range(3):
+                job = manager.submit("seedream_text_to_image", {}, runner)
+                await _wait_finished(job)
+                jobs.append(job)
+            return manager, jobs
+
+        manager, jobs = asyncio.run(run_test())
+        self.assertIsNone(manager.get(jobs[0].job_id))
+        self.assertEqual([job.job_id for job in manager.list_jobs()], [jobs[1].job_id, jobs[2].job_id])
+
+
+class TestJobTools(unittest.TestCase):
+    """测试后台任务工具"""
+
+    def test_submit_poll_and_cancel(self):
+        """测试提交任务后轮询得到结果，已结束的任务无法取消"""
+        calls = []
+
+        async def runner(tool_name, arguments):
+            calls.append((tool_name, arguments))
+            await report_progress("图片 1/1 已保存: /tmp/cat.jpeg", data={"index": 0, "local_path": "/tmp/cat.jpeg"})
+            return [TextContent(type="text", text="组图生成任务完成")]
+
+        async def run_test():
+            submitted = await handle_submit_job(
+                {"tool": "seedream_sequential_generation", "arguments": {"prompt": "猫", "max_images": 1}},
+                runner=runner
+            )
+            job_id = submitted[0].text.split("任务ID: ")[1].splitlines()[0]
+            await _wait_finished(get_job_manager().get(job_id))
+            status = await handle_job_status({"job_id": job_id})
+            cancel = await handle_cancel_job({"job_id": job_id})
+            rejected = await handle_submit_job({"tool": "seedream_browse_images", "arguments": {}}, runner=runner)
+            return status, cancel, rejected
+
+        status, cancel, rejected = asyncio.run(run_test())
+        self.assertEqual(calls, [("seedream_sequential_generation", {"prompt": "猫", "max_images": 1})])
+        self.assertIn("已完成", status[0].text)
+        self.assertIn("/tmp/cat.jpeg", status[0].text)
+        self.assertEqual(status[1].text, "组图生成任务完成")
+        self.assertIn("无需取消", cancel[0].text)
+        self.assertIn("错误", rejected[0].text)
+
+
+class _FakeSession:
+    """记录进度通知的会话"""
+
+    def __init__(self):
+        self.notifications = []
+
+    async def send_progress_notification(self, progress_token, progress, total=None, message=None,
+                                         related_request_id=None):
+        self.notifications.append((progress_token, progress, total, message))
+
+
+class _LegacySession:
+    """较早版本 mcp 的会话，send_progress_notification 只接受进度与总数"""
+
+    def __init__(self):
+        self.notifications = []
+
+    async def send_progress_notification(self, progress_token, progress, total=None):
+        self.notifications.append((progress_token, progress, total))
+
+
+class TestProgressNotifications(unittest.TestCase):
+    """测试同步调用的进度通知"""
+
+    def _report(self, session):
+        """在带有 progressToken 的请求中报告两个阶段"""
+        server = SeedreamMCPServer()
+
+        async def run_test():
+            meta = RequestParams.Meta(progressToken="token-1")
+            token = request_ctx.set(RequestContext(
+                request_id=1, meta=meta, session=session, lifespan_context=None
+            ))
+            try:
+                reporter = server._create_progress_reporter()
+            finally:
+                request_ctx.reset(token)
+            await reporter.report("API调用完成，生成 1 张图片", total=2)
+            await reporter.report("图片 1/1 已保存")
+
+        asyncio.run(run_test())
+
+    def test_reporter_forwards_progress_token(self):
+        """测试请求带有 progressToken 时发送进度通知，否则不创建报告器"""
+        self.assertIsNone(SeedreamMCPServer()._create_progress_reporter())
+        session = _FakeSession()
+        self._report(session)
+        self.assertEqual(session.notifications, [
+            ("token-1", 1, 2, "API调用完成，生成 1 张图片"),
+            ("token-1", 2, 2, "图片 1/1 已保存"),
+        ])
+
+    def test_reporter_supports_legacy_session(self):
+        """测试较早版本的 mcp 不支持 message 参数时仍发送进度通知"""
+        session = _LegacySession()
+        self._report(session)
+        self.assertEqual(session.notifications, [("token-1", 1, 2), ("token-1", 2, 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
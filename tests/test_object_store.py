@@ -0,0 +1,119 @@
+"""
+测试内容寻址对象存储
+
+验证相同内容的图片合并为同一对象的硬链接、清理后删除无引用的对象，
+以及文件系统不支持硬链接时保留原文件。
+"""
+
+import asyncio
+import base64
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from seedream_mcp.utils.auto_save import AutoSaveManager
+from seedream_mcp.utils.object_store import OBJECTS_DIR_NAME, ObjectStore
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + os.urandom(4096)
+
+
+class TestObjectStore(unittest.TestCase):
+    """测试内容寻址对象存储"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.temp_dir.cleanup()
+
+    def _save_twice(self, manager: AutoSaveManager):
+        async def run_test():
+            b64_data = base64.b64encode(PNG_BYTES).decode()
+            first = await manager.save_base64_image(b64_data, prompt="猫", custom_name="cat_a")
+            second = await manager.save_base64_image(b64_data, prompt="猫", custom_name="cat_b")
+            await manager.close()
+            return first, second
+
+        return asyncio.run(run_test())
+
+    def test_duplicate_saves_share_one_object(self):
+        """测试相同内容保存两次时两个可读路径指向同一个对象"""
+        manager = AutoSaveManager(self.base, dedup_enabled=True)
+        first, second = self._save_twice(manager)
+
+        first_path, second_path = Path(first.local_path), Path(second.local_path)
+        self.assertNotEqual(first_path, second_path)
+        self.assertTrue(os.path.samefile(first_path, second_path))
+        self.assertEqual(second_path.read_bytes(), PNG_BYTES)
+        self.assertEqual(first_path.stat().st_nlink, 3)
+        self.assertFalse(first.metadata["deduplicated"])
+        self.assertTrue(second.metadata["deduplicated"])
+
+        info = manager.get_storage_info()
+        self.assertEqual(info["total_files"], 2)
+        self.assertEqual(info["total_size_bytes"], len(PNG_BYTES))
+        self.assertEqual(info["dedup"]["bytes_saved"], len(PNG_BYTES))
+
+        # 删除所有可读路径后，对象在清理时一并删除
+        first_path.unlink()
+        second_path.unlink()
+        result = asyncio.run(manager.cleanup_old_files(days=30))
+        self.assertEqual(result["pruned_objects"]["removed"], 1)
+        self.assertEqual(list((self.base / OBJECTS_DIR_NAME).iterdir()), [])
+
+    def test_duplicate_of_old_image_survives_cleanup(self):
+        """测试合并到数周前保存的对象后，刚保存的图片不会被清理"""
+        for index_enabled in (True, False):
+            with self.subTest(index_enabled=index_enabled):
+                base = self.base / str(index_enabled)
+                manager = AutoSaveManager(base, dedup_enabled=True, index_enabled=index_enabled)
+
+                async def run_test():
+                    b64_data = base64.b64encode(PNG_BYTES).decode()
+                    first = await manager.save_base64_image(b64_data, prompt="猫", custom_name="cat_a")
+                    old_time = time.time() - 40 * 86400
+                    os.utime(first.local_path, (old_time, old_time))
+                    second = await manager.save_base64_image(b64_data, prompt="猫", custom_name="cat_b")
+                    result = await manager.cleanup_old_files(days=30)
+                    await manager.close()
+                    return second, result
+
+                second, result = asyncio.run(run_test())
+                self.assertTrue(second.metadata["deduplicated"])
+                self.assertEqual(result["deleted_files"], 0)
+                self.assertEqual(Path(second.local_path).read_bytes(), PNG_BYTES)
+
+    def test_link_failure_keeps_original_file(self):
+        """测试文件系统不支持硬链接时保留原文件"""
+        manager = AutoSaveManager(self.base, dedup_enabled=True)
+        with patch("seedream_mcp.utils.object_store.os.link", side_effect=OSError("不支持硬链接")):
+            first, second = self._save_twice(manager)
+
+        self.assertTrue(first.success and second.success)
+        self.assertFalse(os.path.samefile(first.local_path, second.local_path))
+        self.assertEqual(Path(second.local_path).read_bytes(), PNG_BYTES)
+        self.assertEqual(manager.object_store.get_stats()["link_failures"], 2)
+
+    def test_disabled_by_default(self):
+        """测试默认不启用对象存储，但仍记录内容哈希"""
+        manager = AutoSaveManager(self.base)
+        first, _ = self._save_twice(manager)
+        self.assertIsNone(manager.object_store)
+        self.assertEqual(len(first.metadata["sha256"]), 64)
+        self.assertFalse((self.base / OBJECTS_DIR_NAME).exists())
+
+    def test_object_path_sharded_by_digest(self):
+        """测试对象按摘要前两位分目录存放"""
+        store = ObjectStore(self.base / OBJECTS_DIR_NAME)
+        digest = "ab" + "0" * 62
+        self.assertEqual(store.object_path(digest), self.base / OBJECTS_DIR_NAME / "ab" / digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+测试七牛云上传器
+
+使用模拟的 qiniu SDK 调用验证异步并发上传行为，不访问真实网络。
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from seedream_mcp.utils.qiniu_uploader import TOKEN_REFRESH_MARGIN, TOKEN_TTL, QiniuUploader
+
+
+def _make_uploader(max_workers: int = 4) -> QiniuUploader:
+    """创建使用测试凭证的上传器"""
+    return QiniuUploader(
+        access_key="test_ak",
+        secret_key="test_sk",
+        bucket_name="test-bucket",
+        domain="https://cdn.example.com/",
+        max_workers=max_workers,
+    )
+
+
+class TestQiniuUploader(unittest.TestCase):
+    """测试七牛云上传器"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(4):
+            path = Path(self.temp_dir.name) / f"img{i}.png"
+            path.write_bytes(b"image-%d" % i)
+            self.paths.append(str(path))
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.temp_dir.cleanup()
+
+    def test_upload_multiple_async_runs_concurrently(self):
+        """测试批量上传并发执行且不阻塞事件循环"""
+        uploader = _make_uploader(max_workers=4)
+        state = {"active": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def fake_put_file(token, key, local_path):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.2)
+            with lock:
+                state["active"] -= 1
+            return {}, SimpleNamespace(status_code=200, error=None)
+
+        uploader.put_file = fake_put_file
+
+        async def run_test():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker_task = asyncio.create_task(ticker())
+            start = time.perf_counter()
+            urls = await uploader.upload_multiple_async(self.paths)
+            elapsed = time.perf_counter() - start
+            ticker_task.cancel()
+            return urls, elapsed, ticks
+
+        urls, elapsed, ticks = asyncio.run(run_test())
+        uploader.shutdown()
+
+        self.assertEqual(len(urls), 4)
+        for path, url in zip(self.paths, urls):
+            self.assertTrue(url.startswith("https://cdn.example.com/seedream/"))
+            self.assertTrue(url.endswith(Path(path).name))
+        self.assertEqual(state["peak"], 4)
+        self.assertLess(elapsed, 0.6)
+        # 上传期间事件循环仍在运行
+        self.assertGreater(ticks, 5)
+
+    def test_failed_upload_returns_none(self):
+        """测试单个上传失败不影响其他结果"""
+        uploader = _make_uploader(max_workers=2)
+
+        def fake_put_file(token, key, local_path):
+            status = 500 if local_path.endswith("img1.png") else 200
+            return {}, SimpleNamespace(status_code=status, error="boom")
+
+        uploader.put_file = fake_put_file
+        urls = asyncio.run(uploader.upload_multiple_async(self.paths))
+        uploader.shutdown()
+
+        self.assertIsNone(urls[1])
+        self.assertEqual(sum(1 for url in urls if url), 3)
+
+    def test_upload_from_memory_skips_disk(self):
+        """测试提供图片字节时直接从内存上传，不读取本地文件"""
+        uploader = _make_uploader(max_workers=2)
+        uploaded = {}
+
+        def fake_put_data(token, key, data):
+            uploaded[key] = data
+            return {}, SimpleNamespace(status_code=200, error=None)
+
+        def fake_put_file(token, key, local_path):
+            uploaded[key] = Path(local_path).read_bytes()
+            return {}, SimpleNamespace(status_code=200, error=None)
+
+        uploader.put_data = fake_put_data
+        uploader.put_file = fake_put_file
+        # 内存数据与磁盘内容不同，以区分实际使用的来源；最后一项回退为按文件上传
+        contents = [b"memory-%d" % i for i in range(3)] + [None]
+        urls = asyncio.run(uploader.upload_multiple_async(self.paths, contents))
+        uploader.shutdown()
+
+        self.assertTrue(all(urls))
+        by_name = {key.rsplit("_", 1)[-1]: data for key, data in uploaded.items()}
+        for i in range(3):
+            self.assertEqual(by_name[f"img{i}.png"], b"memory-%d" % i)
+        self.assertEqual(by_name["img3.png"], b"image-3")
+
+    def test_upload_token_reused_until_expiry(self):
+        """测试批量上传只签名一次，临近到期时重新签名"""
+        uploader = _make_uploader(max_workers=4)
+        signed = []
+
+        def fake_upload_token(bucket, key=None, expires=3600):
+            signed.append((bucket, key, expires))
+            return f"token-{len(signed)}"
+
+        tokens = []
+        keys = []
+
+        def fake_put_file(token, key, local_path):
+            tokens.append(token)
+            keys.append(key)
+            return {}, SimpleNamespace(status_code=200, error=None)
+
+        uploader.auth = SimpleNamespace(upload_token=fake_upload_token)
+        uploader.put_file = fake_put_file
+
+        urls = asyncio.run(uploader.upload_multiple_async(self.paths))
+        self.assertTrue(all(urls))
+        self.assertEqual(signed, [("test-bucket", None, TOKEN_TTL)])
+        self.assertEqual(set(tokens), {"token-1"})
+
+        # 进入刷新窗口后重新签名
+        now = time.monotonic()
+        with patch("seedream_mcp.utils.qiniu_uploader.time.monotonic",
+                   return_value=now + TOKEN_TTL - TOKEN_REFRESH_MARGIN + 1):
+            uploader.upload_file(self.paths[0])
+        uploader.shutdown()
+
+        self.assertEqual(len(signed), 2)
+        self.assertEqual(tokens[-1], "token-2")
+        stats = uploader.get_stats()
+        self.assertEqual(stats["token_cache_misses"], 2)
+        self.assertEqual(stats["token_cache_hits"], 3)
+        self.assertEqual(stats["uploads"], 5)
+        # 凭证只允许新增文件，重复上传同一文件也使用不同的文件名
+        self.assertEqual(len(set(keys)), 5)
+
+    def test_disabled_uploader(self):
+        """测试未配置时返回空结果"""
+        with patch.dict(os.environ, {}, clear=True):
+            uploader = QiniuUploader()
+        self.assertFalse(uploader.enabled)
+        self.assertEqual(asyncio.run(uploader.upload_multiple_async(self.paths)), [None] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+测试API限流
+
+验证令牌桶按速率放行请求、并发上限生效，以及排队等待时间统计。
+"""
+
+import asyncio
+import time
+import unittest
+
+import httpx
+
+from seedream_mcp.client import SeedreamClient
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.utils.rate_limiter import RateLimiter
+
+
+class TestRateLimiter(unittest.TestCase):
+    """测试API限流"""
+
+    def test_token_bucket_smooths_requests(self):
+        """测试超出突发容量后按速率放行"""
+        limiter = RateLimiter(rate=20, burst=2)
+
+        async def run_test():
+            stamps = []
+
+            async def request():
+                async with limiter.acquire():
+                    stamps.append(time.monotonic())
+
+            start = time.monotonic()
+            await asyncio.gather(*[request() for _ in range(6)])
+            return [t - start for t in sorted(stamps)]
+
+        offsets = asyncio.run(run_test())
+
+        # 前两个请求使用突发容量，其余每 50ms 放行一个
+        self.assertLess(offsets[1], 0.03)
+        self.assertGreaterEqual(offsets[-1], 0.18)
+        stats = limiter.get_stats()
+        self.assertEqual(stats["acquired"], 6)
+        self.assertGreater(stats["max_wait_seconds"], 0.15)
+        self.assertEqual(stats["waiting"], 0)
+
+    def test_disabled_limiter_does_not_wait(self):
+        """测试未配置限制时直接放行"""
+        limiter = RateLimiter()
+
+        async def run_test():
+            async with limiter.acquire() as wait:
+                return wait
+
+        self.assertFalse(limiter.enabled)
+        self.assertEqual(asyncio.run(run_test()), 0.0)
+
+    def test_client_respects_max_in_flight(self):
+        """测试客户端同时进行中的请求数不超过上限"""
+        state = {"active": 0, "peak": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.02)
+            state["active"] -= 1
+            return httpx.Response(200, json={"data": [{"url": "https://example.com/out.png"}]})
+
+        async def run_test():
+            config = SeedreamConfig(api_key="test_key", api_max_in_flight=2, request_coalescing_enabled=False)
+            client = SeedreamClient(config)
+            client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                results = await asyncio.gather(
+                    *[client.text_to_image(prompt=f"提示词{i}", size="1K") for i in range(6)]
+                )
+                return results, client.get_stats()["rate_limiter"]
+            finally:
+                await client._client.aclose()
+
+        results, stats = asyncio.run(run_test())
+
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertEqual(state["peak"], 2)
+        self.assertEqual(stats["max_in_flight"], 2)
+        self.assertEqual(stats["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+测试生成结果缓存
+
+验证相同请求回放已保存的结果，参考图内容变化、过期或本地文件缺失时重新生成。
+"""
+
+import asyncio
+import base64
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.tools.text_to_image import handle_text_to_image
+from seedream_mcp.utils.auto_save import AutoSaveResult
+from seedream_mcp.utils.result_cache import CACHE_DB_NAME, ResultCache, close_result_caches
+
+
+class TestResultCache(unittest.TestCase):
+    """测试生成结果缓存"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.saved = self.base / "cat.png"
+        self.saved.write_bytes(os.urandom(1000))
+
+    def tearDown(self):
+        """清理测试环境"""
+        close_result_caches()
+        self.temp_dir.cleanup()
+
+    def _saved_result(self):
+        return AutoSaveResult(
+            success=True,
+            original_url="https://example.com/cat.png",
+            local_path=str(self.saved),
+            markdown_ref=f"![cat]({self.saved})"
+        )
+
+    def test_key_uses_reference_image_content(self):
+        """测试本地参考图按内容计入缓存键"""
+        cache = ResultCache(self.base / "results.sqlite3")
+        ref = self.base / "ref.png"
+        ref.write_bytes(b"first")
+
+        async def key():
+            return await cache.make_key("image_to_image", "m", "猫", "2K", False, "url", images=[str(ref)])
+
+        first = asyncio.run(key())
+        self.assertEqual(asyncio.run(key()), first)
+
+        ref.write_bytes(b"second")
+        os.utime(ref, ns=(ref.stat().st_atime_ns, ref.stat().st_mtime_ns + 1_000_000))
+        self.assertNotEqual(asyncio.run(key()), first)
+        cache.close()
+
+    def test_replay_until_expired_or_file_missing(self):
+        """测试命中后回放，过期或本地文件缺失时失效"""
+        cache = ResultCache(self.base / "results.sqlite3", ttl=60)
+        result = {"success": True, "data": [{"b64_json": "ignored", "local_path": str(self.saved)}]}
+
+        async def run_test():
+            stored = await cache.put("k", "text_to_image", result, [self._saved_result()])
+            return stored, await cache.get("k")
+
+        stored, hit = asyncio.run(run_test())
+        self.assertTrue(stored)
+        replayed, saved = hit
+        # b64_json 从本地文件重新编码
+        self.assertEqual(base64.b64decode(replayed["data"][0]["b64_json"]), self.saved.read_bytes())
+        self.assertEqual(saved[0].local_path, str(self.saved))
+
+        with patch("seedream_mcp.utils.result_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(asyncio.run(cache.get("k")))
+
+        asyncio.run(cache.put("k", "text_to_image", result, [self._saved_result()]))
+        self.saved.unlink()
+        self.assertIsNone(asyncio.run(cache.get("k")))
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 2, 0))
+        cache.close()
+
+    def test_handler_skips_api_call_on_hit(self):
+        """测试文生图工具命中缓存时不调用API也不重复保存"""
+        config = SeedreamConfig(
+            api_key="test_key",
+            auto_save_enabled=True,
+            auto_save_base_dir=str(self.base),
+            result_cache_enabled=True
+        )
+        image_bytes = os.urandom(2000)
+        client = AsyncMock()
+        client.text_to_image.return_value = {
+            "success": True,
+            "data": [{"b64_json": base64.b64encode(image_bytes).decode()}],
+        }
+        arguments = {"prompt": "一只猫", "size": "1K", "response_format": "b64_json"}
+
+        with patch("seedream_mcp.tools.text_to_image.get_global_config", return_value=config):
+            first = asyncio.run(handle_text_to_image(arguments, client=client))
+            second = asyncio.run(handle_text_to_image(arguments, client=client))
+
+        self.assertEqual(client.text_to_image.await_count, 1)
+        self.assertEqual(first[0].text, second[0].text)
+        self.assertTrue((self.base / CACHE_DB_NAME).is_file())
+        saved_files = [p for p in self.base.rglob("*") if p.is_file() and ".seedream_cache" not in p.parts]
+        self.assertEqual(len(saved_files), 2)  # setUp 中的 cat.png 与本次生成的图片
+
+
+if __name__ == "__main__":
+    unittest.main()
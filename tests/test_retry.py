@@ -0,0 +1,100 @@
+"""
+测试重试策略
+
+验证错误分类、Retry-After 与总时长预算，以及客户端对不可重试错误的处理。
+"""
+
+import asyncio
+import json
+import unittest
+
+import httpx
+
+from seedream_mcp.client import SeedreamClient
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.utils.errors import SeedreamAPIError
+from seedream_mcp.utils.retry import (
+    CLIENT_ERROR,
+    RATE_LIMITED,
+    SERVER_ERROR,
+    RetryDecision,
+    RetryPolicy,
+    classify_status,
+    parse_retry_after,
+)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """测试重试策略"""
+
+    def test_classify_and_parse_retry_after(self):
+        """测试状态码分类与 Retry-After 解析"""
+        self.assertEqual(classify_status(429), RATE_LIMITED)
+        self.assertEqual(classify_status(503), SERVER_ERROR)
+        self.assertEqual(classify_status(400), CLIENT_ERROR)
+        self.assertFalse(RetryDecision(CLIENT_ERROR).retryable)
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+
+    def test_jitter_bounds_and_deadline(self):
+        """测试退避时间在上下限之间，超出总时长预算时放弃"""
+        policy = RetryPolicy(max_attempts=10, base_delay=0.5, max_delay=4.0)
+        delay = policy.base_delay
+        for _ in range(50):
+            delay = policy.next_delay(delay)
+            self.assertTrue(0.5 <= delay <= 4.0)
+        self.assertEqual(policy.next_delay(1.0, retry_after=7.0), 7.0)
+
+        calls = []
+
+        async def always_busy(attempt):
+            calls.append(attempt)
+            raise SeedreamAPIError("busy", status_code=429, retry_after=5.0)
+
+        def classify(error):
+            return RetryDecision(classify_status(error.status_code), error.retry_after)
+
+        budget = RetryPolicy(max_attempts=5, base_delay=0.01, deadline=1.0)
+        with self.assertRaises(SeedreamAPIError):
+            asyncio.run(budget.run(always_busy, classify, "test"))
+        self.assertEqual(calls, [1])
+        self.assertEqual(budget.get_stats()["exhausted"], 1)
+
+    def test_client_retries_rate_limit_but_not_bad_request(self):
+        """测试客户端遵循 Retry-After 重试 429，400 错误不重试"""
+        calls = {"rate": 0, "bad": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            prompt = json.loads(await request.aread())["prompt"]
+            if prompt == "限流":
+                calls["rate"] += 1
+                if calls["rate"] == 1:
+                    return httpx.Response(429, headers={"Retry-After": "0.05"}, json={"error": "busy"})
+                return httpx.Response(200, json={"data": [{"url": "https://example.com/out.png"}]})
+            calls["bad"] += 1
+            return httpx.Response(400, json={"error": {"message": "invalid size"}})
+
+        async def run_test():
+            config = SeedreamConfig(api_key="test_key", retry_base_delay=5, retry_max_delay=5)
+            client = SeedreamClient(config)
+            client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                ok = await client.text_to_image(prompt="限流", size="1K")
+                with self.assertRaises(SeedreamAPIError) as ctx:
+                    await client.text_to_image(prompt="参数错误", size="1K")
+                return ok, ctx.exception, client.get_stats()["retry"]
+            finally:
+                await client._client.aclose()
+
+        ok, error, stats = asyncio.run(run_test())
+
+        self.assertTrue(ok["success"])
+        self.assertEqual(calls, {"rate": 2, "bad": 1})
+        self.assertEqual(error.status_code, 400)
+        self.assertEqual(stats["retry_after_honored"], 1)
+        self.assertEqual(stats["non_retryable"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+测试服务器工具分发与延迟加载
+
+验证按注册表分发工具调用，以及导入包和服务器模块时不加载工具处理模块与重量级依赖。
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from seedream_mcp.server import SeedreamMCPServer
+from seedream_mcp.tools import TOOL_REGISTRY
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _loaded_modules(statement: str, names):
+    """在全新进程中执行导入语句，返回其中已加载的模块"""
+    code = (
+        f"import json, sys\n{statement}\n"
+        f"print(json.dumps([name for name in {list(names)!r} if name in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class TestServerDispatch(unittest.TestCase):
+    """测试服务器工具分发与延迟加载"""
+
+    def test_imports_are_lazy(self):
+        """测试导入配置不加载客户端，导入服务器不加载工具处理模块"""
+        heavy = ["httpx", "aiohttp", "loguru", "mcp", "seedream_mcp.client"]
+        self.assertEqual(_loaded_modules("from seedream_mcp import SeedreamConfig", heavy), [])
+
+        handlers = [f"seedream_mcp.tools.{entry.module}" for entry in TOOL_REGISTRY.values()]
+        self.assertEqual(
+            _loaded_modules("from seedream_mcp.server import SeedreamMCPServer; SeedreamMCPServer()",
+                            handlers + ["aiohttp", "seedream_mcp.client", "seedream_mcp.utils.qiniu_uploader"]),
+            []
+        )
+
+    def test_list_tools_is_lazy(self):
+        """测试客户端初始化后列出工具时只加载工具定义，不加载处理模块与重量级依赖"""
+        handlers = [f"seedream_mcp.tools.{entry.module}" for entry in TOOL_REGISTRY.values()]
+        statement = (
+            "import asyncio\n"
+            "from mcp.types import ListToolsRequest\n"
+            "from seedream_mcp.server import SeedreamMCPServer\n"
+            "handler = SeedreamMCPServer().server.request_handlers[ListToolsRequest]\n"
+            "asyncio.run(handler(ListToolsRequest(method='tools/list')))"
+        )
+        heavy = handlers + ["aiohttp", "seedream_mcp.client", "seedream_mcp.utils.qiniu_uploader"]
+        self.assertEqual(_loaded_modules(statement, heavy + ["seedream_mcp.tools.definitions"]),
+                         ["seedream_mcp.tools.definitions"])
+
+    def test_dispatch_through_registry(self):
+        """测试按注册表列出工具并分发调用"""
+        server = SeedreamMCPServer()
+        self.assertEqual([tool.name for tool in server.tools], list(TOOL_REGISTRY))
+
+        async def run_test():
+            server.client = object()
+            content = await server._dispatch_tool("seedream_prompt_templates", {})
+            with patch("seedream_mcp.tools.text_to_image.handle_text_to_image") as handler:
+                handler.return_value = ["generated"]
+                generated = await server._dispatch_tool("seedream_text_to_image", {"prompt": "猫"})
+                handler.assert_awaited_once_with({"prompt": "猫"}, client=server.client)
+            return content, generated
+
+        content, generated = asyncio.run(run_test())
+        self.assertEqual(content[0].type, "text")
+        self.assertEqual(generated, ["generated"])
+
+        with self.assertRaises(Exception) as ctx:
+            asyncio.run(server._dispatch_tool("seedream_unknown", {}))
+        self.assertIn("未知的工具", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+测试请求合并
+
+验证并发的相同请求只触发一次上游调用，并各自获得独立的结果副本。
+"""
+
+import asyncio
+import unittest
+
+import httpx
+
+from seedream_mcp.client import SeedreamClient
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """测试请求合并"""
+
+    def test_concurrent_identical_calls_share_one_upstream_call(self):
+        """测试相同键的并发调用只执行一次"""
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"data": [{"url": "https://example.com/a.png"}]}
+
+        async def run_test():
+            key = SingleFlight.make_key({"prompt": "cat", "size": "2K"})
+            same_key = SingleFlight.make_key({"size": "2K", "prompt": "cat"})
+            self.assertEqual(key, same_key)
+            return await asyncio.gather(*[flight.do(key, fetch) for _ in range(3)])
+
+        results = asyncio.run(run_test())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results[0], results[1])
+        # 每个调用方拿到独立副本
+        results[0]["data"][0]["url"] = "changed"
+        self.assertEqual(results[1]["data"][0]["url"], "https://example.com/a.png")
+        self.assertEqual(flight.get_stats()["coalesced"], 2)
+        self.assertEqual(flight.get_stats()["in_flight"], 0)
+
+    def test_errors_propagate_and_waiter_cancellation_is_isolated(self):
+        """测试异常传递给所有等待方，单个等待方取消不影响其他等待方"""
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("boom")
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            return "ok"
+
+        async def run_test():
+            errors = await asyncio.gather(
+                flight.do("k1", failing), flight.do("k1", failing), return_exceptions=True
+            )
+            first = asyncio.create_task(flight.do("k2", slow))
+            second = asyncio.create_task(flight.do("k2", slow))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return errors, await second
+
+        errors, value = asyncio.run(run_test())
+
+        self.assertTrue(all(isinstance(e, RuntimeError) for e in errors))
+        self.assertEqual(value, "ok")
+
+    def test_client_coalesces_identical_requests(self):
+        """测试客户端合并相同的生成请求"""
+        requests = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(await request.aread())
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"data": [{"url": "https://example.com/out.png"}]})
+
+        async def run_test():
+            client = SeedreamClient(SeedreamConfig(api_key="test_key"))
+            client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                return await asyncio.gather(
+                    client.text_to_image(prompt="同一个提示词", size="1K"),
+                    client.text_to_image(prompt="同一个提示词", size="1K"),
+                    client.text_to_image(prompt="另一个提示词", size="1K"),
+                )
+            finally:
+                await client._client.aclose()
+
+        results = asyncio.run(run_test())
+
+        self.assertEqual(len(requests), 2)
+        self.assertTrue(all(r["success"] for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+测试存储索引
+
+验证保存图片时更新索引、按工具和日期汇总、按索引清理过期图片，
+以及在服务之外增删图片后从磁盘重建索引。
+"""
+
+import asyncio
+import base64
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from seedream_mcp.utils.auto_save import AutoSaveManager
+from seedream_mcp.utils.storage_index import INDEX_DB_NAME, main, open_storage_index
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + os.urandom(2048)
+
+
+class TestStorageIndex(unittest.TestCase):
+    """测试存储索引"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.temp_dir.cleanup()
+
+    def _save(self, manager: AutoSaveManager, names, tool_name="text_to_image"):
+        async def run_test():
+            b64_data = base64.b64encode(PNG_BYTES).decode()
+            return [
+                await manager.save_base64_image(b64_data, prompt="猫", tool_name=tool_name, custom_name=name)
+                for name in names
+            ]
+
+        return asyncio.run(run_test())
+
+    def test_saves_update_index(self):
+        """测试保存图片后存储信息来自索引，并按工具和日期汇总"""
+        manager = AutoSaveManager(self.base)
+        self._save(manager, ["cat_a", "cat_b"])
+        self._save(manager, ["dog"], tool_name="image_to_image")
+
+        info = manager.get_storage_info()
+        self.assertEqual(info["total_files"], 3)
+        self.assertEqual(info["total_size_bytes"], 3 * len(PNG_BYTES))
+        self.assertEqual(info["by_tool"]["text_to_image"], {"files": 2, "size_bytes": 2 * len(PNG_BYTES)})
+        self.assertEqual(info["by_tool"]["image_to_image"]["files"], 1)
+        today = time.strftime("%Y-%m-%d")
+        self.assertEqual(info["by_day"], {today: {"files": 3, "size_bytes": 3 * len(PNG_BYTES)}})
+        self.assertTrue((self.base / INDEX_DB_NAME).exists())
+        asyncio.run(manager.close())
+
+    def test_cleanup_uses_saved_time(self):
+        """测试清理按保存时间删除过期文件，修改时间变化不影响，并删除随之变空的目录"""
+        old_path = self.base / "2025-01-02" / "text_to_image" / "old.png"
+        old_path.parent.mkdir(parents=True)
+        old_path.write_bytes(PNG_BYTES)
+        old_time = time.time() - 40 * 86400
+        os.utime(old_path, (old_time, old_time))
+
+        # 首次打开索引时已有的文件以修改时间作为保存时间
+        manager = AutoSaveManager(self.base)
+        (new,) = self._save(manager, ["new"])
+        new_path = Path(new.local_path)
+        os.utime(new_path, (old_time, old_time))
+        asyncio.run(manager.reconcile_index())
+
+        result = asyncio.run(manager.cleanup_old_files(days=30))
+        self.assertEqual(result["deleted_files"], 1)
+        self.assertEqual(result["deleted_size"], len(PNG_BYTES))
+        self.assertFalse((self.base / "2025-01-02").exists())
+        self.assertTrue(new_path.exists())
+        self.assertEqual(manager.get_storage_info()["total_files"], 1)
+        asyncio.run(manager.close())
+
+    def test_reconcile_picks_up_external_changes(self):
+        """测试重建索引时加入外部复制的图片、删除已不存在的图片的记录"""
+        manager = AutoSaveManager(self.base)
+        (saved,) = self._save(manager, ["cat"])
+        Path(saved.local_path).unlink()
+        external = self.base / "imported" / "photo.png"
+        external.parent.mkdir()
+        external.write_bytes(b"x" * 10)
+        (self.base / "imported" / "photo.png.part").write_bytes(b"x")
+
+        self.assertEqual(manager.get_storage_info()["total_files"], 1)
+        result = asyncio.run(manager.reconcile_index())
+        self.assertEqual(result, {"scanned": 1, "added": 1, "updated": 0, "removed": 1})
+
+        info = manager.get_storage_info()
+        self.assertEqual(info["total_size_bytes"], 10)
+        self.assertEqual(info["by_tool"], {"imported": {"files": 1, "size_bytes": 10}})
+        asyncio.run(manager.close())
+
+    def test_existing_directory_indexed_on_first_open(self):
+        """测试首次打开索引时从磁盘建立，命令行可重建索引"""
+        day_dir = self.base / "2025-01-02" / "text_to_image"
+        day_dir.mkdir(parents=True)
+        (day_dir / "a.png").write_bytes(b"a" * 5)
+        (self.base / ".seedream_objects").mkdir()
+        (self.base / ".seedream_objects" / "blob").write_bytes(b"b" * 7)
+
+        index = open_storage_index(self.base)
+        summary = index.summary()
+        index.close()
+        self.assertEqual(summary["total_files"], 1)
+        self.assertEqual(summary["by_day"], {"2025-01-02": {"files": 1, "size_bytes": 5}})
+        self.assertEqual(summary["by_tool"], {"text_to_image": {"files": 1, "size_bytes": 5}})
+        self.assertEqual(main(["reconcile", "--dir", str(self.base)]), 0)
+
+    def test_disabled_index_walks_directory(self):
+        """测试关闭索引时遍历目录统计，不创建索引数据库"""
+        manager = AutoSaveManager(self.base, index_enabled=False)
+        self._save(manager, ["cat"])
+        info = manager.get_storage_info()
+        self.assertEqual(info["total_files"], 1)
+        self.assertNotIn("by_tool", info)
+        self.assertFalse((self.base / INDEX_DB_NAME).exists())
+        asyncio.run(manager.close())
+
+
+if __name__ == "__main__":
+    unittest.main()
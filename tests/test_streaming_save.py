@@ -0,0 +1,101 @@
+"""
+测试流水线式保存与上传
+
+验证批量保存按完成顺序产出结果、进度按完成顺序报告，
+以及每张图片保存完成后立即开始上传，不等待其余图片下载完成。
+"""
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from seedream_mcp.config import SeedreamConfig
+from seedream_mcp.tools.image_helpers import save_and_upload
+from seedream_mcp.utils.auto_save import AutoSaveManagerRegistry, AutoSaveResult
+from seedream_mcp.utils.progress import ProgressReporter, progress_scope
+
+# 每张图片的模拟下载耗时（秒），第一张最慢
+DOWNLOAD_DELAYS = {"https://example.com/0.jpeg": 0.2, "https://example.com/1.jpeg": 0.01,
+                   "https://example.com/2.jpeg": 0.05}
+
+
+class _FakeUploader:
+    """记录上传开始时间的七牛云上传器"""
+
+    enabled = True
+
+    def __init__(self, events):
+        self.events = events
+
+    async def upload_image_async(self, local_path, content=None, index=0, total=1):
+        self.events.append(("upload", index))
+        return f"https://cdn.example.com/{Path(local_path).name}"
+
+
+class TestStreamingSave(unittest.TestCase):
+    """测试流水线式保存与上传"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        config = SeedreamConfig(api_key="test_key", auto_save_max_concurrent=3)
+        self.registry = AutoSaveManagerRegistry()
+        self.manager = self.registry.get_manager(Path(self.temp_dir.name), config)
+        self.events = []
+
+        async def fake_save_image(url, prompt="", tool_name="seedream", custom_name=None,
+                                  alt_text=None, keep_content=False):
+            await asyncio.sleep(DOWNLOAD_DELAYS[url])
+            self.events.append(("saved", url))
+            return AutoSaveResult(success=True, original_url=url,
+                                  local_path=f"{self.temp_dir.name}/{Path(url).name}")
+
+        self.manager.save_image = fake_save_image
+        self.image_data = [{"url": url, "prompt": "猫"} for url in DOWNLOAD_DELAYS]
+
+    def tearDown(self):
+        """清理测试环境"""
+        asyncio.run(self.registry.close_all())
+        self.temp_dir.cleanup()
+
+    def test_results_streamed_in_completion_order(self):
+        """测试按完成顺序产出结果并报告进度，批量保存仍按输入顺序返回"""
+        messages = []
+
+        async def record(progress, total, message, data):
+            messages.append((message, data["index"]))
+
+        async def run_test():
+            with progress_scope(ProgressReporter(record)):
+                streamed = [index async for index, _ in self.manager.stream_images(self.image_data)]
+            ordered = await self.manager.save_multiple_images(self.image_data)
+            return streamed, ordered
+
+        streamed, ordered = asyncio.run(run_test())
+        self.assertEqual(streamed, [1, 2, 0])
+        self.assertEqual([index for _, index in messages], [1, 2, 0])
+        self.assertTrue(messages[0][0].startswith("图片 2/3 已保存"))
+        self.assertEqual([r.original_url for r in ordered], list(DOWNLOAD_DELAYS))
+
+    def test_upload_starts_before_slow_download_finishes(self):
+        """测试首张保存完成的图片立即上传，七牛云链接写回对应的结果项"""
+        result = {"data": [{"url": url} for url in DOWNLOAD_DELAYS]}
+
+        async def run_test():
+            with patch("seedream_mcp.utils.qiniu_uploader.get_qiniu_uploader",
+                       return_value=_FakeUploader(self.events)):
+                return await save_and_upload(
+                    self.manager.stream_images(self.image_data), len(self.image_data), result
+                )
+
+        auto_save_results = asyncio.run(run_test())
+        self.assertLess(self.events.index(("upload", 1)),
+                        self.events.index(("saved", "https://example.com/0.jpeg")))
+        self.assertEqual([r.original_url for r in auto_save_results], list(DOWNLOAD_DELAYS))
+        self.assertEqual(result["data"][0]["qiniu_url"], "https://cdn.example.com/0.jpeg")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+测试工具调用调度
+
+验证生成并发池按优先级放行、组图生成单独限流，以及本地工具不排队。
+"""
+
+import asyncio
+import unittest
+
+from seedream_mcp.utils.tool_scheduler import PriorityLimiter, ToolPolicy, ToolScheduler
+
+POLICIES = {
+    "seedream_text_to_image": ToolPolicy(generation=True, priority=0),
+    "seedream_sequential_generation": ToolPolicy(generation=True, priority=2, max_concurrent=1),
+}
+
+
+class TestToolScheduler(unittest.TestCase):
+    """测试工具调用调度"""
+
+    def test_waiters_served_by_priority(self):
+        """测试名额释放后优先放行高优先级的等待者"""
+        async def run_test():
+            limiter = PriorityLimiter(1)
+            order = []
+            await limiter.acquire()
+
+            async def waiter(name, priority):
+                await limiter.acquire(priority)
+                order.append(name)
+                limiter.release()
+
+            tasks = [
+                asyncio.create_task(waiter("low", 2)),
+                asyncio.create_task(waiter("cancelled", 0)),
+                asyncio.create_task(waiter("high", 0)),
+            ]
+            await asyncio.sleep(0)
+            tasks[1].cancel()
+            limiter.release()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return order, limiter.active
+
+        order, active = asyncio.run(run_test())
+        self.assertEqual(order, ["high", "low"])
+        self.assertEqual(active, 0)
+
+    def test_local_tools_do_not_queue_behind_generation(self):
+        """测试生成并发池占满时本地工具仍立即执行，组图生成按自身上限排队"""
+        scheduler = ToolScheduler(POLICIES, generation_concurrency=1)
+
+        async def run_test():
+            release = asyncio.Event()
+
+            async def generate():
+                await release.wait()
+                return "image"
+
+            async def browse():
+                return "listing"
+
+            busy = asyncio.create_task(scheduler.run("seedream_text_to_image", generate))
+            seq_a = asyncio.create_task(scheduler.run("seedream_sequential_generation", generate))
+            seq_b = asyncio.create_task(scheduler.run("seedream_sequential_generation", generate))
+            await asyncio.sleep(0.01)
+
+            listing = await asyncio.wait_for(scheduler.run("seedream_browse_images", browse), 0.1)
+            during = scheduler.get_stats()
+            release.set()
+            await asyncio.gather(busy, seq_a, seq_b)
+            return listing, during, scheduler.get_stats()
+
+        listing, during, after = asyncio.run(run_test())
+
+        self.assertEqual(listing, "listing")
+        self.assertEqual(during["generation_pool"], {"limit": 1, "active": 1, "waiting": 1})
+        self.assertEqual(during["tools"]["seedream_sequential_generation"]["queued"], 2)
+        self.assertEqual(after["tools"]["seedream_sequential_generation"]["calls"], 2)
+        self.assertEqual(after["tools"]["seedream_sequential_generation"]["max_queued"], 2)
+        self.assertEqual(after["generation_pool"]["active"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()